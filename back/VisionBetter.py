@@ -3,14 +3,39 @@ import time
 import os
 from datetime import datetime
 from collections import defaultdict, deque, Counter
-import json
+import multiprocessing
+import queue
 import numpy as np
-import csv
 
 import torch
 from ultralytics import YOLO
 from dotenv import load_dotenv
 
+from app.eventbus import AsyncCsvWriter, EventPublisher, new_event_id
+from app.store import CSV_FIELDS, prepare_csv
+from app.detection_config import CONFIG_KEYS, ConfigWatcher, roi_error
+from ingest_client import IngestClient
+from spatial_index import SpatialDedupeIndex
+from motion import KalmanBoxBank, greedy_match, iou_matrix
+from tiling import run_tiled
+from postprocess import (
+    CLS, CONF, ClassTable, as_array, filter_detections, results_to_array,
+)
+from roi_calibration import RoiCalibrator
+from stream import StreamReader
+from checkpoint import atomic_write_json, load_json
+from vocabulary import ModelSwapper
+from tracing import ProfileTrigger, Tracer
+from frame_ring import FrameRing
+from crop_server import CropServer
+from video_publisher import VideoPublisher
+from snapshot_writer import SnapshotWriter
+from dvr import ClipRecorder, JpegRing
+from preprocess import ModelInput, predict
+from cpu_profile import (
+    apply_runtime, available_cores, blank_frame, make_profile, optimize_model, parse_cores, warm_up,
+)
+
 # =========================
 # Load env BEFORE using os.getenv
 # =========================
@@ -25,15 +50,86 @@ IOU_THRES = 0.45        # standard NMS threshold
 IMG_SIZE = 640          # higher resolution → better detections
 MIN_BOX_AREA = 35 * 35  # ignore tiny flicker boxes
 
+# Tiled inference: split the ROI into overlapping TILE_SIZE tiles at native
+# resolution (one batched call + cross-tile NMS) so small items (straws,
+# wrappers, lids) survive on high-resolution cameras. Costs more per frame.
+USE_TILING = False
+TILE_SIZE = 640
+TILE_OVERLAP = 0.2
+MIN_BOX_AREA_TILED = 16 * 16
+
 LOG_FILE = "detections.log"
 UNKNOWN_LOG_FILE = "unknown_labels.log"
 STATS_FILE = "detection_stats.json"
 CSV_FILE = "current.csv"
+CHECKPOINT_FILE = "tracker_checkpoint.json"
 
 DEBUG_LOG_UNKNOWN = True
 FRAME_SKIP = 0          # Process every N frames (0 = all)
 USE_FP16 = False        # YOLO-World prefers FP32
 STATS_SAVE_INTERVAL = 30  # Save stats every N seconds
+# Per-stage spans (capture/preprocess/inference/postprocess/track/persist/render);
+# 'p' or SIGUSR1 toggles cProfile, 't' or SIGUSR2 writes a Chrome trace
+TRACE_ENABLED = os.getenv("TRACE", "1") == "1"
+TRACE_CAPACITY = 2048     # samples kept per span
+CONFIG_POLL_INTERVAL = 1.0  # how often to check detection_config.json for edits
+VOCAB_CACHE_SIZE = int(os.getenv("VOCAB_CACHE_SIZE", "2"))  # models kept per vocabulary
+CHECKPOINT_INTERVAL = float(os.getenv("CHECKPOINT_INTERVAL_S", "5"))  # tracker/dedupe/stats snapshot
+
+# Multi-process mode (see frame_ring.py): a capture process decodes into a
+# shared-memory ring, INFERENCE_PROCS processes run the model on the newest
+# frames, this process tracks/logs/displays. 0 = classic single-process loop.
+# A frame stays pinned in the ring from inference until it has been drawn, so
+# slow inference can't be lapped; the ring is sized for the most frames that
+# can be pinned at once (FRAME_RING_SLOTS overrides, 0 = that size).
+INFERENCE_PROCS = int(os.getenv("INFERENCE_PROCS", "0"))
+RESULT_QUEUE_SIZE = max(1, INFERENCE_PROCS)  # results (each holding a pinned frame) in flight
+FRAME_RING_SLOTS = int(os.getenv("FRAME_RING_SLOTS", "0")) or FrameRing.slots_needed(
+    INFERENCE_PROCS, RESULT_QUEUE_SIZE
+)
+
+# Split mode (see edge_prefilter.py / crop_server.py): edge nodes send JPEG
+# crops of moving regions, this process batches inference over all bins.
+CROP_SERVER_PORT = int(os.getenv("CROP_SERVER_PORT", "0"))  # 0 = off
+# edge nodes must send CROP_TOKEN; without one the server only listens on loopback
+CROP_SERVER_HOST = os.getenv("CROP_SERVER_HOST", "")
+CROP_TOKEN = os.getenv("CROP_TOKEN", "")
+CROP_WORKERS = int(os.getenv("CROP_WORKERS", "1"))  # each loads its own model
+CROP_BATCH = int(os.getenv("CROP_BATCH", "8"))
+CROP_IMG_SIZE = int(os.getenv("CROP_IMG_SIZE", "320"))  # crops are small; full IMG_SIZE wastes work
+
+# Stream input (see stream.py). MJPEG_DIRECT parses the Pi's MJPEG HTTP
+# stream ourselves; DECODE_REDUCE (1/2/4/8) decodes JPEGs at reduced scale.
+MJPEG_DIRECT = os.getenv("MJPEG_DIRECT", "0") == "1"
+DECODE_REDUCE = int(os.getenv("DECODE_REDUCE", "1"))
+
+# CPU execution (see cpu_profile.py), used when CUDA isn't available.
+# CPU_PROFILE: "default" leaves PyTorch as it comes, "tuned" pins threads and
+# cores and uses channels-last weights, "compiled" adds torch.compile.
+# CPU_THREADS 0 = every core we may run on (split between INFERENCE_PROCS);
+# CPU_CORES pins to a list like "0-3,6". WARMUP_RUNS inferences at the real
+# input size run before the stream is opened, on any device.
+CPU_PROFILE = os.getenv("CPU_PROFILE", "tuned")
+CPU_THREADS = int(os.getenv("CPU_THREADS", "0"))
+CPU_CORES = os.getenv("CPU_CORES", "")
+WARMUP_RUNS = int(os.getenv("WARMUP_RUNS", "3"))
+
+# Model input built in preallocated buffers and fed straight to the network
+# (see preprocess.py); 0 = let ultralytics preprocess each frame itself.
+DIRECT_INPUT = os.getenv("DIRECT_INPUT", "1") == "1"
+
+# In-memory DVR (see dvr.py): the stream's last DVR_SECONDS of JPEG bytes in
+# a fixed DVR_MAX_MB buffer; clips around logged events and API requests
+# (POST /video/{camera}/clip) are written to CLIP_DIR in the background,
+# which is capped at CLIP_MAX_MB (least recently downloaded clips go first).
+# Needs MJPEG_DIRECT: the FFmpeg backend never sees the compressed frames.
+DVR_ENABLED = os.getenv("DVR", "0") == "1"
+DVR_MAX_MB = float(os.getenv("DVR_MAX_MB", "64"))
+DVR_SECONDS = float(os.getenv("DVR_SECONDS", "30"))
+CLIP_PRE_S = float(os.getenv("CLIP_PRE_S", "10"))
+CLIP_POST_S = float(os.getenv("CLIP_POST_S", "5"))
+CLIP_ON_EVENT = os.getenv("CLIP_ON_EVENT", "1") == "1"
+CLIP_MAX_MB = float(os.getenv("CLIP_MAX_MB", "1024"))
 
 # Restrict detection to the bin region in the frame
 USE_ROI = True
@@ -42,14 +138,29 @@ ROI_BOTTOM_FRAC = 1.0
 ROI_LEFT_FRAC = 0.2
 ROI_RIGHT_FRAC = 0.8
 
-# Spatial dedupe buckets (used when we finally log a stable track)
-POS_MARGIN_PX = 45  # bucket width/height in pixels
+# Learn the ROI per camera instead of using the fractions above: run
+# full-frame for ROI_WARMUP_S while accumulating a detection/motion heatmap,
+# then crop to where items actually appear (saved to ROI_FILE, re-checked
+# every ROI_REVALIDATE_S).
+ROI_AUTO_CALIBRATE = os.getenv("ROI_AUTO_CALIBRATE", "0") == "1"
+CAMERA_ID = os.getenv("CAMERA_ID", "default")
+ROI_FILE = "roi_calibration.json"
+ROI_WARMUP_S = 120.0
+ROI_REVALIDATE_S = 3600.0
+
+# Spatial dedupe grid (used when we finally log a stable track).
+# Override per camera through the environment.
+POS_MARGIN_PX = int(os.getenv("DEDUPE_CELL_PX", "45"))        # cell width/height in pixels
+DEDUPE_TTL_S = float(os.getenv("DEDUPE_TTL_S", "60"))         # a region is free again after this
+DEDUPE_NEIGHBOR_CELLS = int(os.getenv("DEDUPE_NEIGHBOR_CELLS", "1"))  # also check adjacent cells
+DEDUPE_MAX_CELLS = 4096
 
 # Simple multi-frame tracking
 USE_SIMPLE_TRACKER = True
 MIN_STABLE_FRAMES = 3        # require N frames before we log an item
 TRACK_IOU_THRESH = 0.4       # IoU to match detections to tracks
 MAX_TRACK_MISSES = 15        # frames until a lost track is dropped
+USE_KALMAN = True            # match against Kalman-predicted boxes (needed below ~5 FPS)
 
 # =========================
 # Label → coarse type mapping
@@ -190,6 +301,17 @@ COARSE_CO2 = {
     "other":     {"co2_item_kg": 0.05, "saving_fraction": 0.0},
 }
 
+# Built-in values; detection_config.json (app/detection_config.py) overrides
+# any of them at runtime, and removing an override falls back to these
+DETECTION_DEFAULTS = {
+    "conf_thres": CONF_THRES,
+    "iou_thres": IOU_THRES,
+    "min_box_area": MIN_BOX_AREA,
+    "roi": {"top": ROI_TOP_FRAC, "bottom": ROI_BOTTOM_FRAC, "left": ROI_LEFT_FRAC, "right": ROI_RIGHT_FRAC},
+    "prompt_to_coarse": dict(PROMPT_TO_COARSE),
+    "coarse_to_bin": dict(COARSE_TO_BIN),
+}
+
 # =========================
 # GPU/CUDA Verification
 # =========================
@@ -220,6 +342,7 @@ def check_gpu_availability():
     else:
         print("⚠️  WARNING: CUDA not available, running on CPU")
         print("This will be significantly slower!")
+        print(f"CPU profile: {CPU_PROFILE} (CPU_PROFILE=default/tuned/compiled)")
         device = "cpu"
     
     print("="*50 + "\n")
@@ -239,7 +362,8 @@ class DetectionStats:
         self.items_by_bin = defaultdict(int)
         self.total_co2_saved = 0.0
         self.total_co2_footprint = 0.0
-        self.confidence_scores = []
+        self.confidence_sum = 0.0
+        self.confidence_count = 0
         self.processing_times = deque(maxlen=100)
         self.fps_history = deque(maxlen=30)
         self.unique_tracked_items = set()
@@ -255,7 +379,8 @@ class DetectionStats:
             self.items_by_bin[det['bin_type']] += 1
             self.total_co2_saved += det['co2_saved']
             self.total_co2_footprint += det['co2_item']
-            self.confidence_scores.append(det['conf'])
+            self.confidence_sum += det['conf']
+            self.confidence_count += 1
             
             if det.get('track_id') is not None:
                 track_key = f"{det['label']}_{det['track_id']}"
@@ -272,7 +397,7 @@ class DetectionStats:
     def get_summary(self):
         """Get current statistics summary"""
         runtime = time.time() - self.start_time
-        avg_conf = np.mean(self.confidence_scores) if self.confidence_scores else 0
+        avg_conf = self.confidence_sum / self.confidence_count if self.confidence_count else 0
         avg_proc_time = np.mean(self.processing_times) if self.processing_times else 0
         avg_fps = np.mean(self.fps_history) if self.fps_history else 0
         
@@ -299,10 +424,41 @@ class DetectionStats:
     def save_to_file(self):
         """Save statistics to JSON file"""
         try:
-            with open(STATS_FILE, 'w') as f:
-                json.dump(self.get_summary(), f, indent=2)
+            atomic_write_json(STATS_FILE, self.get_summary(), indent=2)
         except Exception as e:
             print(f"Failed to save stats: {e}")
+
+    def to_checkpoint(self):
+        """Running totals needed to resume after a restart."""
+        return {
+            'runtime_seconds': time.time() - self.start_time,
+            'frame_count': self.frame_count,
+            'detection_count': self.detection_count,
+            'items_by_type': dict(self.items_by_type),
+            'items_by_bin': dict(self.items_by_bin),
+            'total_co2_saved': self.total_co2_saved,
+            'total_co2_footprint': self.total_co2_footprint,
+            'confidence_sum': self.confidence_sum,
+            'confidence_count': self.confidence_count,
+            'unique_tracked_items': sorted(self.unique_tracked_items),
+        }
+
+    def restore(self, doc):
+        self.start_time = time.time() - doc['runtime_seconds']
+        self.frame_count = doc['frame_count']
+        self.detection_count = doc['detection_count']
+        self.items_by_type = defaultdict(int, doc['items_by_type'])
+        self.items_by_bin = defaultdict(int, doc['items_by_bin'])
+        self.total_co2_saved = doc['total_co2_saved']
+        self.total_co2_footprint = doc['total_co2_footprint']
+        if 'confidence_scores' in doc:
+            # older checkpoints kept every score
+            self.confidence_sum = float(sum(doc['confidence_scores']))
+            self.confidence_count = len(doc['confidence_scores'])
+        else:
+            self.confidence_sum = doc['confidence_sum']
+            self.confidence_count = doc['confidence_count']
+        self.unique_tracked_items = set(doc['unique_tracked_items'])
     
     def print_summary(self):
         """Print current statistics to console"""
@@ -332,8 +488,13 @@ class DetectionStats:
 # Track unknown labels we've already noted (for debug log only)
 SEEN_UNKNOWN = set()
 
-# Spatial dedupe for *logged* events (per run)
-SEEN_EVENTS = set()  # e.g. "plastic:2:5", "unknown:4:7"
+# Spatial dedupe for *logged* events: class -> recently used grid cells
+SEEN_EVENTS = SpatialDedupeIndex(
+    cell_px=POS_MARGIN_PX,
+    ttl_s=DEDUPE_TTL_S,
+    neighbor_radius=DEDUPE_NEIGHBOR_CELLS,
+    max_entries=DEDUPE_MAX_CELLS,
+)
 
 def estimate_co2(coarse_category, bin_type):
     profile = COARSE_CO2.get(coarse_category, COARSE_CO2["other"])
@@ -396,25 +557,89 @@ def log_new_item(label, coarse, bin_type, co2_item_kg, co2_saved_kg):
 
 # ========== CSV OUTPUT HELPERS ==========
 
+# Events go to the API over the local bus first; the CSV append happens
+# on a background thread (see app/eventbus.py). With INGEST_URL set this is
+# an edge node: events are batched to the central API's /events/batch instead.
+INGEST_URL = os.getenv("INGEST_URL", "")
+EVENT_BUS = (
+    IngestClient(INGEST_URL, os.getenv("NODE_ID", CAMERA_ID), token=os.getenv("INGEST_TOKEN", ""))
+    if INGEST_URL else EventPublisher()
+)
+CSV_WRITER = None
+
 def init_csv():
-    """Create / overwrite the CSV file with header."""
+    """
+    Append to the existing CSV (a restart must not wipe what's already in
+    the bin). A file with an older header is converted first; the writer
+    adds the header to a new/empty file.
+    """
+    global CSV_WRITER
     try:
-        with open(CSV_FILE, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["timestamp", "TopCornerOfBoundary", "item", "class"])
+        # same layout as /events/batch writes (app/store.py CSV_FIELDS)
+        backup = prepare_csv(CSV_FILE)
+        if backup:
+            print(f"CSV converted to the current layout, original kept as {backup}")
     except Exception as e:
-        print(f"Failed to init CSV file: {e}")
+        print(f"Failed to check CSV file: {e}")
+    CSV_WRITER = AsyncCsvWriter(CSV_FILE, CSV_FIELDS)
 
 def log_csv_detection(x1, y1, label, cls_str):
-    """Append one detection row to the CSV."""
-    timestamp = datetime.now().isoformat()
-    top_corner_str = f"{x1},{y1}"  # (x1,y1) as "x,y"
-    try:
-        with open(CSV_FILE, "a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow([timestamp, top_corner_str, label, cls_str])
-    except Exception as e:
-        print(f"Failed to write CSV detection: {e}")
+    """Publish one detection to the API and queue its CSV row."""
+    row = {
+        "timestamp": time.time(),
+        "location": f"{x1},{y1}",  # (x1,y1) as "x,y"
+        "item": label,
+        "classification": cls_str,
+        "event_id": new_event_id(),
+    }
+    EVENT_BUS.publish(row)
+    if CSV_WRITER is not None:
+        CSV_WRITER.write(row)
+    return row["event_id"]
+
+# ========== EVENT SNAPSHOTS ==========
+
+# A small JPEG of each logged item, served by the API at
+# /events/{event_id}/snapshot (see app/snapshots.py)
+SNAPSHOTS_ENABLED = os.getenv("SNAPSHOTS", "1") == "1"
+SNAPSHOT_MAX_MB = float(os.getenv("SNAPSHOT_MAX_MB", "256"))
+SNAPSHOT_WRITER = None
+
+def init_snapshots():
+    global SNAPSHOT_WRITER
+    if SNAPSHOTS_ENABLED:
+        SNAPSHOT_WRITER = SnapshotWriter(max_bytes=int(SNAPSHOT_MAX_MB * 1024 * 1024))
+
+def save_snapshot(event_id, frame, bbox):
+    """Queue the bbox crop; encoding and disk writes happen on the writer thread."""
+    if SNAPSHOT_WRITER is not None and frame is not None:
+        SNAPSHOT_WRITER.submit(event_id, frame, bbox)
+
+# ========== DVR CLIPS ==========
+
+# callable(clip_id, at, pre_s, post_s): the ClipRecorder's mark() in this
+# process, or a queue to the capture process in multi-process mode
+CLIP_SINK = None
+
+def start_dvr():
+    if not DVR_ENABLED:
+        return None
+    if not MJPEG_DIRECT:
+        print("[dvr] DVR=1 needs MJPEG_DIRECT=1 (compressed frames), DVR disabled")
+        return None
+    ring = JpegRing(int(DVR_MAX_MB * 1024 * 1024), DVR_SECONDS)
+    print(f"[dvr] Keeping the last {DVR_SECONDS:.0f}s in {DVR_MAX_MB:.0f} MB")
+    return ClipRecorder(ring, pre_s=CLIP_PRE_S, post_s=CLIP_POST_S,
+                        max_bytes=int(CLIP_MAX_MB * 1024 * 1024))
+
+def request_clip(clip_id, pre_s=None, post_s=None):
+    """Clip from pre_s before now to post_s after (defaults CLIP_PRE_S / CLIP_POST_S)."""
+    if CLIP_SINK is not None:
+        CLIP_SINK(clip_id, time.time(), pre_s, post_s)
+
+def poll_clip_requests(video):
+    for req in video.take_clip_requests():
+        request_clip(str(req.get("id")), req.get("pre_s"), req.get("post_s"))
 
 # ========== SIMPLE TRACKER ==========
 
@@ -448,81 +673,118 @@ class Track:
         avg_conf = float(sum(self.confs) / len(self.confs))
         return final_label, self.coarse, self.bin_type, avg_conf
 
-TRACKS = {}
-NEXT_TRACK_ID = 0
+    # a long-lived track's history only needs its recent votes in a checkpoint
+    CHECKPOINT_HISTORY = 100
 
-def compute_iou(box1, box2):
-    x1, y1, x2, y2 = box1
-    x1b, y1b, x2b, y2b = box2
+    def to_dict(self):
+        n = self.CHECKPOINT_HISTORY
+        return {
+            'id': self.id,
+            'bbox': list(self.bbox),
+            'labels': self.labels[-n:],
+            'confs': self.confs[-n:],
+            'coarse': self.coarse,
+            'bin_type': self.bin_type,
+            'frames_seen': self.frames_seen,
+            'missed': self.missed,
+            'logged': self.logged,
+        }
 
-    inter_x1 = max(x1, x1b)
-    inter_y1 = max(y1, y1b)
-    inter_x2 = min(x2, x2b)
-    inter_y2 = min(y2, y2b)
+    @classmethod
+    def from_dict(cls, doc):
+        tr = cls(doc['id'], tuple(doc['bbox']), None, None, doc['coarse'], doc['bin_type'])
+        tr.labels = list(doc['labels'])
+        tr.confs = list(doc['confs'])
+        tr.frames_seen = doc['frames_seen']
+        tr.missed = doc['missed']
+        tr.logged = doc['logged']
+        return tr
 
-    inter_w = max(0, inter_x2 - inter_x1)
-    inter_h = max(0, inter_y2 - inter_y1)
-    inter_area = inter_w * inter_h
+TRACKS = {}
+NEXT_TRACK_ID = 0
+
+ROI_CALIBRATOR = (
+    RoiCalibrator(CAMERA_ID, ROI_FILE, warmup_s=ROI_WARMUP_S, revalidate_s=ROI_REVALIDATE_S)
+    if ROI_AUTO_CALIBRATE and USE_ROI else None
+)
 
-    area1 = max(0, x2 - x1) * max(0, y2 - y1)
-    area2 = max(0, x2b - x1b) * max(0, y2b - y1b)
+# Constant-velocity motion model: tracks are matched on where they should
+# be *now*, not where they were last seen (matters at low FPS / frame skip)
+KALMAN = KalmanBoxBank()
+LAST_TRACK_TIME = None
 
-    denom = float(area1 + area2 - inter_area)
-    if denom <= 0:
-        return 0.0
-    return inter_area / denom
+# Class id -> label/coarse/bin for the current model vocabulary
+CLASS_TABLE = None
 
-def make_region_key(coarse, bbox):
-    x1, y1, _, _ = bbox
-    region_x = x1 // POS_MARGIN_PX
-    region_y = y1 // POS_MARGIN_PX
-    key_class = coarse if coarse is not None else "unknown"
-    return f"{key_class}:{region_x}:{region_y}"
+def class_table(names):
+    """ClassTable for `names`, rebuilt only when the model's vocabulary changes."""
+    global CLASS_TABLE
+    if CLASS_TABLE is None or (CLASS_TABLE.names is not names and CLASS_TABLE.names != names):
+        CLASS_TABLE = ClassTable(names, classify_item)
+    return CLASS_TABLE
 
-def update_tracks(detections):
+def update_tracks(detections, frame=None):
     """
-    detections: list of dicts:
-        { 'bbox': (x1,y1,x2,y2), 'label', 'conf', 'coarse', 'bin_type' }
+    detections: (N, 6) array of x1, y1, x2, y2, conf, cls (see postprocess)
+    frame: the (unannotated) frame, for event snapshots; None = no snapshots
     Returns list of 'new stable events' for stats.
     """
-    global TRACKS, NEXT_TRACK_ID, SEEN_EVENTS
+    global TRACKS, NEXT_TRACK_ID, SEEN_EVENTS, LAST_TRACK_TIME
     new_events = []
     used_tracks = set()
 
-    # --- Associate detections to existing tracks ---
-    for det in detections:
-        bbox = det['bbox']
-        best_iou = 0.0
-        best_id = None
+    # --- Where is every track expected to be in this frame? ---
+    now = time.time()
+    if USE_KALMAN:
+        dt = now - LAST_TRACK_TIME if LAST_TRACK_TIME is not None else 0.0
+        track_ids, track_boxes = KALMAN.predict(dt)
+    else:
+        track_ids = list(TRACKS.keys())
+        track_boxes = [TRACKS[tid].bbox for tid in track_ids]
+    LAST_TRACK_TIME = now
+
+    # --- Associate detections to existing tracks (all pairs at once) ---
+    matches = greedy_match(iou_matrix(detections[:, :4], track_boxes), TRACK_IOU_THRESH)
+
+    labels, coarses, bin_types = CLASS_TABLE.lookup(detections[:, CLS])
+    boxes = detections[:, :4].astype(int).tolist()
+    confs = detections[:, CONF].tolist()
 
-        for tid, tr in TRACKS.items():
-            i = compute_iou(bbox, tr.bbox)
-            if i > best_iou:
-                best_iou = i
-                best_id = tid
+    matched_ids = []
+    matched_boxes = []
+    for di in range(len(detections)):
+        bbox = tuple(boxes[di])
 
-        if best_iou > TRACK_IOU_THRESH and best_id is not None:
+        if di in matches:
+            best_id = track_ids[matches[di]]
             TRACKS[best_id].update(
                 bbox=bbox,
-                label=det['label'],
-                conf=det['conf'],
-                coarse=det['coarse'],
-                bin_type=det['bin_type'],
+                label=labels[di],
+                conf=confs[di],
+                coarse=coarses[di],
+                bin_type=bin_types[di],
             )
             used_tracks.add(best_id)
+            matched_ids.append(best_id)
+            matched_boxes.append(bbox)
         else:
             tr = Track(
                 NEXT_TRACK_ID,
                 bbox=bbox,
-                label=det['label'],
-                conf=det['conf'],
-                coarse=det['coarse'],
-                bin_type=det['bin_type'],
+                label=labels[di],
+                conf=confs[di],
+                coarse=coarses[di],
+                bin_type=bin_types[di],
             )
             TRACKS[NEXT_TRACK_ID] = tr
+            if USE_KALMAN:
+                KALMAN.add(NEXT_TRACK_ID, bbox)
             used_tracks.add(NEXT_TRACK_ID)
             NEXT_TRACK_ID += 1
 
+    if USE_KALMAN:
+        KALMAN.update(matched_ids, matched_boxes)
+
     # --- Update missed counts / remove dead tracks ---
     dead_ids = []
     for tid, tr in TRACKS.items():
@@ -532,6 +794,7 @@ def update_tracks(detections):
                 dead_ids.append(tid)
     for tid in dead_ids:
         del TRACKS[tid]
+        KALMAN.remove(tid)
 
     # --- Decide which tracks are now 'stable' and log once ---
     for tid, tr in TRACKS.items():
@@ -542,34 +805,35 @@ def update_tracks(detections):
 
         final_label, coarse, bin_type, avg_conf = tr.predicted_label()
 
+        x1, y1, _, _ = tr.bbox
+
         # UNKNOWN / unmapped
         if coarse is None or bin_type is None:
-            reg_key = make_region_key("unknown", tr.bbox)
-            if reg_key in SEEN_EVENTS:
+            if SEEN_EVENTS.check_and_add("unknown", x1, y1):
                 tr.logged = True
                 continue
 
-            SEEN_EVENTS.add(reg_key)
             log_unknown_label(final_label)
-            x1, y1, _, _ = tr.bbox
-            log_csv_detection(x1, y1, final_label, "unknown")
+            event_id = log_csv_detection(x1, y1, final_label, "unknown")
+            save_snapshot(event_id, frame, tr.bbox)
+            if CLIP_ON_EVENT:
+                request_clip(event_id)
             tr.logged = True
             continue
 
         # Known coarse/bin
         coarse_cat, co2_item_kg, co2_saved_kg = estimate_co2(coarse, bin_type)
-        reg_key = make_region_key(coarse_cat, tr.bbox)
 
-        if reg_key in SEEN_EVENTS:
-            # Already logged an object of this type in this region
+        if SEEN_EVENTS.check_and_add(coarse_cat, x1, y1):
+            # Already logged an object of this type in this region recently
             tr.logged = True
             continue
 
-        SEEN_EVENTS.add(reg_key)
-
         log_new_item(final_label, coarse_cat, bin_type, co2_item_kg, co2_saved_kg)
-        x1, y1, _, _ = tr.bbox
-        log_csv_detection(x1, y1, final_label, coarse_cat)
+        event_id = log_csv_detection(x1, y1, final_label, coarse_cat)
+        save_snapshot(event_id, frame, tr.bbox)
+        if CLIP_ON_EVENT:
+            request_clip(event_id)
 
         new_events.append({
             'label': final_label,
@@ -586,70 +850,191 @@ def update_tracks(detections):
 
     return new_events
 
+# ========== CHECKPOINTS ==========
+
+CHECKPOINT_VERSION = 1
+
+def save_checkpoint(stats):
+    """Atomically snapshot tracks, the dedupe index and running totals."""
+    doc = {
+        'version': CHECKPOINT_VERSION,
+        'saved_at': time.time(),
+        'next_track_id': NEXT_TRACK_ID,
+        'tracks': [tr.to_dict() for tr in TRACKS.values()],
+        'seen_events': [list(e) for e in SEEN_EVENTS.entries()],
+        'stats': stats.to_checkpoint(),
+    }
+    try:
+        atomic_write_json(CHECKPOINT_FILE, doc)
+    except Exception as e:
+        print(f"Failed to save checkpoint: {e}")
+
+def restore_checkpoint(stats):
+    """
+    Resume from the last checkpoint, if any. Restored tracks keep their
+    'logged' flag, so items already in the bin match an old track (or a
+    live dedupe cell) instead of being logged a second time.
+    """
+    global NEXT_TRACK_ID, LAST_TRACK_TIME
+    start = time.perf_counter()
+    doc = load_json(CHECKPOINT_FILE)
+    if not doc or doc.get('version') != CHECKPOINT_VERSION:
+        return False
+
+    try:
+        TRACKS.clear()
+        KALMAN.clear()
+        for item in doc['tracks']:
+            tr = Track.from_dict(item)
+            TRACKS[tr.id] = tr
+            if USE_KALMAN:
+                KALMAN.add(tr.id, tr.bbox)
+        NEXT_TRACK_ID = doc['next_track_id']
+        LAST_TRACK_TIME = None
+
+        # entries past the TTL simply expire on the next lookup
+        SEEN_EVENTS.clear()
+        for cls, x, y, t in doc['seen_events']:
+            SEEN_EVENTS.add(cls, x, y, now=t)
+
+        stats.restore(doc['stats'])
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"Ignoring unreadable checkpoint {CHECKPOINT_FILE}: {e}")
+        TRACKS.clear()
+        KALMAN.clear()
+        SEEN_EVENTS.clear()
+        return False
+
+    age = time.time() - doc['saved_at']
+    print(
+        f"Restored checkpoint from {age:.0f}s ago: {len(TRACKS)} tracks, "
+        f"{len(SEEN_EVENTS)} dedupe cells, {stats.detection_count} logged items "
+        f"({(time.perf_counter() - start) * 1000:.0f}ms)"
+    )
+    return True
+
 # ========================================
 # Frame Processing
 # ========================================
 
+TRACER = Tracer(capacity=TRACE_CAPACITY, enabled=TRACE_ENABLED)
+PROFILER = ProfileTrigger(TRACER)
+
 def process_frame(frame, model, stats):
-    """Process a single frame with timing"""
+    """Detect and track on a single frame with timing; returns its detections"""
     start_time = time.time()
-    detections_for_tracker = []
 
-    h, w = frame.shape[:2]
+    detections_for_tracker = detect_objects(frame, model)
 
-    # ---- Crop to bin region, if enabled ----
-    if USE_ROI:
-        x1_roi = int(w * ROI_LEFT_FRAC)
-        x2_roi = int(w * ROI_RIGHT_FRAC)
-        y1_roi = int(h * ROI_TOP_FRAC)
-        y2_roi = int(h * ROI_BOTTOM_FRAC)
-        infer_frame = frame[y1_roi:y2_roi, x1_roi:x2_roi]
-    else:
-        x1_roi = 0
-        y1_roi = 0
-        infer_frame = frame
+    # --- Update tracker & stats using NEW stable events ---
+    # (before drawing, so event snapshots are of the clean frame)
+    with TRACER.span("track"):
+        if USE_SIMPLE_TRACKER:
+            new_events = update_tracks(detections_for_tracker, frame)
+        else:
+            new_events = []  # you could fall back to per-frame logging if desired
 
-    # Run YOLO inference
-    results = model(
-        infer_frame,
-        verbose=False,
-        conf=CONF_THRES,
-        iou=IOU_THRES,
-        imgsz=IMG_SIZE,
-    )[0]
+        stats.update(new_events)
+
+    processing_time = time.time() - start_time
+    stats.add_processing_time(processing_time)
     
-    for box in results.boxes:
-        conf = float(box.conf)
-        if conf < CONF_THRES:
-            continue
-        
-        x1, y1, x2, y2 = box.xyxy[0]
-        x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+    return detections_for_tracker
 
-        # shift coordinates back into full-frame space if using ROI
-        x1 += x1_roi
-        x2 += x1_roi
-        y1 += y1_roi
-        y2 += y1_roi
+MODEL_INPUT = None
 
-        box_area = (x2 - x1) * (y2 - y1)
-        if box_area < MIN_BOX_AREA:
-            continue
+def model_input():
+    """
+    This process's ModelInput, in the memory format prepare_model() actually
+    gave the weights (a channels-last input to a contiguous model would be
+    converted back on every frame).
+    """
+    global MODEL_INPUT
+    if MODEL_INPUT is None or MODEL_INPUT.channels_last != MODEL_CHANNELS_LAST:
+        MODEL_INPUT = ModelInput(IMG_SIZE, channels_last=MODEL_CHANNELS_LAST)
+    return MODEL_INPUT
 
-        cls = int(box.cls)
-        label = results.names[cls]
+def detect_objects(frame, model):
+    """
+    ROI crop + inference + filtering. Returns an (N, 6) detections array in
+    full-frame coords; class ids resolve through CLASS_TABLE.
+    """
+    with TRACER.span("preprocess"):
+        h, w = frame.shape[:2]
 
-        coarse, bin_type = classify_item(label)
+        # ---- Crop to bin region, if enabled ----
+        if ROI_CALIBRATOR is not None:
+            ROI_CALIBRATOR.observe_frame(frame)
+            roi_top, roi_bottom, roi_left, roi_right = ROI_CALIBRATOR.current_roi()
+        else:
+            roi_top, roi_bottom, roi_left, roi_right = (
+                ROI_TOP_FRAC, ROI_BOTTOM_FRAC, ROI_LEFT_FRAC, ROI_RIGHT_FRAC
+            )
 
-        detections_for_tracker.append({
-            'bbox': (x1, y1, x2, y2),
-            'label': label,
-            'conf': conf,
-            'coarse': coarse,
-            'bin_type': bin_type
-        })
+        if USE_ROI:
+            x1_roi = int(w * roi_left)
+            x2_roi = int(w * roi_right)
+            y1_roi = int(h * roi_top)
+            y2_roi = int(h * roi_bottom)
+            if x2_roi <= x1_roi or y2_roi <= y1_roi:
+                x1_roi = y1_roi = 0  # rounds to nothing on this frame size: use all of it
+                x2_roi, y2_roi = w, h
+            infer_frame = frame[y1_roi:y2_roi, x1_roi:x2_roi]
+        else:
+            x1_roi = 0
+            y1_roi = 0
+            infer_frame = frame
 
-        # ---- Drawing overlay (real-time view only) ----
+    # Run YOLO inference
+    with TRACER.span("inference"), torch.inference_mode():
+        if USE_TILING:
+            boxes, confs, classes, names = run_tiled(
+                model,
+                infer_frame,
+                tile=TILE_SIZE,
+                overlap=TILE_OVERLAP,
+                conf=CONF_THRES,
+                iou=IOU_THRES,
+            )
+            raw = as_array(boxes, confs, classes)
+            min_area = MIN_BOX_AREA_TILED
+        else:
+            direct = predict(model, model_input(), infer_frame, CONF_THRES, IOU_THRES) if DIRECT_INPUT else None
+            if direct is not None:
+                raw, names = direct
+            else:
+                results = model(
+                    infer_frame,
+                    verbose=False,
+                    conf=CONF_THRES,
+                    iou=IOU_THRES,
+                    imgsz=IMG_SIZE,
+                )[0]
+                names = results.names
+                # one transfer for all boxes instead of three tensor ops per box
+                raw = results_to_array(results)
+            min_area = MIN_BOX_AREA
+
+    with TRACER.span("postprocess"):
+        class_table(names)
+        detections = filter_detections(raw, x1_roi, y1_roi, CONF_THRES, min_area)
+
+        if ROI_CALIBRATOR is not None:
+            if ROI_CALIBRATOR.calibrating:
+                ROI_CALIBRATOR.observe_boxes(detections[:, :4].tolist(), w, h)
+            ROI_CALIBRATOR.step()
+
+    return detections
+
+def draw_detections(frame, detections):
+    """Drawing overlay (real-time view only)"""
+    if len(detections) == 0:
+        return
+    labels, coarses, bin_types = CLASS_TABLE.lookup(detections[:, CLS])
+    boxes = detections[:, :4].astype(int).tolist()
+    confs = detections[:, CONF].tolist()
+
+    for (x1, y1, x2, y2), label, conf, coarse, bin_type in zip(boxes, labels, confs, coarses, bin_types):
         if bin_type is not None:
             coarse_cat, co2_item_kg, co2_saved_kg = estimate_co2(coarse, bin_type)
             co2_item_g = co2_item_kg * 1000.0
@@ -670,27 +1055,14 @@ def process_frame(frame, model, stats):
         cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
         cv2.putText(frame, text, (x1, max(y1 - 5, 15)),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-    
-    # --- Update tracker & stats using NEW stable events ---
-    if USE_SIMPLE_TRACKER:
-        new_events = update_tracks(detections_for_tracker)
-    else:
-        new_events = []  # you could fall back to per-frame logging if desired
-
-    stats.update(new_events)
-    processing_time = time.time() - start_time
-    stats.add_processing_time(processing_time)
-    
-    return frame
 
 def draw_info_panel(frame, stats):
-    """Draw info panel with real-time statistics"""
+    """Draw info panel with real-time statistics (in place)"""
     summary = stats.get_summary()
     
-    overlay = frame.copy()
-    
-    cv2.rectangle(overlay, (10, 10), (400, 200), (0, 0, 0), -1)
-    frame = cv2.addWeighted(frame, 0.7, overlay, 0.3, 0)
+    # darken just the panel area (a 30% black overlay) instead of blending a full-frame copy
+    panel = frame[10:201, 10:401]
+    cv2.convertScaleAbs(panel, dst=panel, alpha=0.7)
     
     y_offset = 35
     line_height = 25
@@ -713,20 +1085,80 @@ def draw_info_panel(frame, stats):
     
     return frame
 
+# ========================================
+# Runtime config
+# ========================================
+
+def apply_detection_config(doc, swapper=None):
+    """
+    Apply a detection_config.json document. Thresholds, ROI and label
+    mappings take effect on the next frame; a new vocabulary is built in
+    the background by `swapper` (None in processes without a model).
+    """
+    global CONF_THRES, IOU_THRES, MIN_BOX_AREA, PROMPT_TO_COARSE, COARSE_TO_BIN, CLASS_TABLE
+    global ROI_TOP_FRAC, ROI_BOTTOM_FRAC, ROI_LEFT_FRAC, ROI_RIGHT_FRAC
+
+    cfg = dict(DETECTION_DEFAULTS)
+    cfg.update({k: doc[k] for k in CONFIG_KEYS if doc.get(k) is not None})
+    try:
+        conf_thres = float(cfg["conf_thres"])
+        iou_thres = float(cfg["iou_thres"])
+        min_box_area = int(cfg["min_box_area"])
+        roi = {**DETECTION_DEFAULTS["roi"], **cfg["roi"]}
+        roi = {k: float(roi[k]) for k in ("top", "bottom", "left", "right")}
+        # the API checks too, but a hand-edited file must not empty the crop
+        error = roi_error(roi)
+        if error:
+            raise ValueError(error)
+        roi = tuple(roi.values())
+        prompt_to_coarse = {str(k).lower(): str(v) for k, v in cfg["prompt_to_coarse"].items()}
+        coarse_to_bin = {str(k): str(v) for k, v in cfg["coarse_to_bin"].items()}
+    except (TypeError, ValueError, AttributeError) as e:
+        print(f"[config] Ignoring detection config v{doc.get('version')}: {e}")
+        return
+
+    CONF_THRES, IOU_THRES, MIN_BOX_AREA = conf_thres, iou_thres, min_box_area
+    ROI_TOP_FRAC, ROI_BOTTOM_FRAC, ROI_LEFT_FRAC, ROI_RIGHT_FRAC = roi
+    PROMPT_TO_COARSE, COARSE_TO_BIN = prompt_to_coarse, coarse_to_bin
+
+    # same vocabulary, maybe different label -> bin mapping
+    if CLASS_TABLE is not None:
+        CLASS_TABLE = ClassTable(CLASS_TABLE.names, classify_item)
+
+    if swapper is not None and tuple(PROMPT_TO_COARSE) != swapper.prompts:
+        swapper.request(list(PROMPT_TO_COARSE))
+
+    print(f"[config] Applied detection config v{doc.get('version', 0)}")
+
+def start_config_watch():
+    """Apply the config file (if any) before the model is loaded; returns the watcher."""
+    watcher = ConfigWatcher(interval_s=CONFIG_POLL_INTERVAL)
+    doc = watcher.poll()
+    if doc is not None:
+        apply_detection_config(doc)
+    return watcher
+
+def poll_runtime_config(watcher, swapper=None):
+    """
+    Between frames: pick up config edits and, once a background vocabulary
+    build is done, return the model to use from now on (None = keep current).
+    """
+    doc = watcher.poll()
+    if doc is not None:
+        apply_detection_config(doc, swapper)
+    return swapper.poll() if swapper is not None else None
+
 # ========================================
 # Main
 # ========================================
 
-def main():
-    # Check GPU availability
-    device = check_gpu_availability()
-    
+def load_model(prompts=None):
     # Initialize model (medium YOLO-World)
     print("Loading YOLO model...")
     model = YOLO("yolov8m-worldv2.pt")
     
     # Set classes for YOLO-World (do this BEFORE any inference)
-    DETECTION_PROMPTS = list(PROMPT_TO_COARSE.keys())
+    DETECTION_PROMPTS = list(prompts if prompts is not None else PROMPT_TO_COARSE.keys())
     try:
         model.set_classes(DETECTION_PROMPTS)
         print(f"Set YOLO-World classes to {len(DETECTION_PROMPTS)} categories")
@@ -734,36 +1166,426 @@ def main():
         print(f"Warning: model.set_classes failed: {e}")
     
     print("Model loaded successfully on GPU" if torch.cuda.is_available() else "Model loaded on CPU")
+    prepare_model(model)
+    return model
+
+# set by setup_cpu() when running on CPU
+CPU_SETTINGS = None
+# set by prepare_model(): whether the newest model really is channels-last
+MODEL_CHANNELS_LAST = False
+
+def setup_cpu(worker=0, workers=1):
+    """
+    Apply the CPU profile to this process, before any model is loaded.
+    With several inference processes each gets its share of the threads
+    and is pinned to its own cores, so they don't oversubscribe the host.
+    """
+    global CPU_SETTINGS
+    if torch.cuda.is_available():
+        return
+    cores = parse_cores(CPU_CORES)
+    threads = CPU_THREADS
+    if workers > 1:
+        pool = cores or available_cores()
+        cores = pool[worker::workers] or pool
+        threads = max(1, (threads or len(pool)) // workers)
+    CPU_SETTINGS = make_profile(CPU_PROFILE, threads=threads, cores=cores, warmup_runs=WARMUP_RUNS)
+    applied = apply_runtime(CPU_SETTINGS)
+    print(f"[cpu] Profile '{CPU_SETTINGS.name}': " + ", ".join(f"{k}={v}" for k, v in applied.items()))
+
+def prepare_model(model):
+    """
+    Get a freshly loaded model ready before it sees real frames: on CPU try
+    channels-last / torch.compile (whatever fails is undone), then run the
+    warm-up inferences at the size detection will use.
+    """
+    global MODEL_CHANNELS_LAST
+    size = CROP_IMG_SIZE if CROP_SERVER_PORT else TILE_SIZE if USE_TILING else IMG_SIZE
+    blank = blank_frame(size)
+
+    def run_once(m):
+        with torch.inference_mode():
+            m(blank, verbose=False, conf=CONF_THRES, iou=IOU_THRES, imgsz=size)
+
+    if CPU_SETTINGS is not None:
+        applied = optimize_model(model, CPU_SETTINGS, run_once)
+        if applied:
+            print("[cpu] Model: " + ", ".join(f"{k}={v}" for k, v in applied.items()))
+        MODEL_CHANNELS_LAST = applied.get("channels_last") is True
+    times = warm_up(model, run_once, WARMUP_RUNS)
+    if times:
+        print(f"[cpu] Warm-up at {size}px: first {times[0]:.0f} ms, last {times[-1]:.0f} ms")
+
+# ========================================
+# Multi-process mode
+# ========================================
+
+def capture_worker(video_url, ring_name, ring_lock, shape_queue, stop_event, clip_queue):
+    """Decode frames into the shared ring as fast as the stream delivers them."""
+    cap = StreamReader(video_url, mjpeg_direct=MJPEG_DIRECT, reduce=DECODE_REDUCE)
+    ring = None
+    # the DVR lives here, next to the compressed bytes; clip marks arrive on clip_queue
+    recorder = start_dvr()
+    PROFILER.install_signal_handlers()
+    try:
+        while not stop_event.is_set():
+            with TRACER.span("capture"):
+                ret, frame = cap.read()
+            if not ret:
+                break
+            PROFILER.poll()
+            if recorder is not None:
+                recorder.ring.append(cap.last_jpeg)
+                while True:
+                    try:
+                        recorder.mark(*clip_queue.get_nowait())
+                    except queue.Empty:
+                        break
+            if ring is None:
+                ring = FrameRing(ring_name, frame.shape, FRAME_RING_SLOTS, ring_lock, create=True)
+                shape_queue.put(frame.shape)
+            if frame.shape != ring.shape:
+                continue  # camera changed resolution; ring slots are fixed-size
+            if ring.write(frame) is None and ring.dropped % 100 == 1:
+                print(f"[ring] All {ring.slots} slots pinned, {ring.dropped} frames dropped")
+    finally:
+        cap.close()
+        if recorder is not None:
+            recorder.close()
+        if ring is not None:
+            ring.close()
+
+def inference_worker(ring_name, shape, ring_lock, results, stop_event, worker):
+    """
+    Run the detector on the newest unclaimed frame, straight from shared
+    memory. The frame stays pinned; the main process releases it once drawn.
+    """
+    global ROI_CALIBRATOR
+    ROI_CALIBRATOR = None  # calibration needs every frame: single-process mode only
+    setup_cpu(worker, INFERENCE_PROCS)
+
+    watcher = start_config_watch()
+    model = load_model()
+    swapper = ModelSwapper(model, PROMPT_TO_COARSE, load_model, max_cached=VOCAB_CACHE_SIZE)
+    ring = FrameRing(ring_name, shape, FRAME_RING_SLOTS, ring_lock)
+    # every result names the vocabulary its class ids belong to; the names
+    # themselves travel with the first result of each version
+    vocab_names, vocab_version = None, 0
+    # per-process spans/profiles: `kill -USR1/-USR2 <worker pid>`
+    PROFILER.install_signal_handlers()
+    try:
+        while not stop_event.is_set():
+            model = poll_runtime_config(watcher, swapper) or model
+            PROFILER.poll()
+            seq, frame = ring.claim_latest()
+            if seq is None:
+                time.sleep(0.001)
+                continue
+            start_time = time.time()
+            detections = detect_objects(frame, model)
+            names = None
+            if CLASS_TABLE.names is not vocab_names:
+                vocab_names, vocab_version = CLASS_TABLE.names, vocab_version + 1
+                names = vocab_names
+            result = (seq, detections, worker, vocab_version, names, time.time() - start_time)
+            while not stop_event.is_set():
+                try:
+                    results.put(result, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+    finally:
+        ring.close()
+
+def main_multiprocess(video_url):
+    global CLIP_SINK
+    ctx = multiprocessing.get_context("spawn")
+    ring_name = f"trashcam_frames_{os.getpid()}"
+    stop_event = ctx.Event()
+    shape_queue = ctx.Queue()
+    results = ctx.Queue(maxsize=RESULT_QUEUE_SIZE)
+    ring_lock = ctx.Lock()
+    clip_queue = ctx.Queue(maxsize=64)
+
+    print(f"\nConnecting to stream {video_url}...")
+    capture = ctx.Process(
+        target=capture_worker, args=(video_url, ring_name, ring_lock, shape_queue, stop_event, clip_queue), daemon=True
+    )
+    capture.start()
+    shape = shape_queue.get()
+    ring = FrameRing(ring_name, shape, FRAME_RING_SLOTS, ring_lock)
+
+    workers = [
+        ctx.Process(
+            target=inference_worker, args=(ring_name, shape, ring_lock, results, stop_event, i), daemon=True
+        )
+        for i in range(INFERENCE_PROCS)
+    ]
+    for p in workers:
+        p.start()
+    print(f"Started {INFERENCE_PROCS} inference processes on {shape[1]}x{shape[0]} frames")
+    print(f"Press 'q' to quit, 's' to print statistics, 'p' to start/stop cProfile, 't' to dump a trace\n")
+    PROFILER.install_signal_handlers()
+
+    init_csv()
+    init_snapshots()
+    video = VideoPublisher(CAMERA_ID)
+
+    def send_clip_mark(*mark):
+        try:
+            clip_queue.put_nowait(mark)
+        except queue.Full:
+            print(f"[dvr] Clip queue full, dropping clip {mark[0]}")
+    CLIP_SINK = send_clip_mark if DVR_ENABLED else None
+    stats = DetectionStats()
+    restore_checkpoint(stats)
+    last_checkpoint = time.time()
+    # label -> bin mappings are applied here too; workers handle the model side
+    watcher = start_config_watch()
+    # worker -> (vocabulary version, names): each worker swaps vocabularies on
+    # its own, so class ids are decoded with the names of the worker that sent them
+    vocabularies = {}
+    last_seq = 0
+    fps_timer = time.time()
+
+    try:
+        while True:
+            seq, detections, worker, version, names, proc_time = results.get()
+            poll_runtime_config(watcher)
+            poll_clip_requests(video)
+            if names is not None:
+                # share one object between workers on the same vocabulary (cheap class_table checks)
+                names = next((n for _, n in vocabularies.values() if n == names), names)
+                vocabularies[worker] = (version, names)
+            known_version, names = vocabularies.get(worker, (None, None))
+            # workers finish out of order; never feed the tracker an older frame
+            if seq <= last_seq or known_version != version:
+                ring.release(seq)
+                continue
+            last_seq = seq
+            class_table(names)
+
+            # pinned by the worker until released below, so drawn on in place
+            frame = ring.view(seq)
+
+            with TRACER.span("track"):
+                new_events = update_tracks(detections, frame) if USE_SIMPLE_TRACKER else []
+                stats.update(new_events)
+            stats.add_processing_time(proc_time)
+
+            current_time = time.time()
+            if current_time - fps_timer > 0:
+                stats.add_fps(1.0 / (current_time - fps_timer))
+            fps_timer = current_time
+
+            with TRACER.span("persist"):
+                if current_time - stats.last_save_time > STATS_SAVE_INTERVAL:
+                    stats.save_to_file()
+                    stats.last_save_time = current_time
+
+                if current_time - last_checkpoint > CHECKPOINT_INTERVAL:
+                    save_checkpoint(stats)
+                    last_checkpoint = current_time
+
+            with TRACER.span("render"):
+                if frame is not None:
+                    draw_detections(frame, detections)
+                    frame = draw_info_panel(frame, stats)
+                    if video.wants_frame():
+                        video.publish(frame.copy())  # sent later; the slot goes back now
+                    cv2.imshow("Waste Detection System", frame)
+            ring.release(seq)
+
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord("q"):
+                break
+            elif key == ord("s"):
+                stats.print_summary()
+                TRACER.print_summary()
+            elif key == ord("p"):
+                PROFILER.toggle_profile()
+            elif key == ord("t"):
+                PROFILER.dump_trace()
+            PROFILER.poll()
+    finally:
+        stop_event.set()
+        for p in workers + [capture]:
+            p.join(timeout=5.0)
+        ring.close()
+        stats.print_summary()
+        stats.save_to_file()
+        save_checkpoint(stats)
+        if CSV_WRITER is not None:
+            CSV_WRITER.close()
+        if SNAPSHOT_WRITER is not None:
+            SNAPSHOT_WRITER.close()
+        EVENT_BUS.close()
+        video.close()
+        cv2.destroyAllWindows()
+
+# ========================================
+# Split mode: crops from edge nodes
+# ========================================
+
+class BinTracker:
+    """One bin's tracker + dedupe state, swapped into the module globals around update_tracks."""
+
+    def __init__(self):
+        self.tracks = {}
+        self.kalman = KalmanBoxBank()
+        self.last_time = None
+        self.seen_events = SpatialDedupeIndex(
+            cell_px=POS_MARGIN_PX,
+            ttl_s=DEDUPE_TTL_S,
+            neighbor_radius=DEDUPE_NEIGHBOR_CELLS,
+            max_entries=DEDUPE_MAX_CELLS,
+        )
+
+    def update(self, detections):
+        global TRACKS, KALMAN, LAST_TRACK_TIME, SEEN_EVENTS
+        TRACKS, KALMAN, LAST_TRACK_TIME, SEEN_EVENTS = (
+            self.tracks, self.kalman, self.last_time, self.seen_events
+        )
+        new_events = update_tracks(detections)
+        self.last_time = LAST_TRACK_TIME  # rebound inside update_tracks
+        return new_events
+
+def main_crop_server():
+    """
+    Serve edge nodes running edge_prefilter.py. Crops from every bin share
+    one inference queue (batched up to CROP_BATCH, CROP_WORKERS threads);
+    boxes come back in full-frame coordinates and go through each bin's
+    own tracker. Track ids stay unique across bins.
+    """
+    setup_cpu()
+    watcher = start_config_watch()
+    # one model (and vocabulary swapper) per worker thread: an ultralytics
+    # model isn't safe to run from two threads at once
+    swappers = [
+        ModelSwapper(load_model(), PROMPT_TO_COARSE, load_model, max_cached=VOCAB_CACHE_SIZE)
+        for _ in range(max(1, CROP_WORKERS))
+    ]
+    spans = ["inference"] + [f"inference-{i}" for i in range(1, len(swappers))]
+
+    def infer(crops, worker):
+        with TRACER.span(spans[worker]), torch.inference_mode():
+            results = swappers[worker].model(
+                crops, verbose=False, conf=CONF_THRES, iou=IOU_THRES, imgsz=CROP_IMG_SIZE,
+            )
+        return [results_to_array(r) for r in results], results[0].names
+
+    init_csv()
+    stats = DetectionStats()
+    trackers = defaultdict(BinTracker)
+    last_report = time.time()
+
+    def on_frame(bin_id, seq, raw, names, frame_size):
+        with TRACER.span("postprocess"):
+            if names is not None:
+                class_table(names)
+            detections = filter_detections(raw, 0, 0, CONF_THRES, MIN_BOX_AREA)
+        with TRACER.span("track"):
+            new_events = trackers[bin_id].update(detections) if USE_SIMPLE_TRACKER else []
+            stats.update(new_events)
+
+    server = CropServer(
+        infer, on_frame, host=CROP_SERVER_HOST or None, port=CROP_SERVER_PORT,
+        workers=len(swappers), batch_size=CROP_BATCH, token=CROP_TOKEN,
+    )
+    server.start()
+    PROFILER.install_signal_handlers()
+    # tracker checkpoints are per-process (single-bin) state; not kept in this mode
+    try:
+        while True:
+            time.sleep(CONFIG_POLL_INTERVAL)
+            doc = watcher.poll()
+            if doc is not None:
+                apply_detection_config(doc, swappers[0])
+                for swapper in swappers[1:]:
+                    if tuple(PROMPT_TO_COARSE) != swapper.prompts:
+                        swapper.request(list(PROMPT_TO_COARSE))
+            for swapper in swappers:
+                swapper.poll()  # workers read swapper.model per batch
+            PROFILER.poll()
+            now = time.time()
+            if now - stats.last_save_time > STATS_SAVE_INTERVAL:
+                stats.save_to_file()
+                stats.last_save_time = now
+            if now - last_report > 60:
+                last_report = now
+                for bin_id, s in sorted(server.stats().items()):
+                    print(f"[crops] {bin_id}: {s['frames']:.0f} frames, {s['crops']:.0f} crops, "
+                          f"{s['bytes'] / 1e6:.1f} MB, decode {s['decode_cpu_s']:.1f}s / "
+                          f"infer {s['infer_cpu_s']:.1f}s CPU")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        stats.print_summary()
+        TRACER.print_summary()
+        stats.save_to_file()
+        if CSV_WRITER is not None:
+            CSV_WRITER.close()
+        EVENT_BUS.close()
+
+def main():
+    global CLIP_SINK
+    # Check GPU availability
+    device = check_gpu_availability()
     
     # Build video URL
     VIDEO_URL = f"{os.getenv('PI_URL')}"
-    
-    print(f"\nConnecting to stream...")
-    cap = cv2.VideoCapture(VIDEO_URL, cv2.CAP_FFMPEG)
-    
-    if not cap.isOpened():
-        print("❌ Failed to open stream")
-        print(f"VIDEO_URL: {VIDEO_URL}")
+
+    if CROP_SERVER_PORT:
+        main_crop_server()
         return
+
+    if INFERENCE_PROCS > 0:
+        main_multiprocess(VIDEO_URL)
+        return
+
+    setup_cpu()
+    watcher = start_config_watch()
+    model = load_model()
+    swapper = ModelSwapper(model, PROMPT_TO_COARSE, load_model, max_cached=VOCAB_CACHE_SIZE)
     
-    print("✅ Stream opened successfully")
-    print(f"Press 'q' to quit, 's' to print statistics\n")
+    print(f"\nConnecting to stream {VIDEO_URL}...")
+    # Reconnects with backoff on its own; read() only fails after close()
+    cap = StreamReader(VIDEO_URL, mjpeg_direct=MJPEG_DIRECT, reduce=DECODE_REDUCE)
+    print(f"Press 'q' to quit, 's' to print statistics, 'p' to start/stop cProfile, 't' to dump a trace\n")
+    PROFILER.install_signal_handlers()
     
-    # Init CSV output
+    # Init CSV output (and event snapshots)
     init_csv()
+    init_snapshots()
     
-    # Initialize stats
+    # Annotated frames for the API's /video/{camera}: JPEG-encoded once, and
+    # only while the API reports viewers (see video_publisher.py)
+    video = VideoPublisher(CAMERA_ID)
+
+    # Rolling buffer of the compressed stream for event / on-demand clips
+    recorder = start_dvr()
+    CLIP_SINK = recorder.mark if recorder is not None else None
+    
+    # Initialize stats, resuming tracks/dedupe/totals after a restart
     stats = DetectionStats()
+    restore_checkpoint(stats)
+    last_checkpoint = time.time()
     frame_counter = 0
     fps_timer = time.time()
     
     while True:
-        ret, frame = cap.read()
+        with TRACER.span("capture"):
+            ret, frame = cap.read()
         
         if not ret:
             print("Failed to read frame")
             break
         
+        # DVR keeps every frame, even skipped ones (just a memcpy of the JPEG)
+        if recorder is not None:
+            recorder.ring.append(cap.last_jpeg)
+        
         # Frame skipping for performance
         if FRAME_SKIP > 0 and frame_counter % (FRAME_SKIP + 1) != 0:
             frame_counter += 1
@@ -771,11 +1593,12 @@ def main():
         
         frame_counter += 1
         
-        # Process frame
-        frame = process_frame(frame, model, stats)
+        # Config edits / finished vocabulary swap, applied between frames
+        model = poll_runtime_config(watcher, swapper) or model
+        poll_clip_requests(video)
         
-        # Draw info panel
-        frame = draw_info_panel(frame, stats)
+        # Process frame
+        detections = process_frame(frame, model, stats)
         
         # Calculate FPS
         current_time = time.time()
@@ -784,13 +1607,24 @@ def main():
             stats.add_fps(fps)
         fps_timer = current_time
         
-        # Save stats periodically
-        if current_time - stats.last_save_time > STATS_SAVE_INTERVAL:
-            stats.save_to_file()
-            stats.last_save_time = current_time
+        with TRACER.span("persist"):
+            # Save stats periodically
+            if current_time - stats.last_save_time > STATS_SAVE_INTERVAL:
+                stats.save_to_file()
+                stats.last_save_time = current_time
+
+            # Crash-safe snapshot of tracker + dedupe + totals
+            if current_time - last_checkpoint > CHECKPOINT_INTERVAL:
+                save_checkpoint(stats)
+                last_checkpoint = current_time
         
-        # Display
-        cv2.imshow("Waste Detection System", frame)
+        # Draw, display (and the browser feed, when anyone is watching)
+        with TRACER.span("render"):
+            draw_detections(frame, detections)
+            frame = draw_info_panel(frame, stats)
+            if video.wants_frame():
+                video.publish(frame)
+            cv2.imshow("Waste Detection System", frame)
         
         # Handle keys
         key = cv2.waitKey(1) & 0xFF
@@ -798,10 +1632,28 @@ def main():
             break
         elif key == ord("s"):
             stats.print_summary()
+            print(f"Stream: {cap.stats()}")
+            TRACER.print_summary()
+        elif key == ord("p"):
+            PROFILER.toggle_profile()
+        elif key == ord("t"):
+            PROFILER.dump_trace()
+        PROFILER.poll()
     
     # Final summary
     stats.print_summary()
+    print(f"Stream: {cap.stats()}")
+    TRACER.print_summary()
     stats.save_to_file()
+    save_checkpoint(stats)
+    if CSV_WRITER is not None:
+        CSV_WRITER.close()
+    if SNAPSHOT_WRITER is not None:
+        SNAPSHOT_WRITER.close()
+    if recorder is not None:
+        recorder.close()
+    EVENT_BUS.close()
+    video.close()
     
     cap.release()
     cv2.destroyAllWindows()
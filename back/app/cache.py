@@ -0,0 +1,73 @@
+# backend/app/cache.py
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from threading import Lock
+
+from fastapi import Request, Response
+
+
+def validator_headers(etag: str, last_modified: float) -> dict:
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        # let browsers keep the body but always revalidate with us
+        "Cache-Control": "no-cache",
+    }
+
+
+def is_not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    """RFC 9110 conditional GET: If-None-Match wins over If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        # weak comparison, so compare without the W/ prefix
+        bare = etag.removeprefix("W/")
+        return "*" in tags or any(t.removeprefix("W/") == bare for t in tags)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates only have 1s resolution
+        return int(last_modified) <= int(since)
+
+    return False
+
+
+def not_modified_response(etag: str, last_modified: float) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+
+class ResponseCache:
+    """
+    Tiny LRU of already-serialized response bodies keyed by (name, version).
+    A new version of the same name replaces the old one, so idle polling
+    costs a stat() plus a dict lookup.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, name: str, version: str):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(name)
+            return entry[1]
+
+    def put(self, name: str, version: str, body: bytes):
+        with self._lock:
+            self._entries[name] = (version, body)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
@@ -10,4 +10,40 @@ class Settings:
     PORT: int = int(os.getenv("PORT", 8000))
     UDP_SERVER_HOST: str = os.getenv("UDP_SERVER_HOST", "129.161.154.21")
     UDP_SERVER_PORT: int = int(os.getenv("UDP_SERVER_PORT", "5002"))
+    FILL_SUBSCRIBE: bool = os.getenv("FILL_SUBSCRIBE", "1") == "1"
+    FILL_MAX_AGE_S: float = float(os.getenv("FILL_MAX_AGE_S", "10"))
+    # live events from the vision process over a Unix socket (see eventbus.py)
+    EVENT_BUS: bool = os.getenv("EVENT_BUS", "1") == "1"
+    EVENT_BUS_PATH: str = os.getenv("EVENT_BUS_PATH", "")
+    # >1 = multi-worker mode: one worker owns ingestion, the rest read shared memory
+    WORKERS: int = int(os.getenv("WORKERS", "1"))
+    INGEST_PUBLISH_INTERVAL_S: float = float(os.getenv("INGEST_PUBLISH_INTERVAL_S", "0.25"))
+    COMPRESS_MIN_BYTES: int = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+    # runtime overrides for the vision loop, written by /detectionConfig
+    DETECTION_CONFIG_PATH: str = os.getenv("DETECTION_CONFIG_PATH", "")
+    # POST /events/batch from remote vision nodes; empty token = no auth
+    INGEST_TOKEN: str = os.getenv("INGEST_TOKEN", "")
+    INGEST_MAX_BYTES: int = int(os.getenv("INGEST_MAX_BYTES", str(8 * 1024 * 1024)))
+    # /video/{camera}: annotated MJPEG from the vision process (see videofeed.py)
+    VIDEO_FEED: bool = os.getenv("VIDEO_FEED", "1") == "1"
+    VIDEO_SOCKET_PATH: str = os.getenv("VIDEO_SOCKET_PATH", "")
+    VIDEO_MAX_FPS: float = float(os.getenv("VIDEO_MAX_FPS", "10"))
+    # clips written by the vision process's DVR (dvr.py)
+    CLIP_DIR: str = os.getenv("CLIP_DIR", "")
+    CLIP_MAX_PRE_S: float = float(os.getenv("CLIP_MAX_PRE_S", "30"))
+    CLIP_MAX_POST_S: float = float(os.getenv("CLIP_MAX_POST_S", "30"))
+    # per-event JPEG crops written by the vision process (see snapshots.py)
+    SNAPSHOT_DIR: str = os.getenv("SNAPSHOT_DIR", "")
+    # bin id of events the local vision process logged (remote ones carry node_id)
+    LOCAL_BIN_ID: str = os.getenv("LOCAL_BIN_ID", os.getenv("CAMERA_ID", "local"))
+    EXPORT_GZIP_LEVEL: int = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+    # /fill/{bin}/forecast: online fill-rate estimates per bin (see forecast.py)
+    FORECAST_HALF_LIFE_S: float = float(os.getenv("FORECAST_HALF_LIFE_S", "3600"))
+    FORECAST_RATE_HALF_LIFE_S: float = float(os.getenv("FORECAST_RATE_HALF_LIFE_S", "900"))
+    FORECAST_ITEM_HALF_LIFE_S: float = float(os.getenv("FORECAST_ITEM_HALF_LIFE_S", "86400"))
+    FORECAST_DETECTION_WEIGHT: float = float(os.getenv("FORECAST_DETECTION_WEIGHT", "0.5"))
+    FORECAST_EMPTY_DROP: float = float(os.getenv("FORECAST_EMPTY_DROP", "15"))
+    FORECAST_FULL_PERCENT: float = float(os.getenv("FORECAST_FULL_PERCENT", "100"))
+    FORECAST_PUBLISH_INTERVAL_S: float = float(os.getenv("FORECAST_PUBLISH_INTERVAL_S", "5"))
+
 settings = Settings()
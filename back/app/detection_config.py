@@ -0,0 +1,159 @@
+# backend/app/detection_config.py
+"""
+Runtime-editable detection settings shared by the vision scripts and the API.
+
+detection_config.json holds overrides for VisionBetter's thresholds, ROI and
+label vocabulary, plus a `version` that goes up on every change. The API's
+/detectionConfig endpoint writes it; the vision loop polls its mtime between
+frames and applies what changed. Keys that aren't in the file keep the
+defaults in VisionBetter.py, and a null value removes an override.
+
+This module is imported by the vision scripts too, so it must not pull in
+FastAPI or app settings.
+"""
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+CONFIG_KEYS = ("conf_thres", "iou_thres", "min_box_area", "roi", "prompt_to_coarse", "coarse_to_bin")
+
+
+class VersionConflict(ValueError):
+    """The file changed since the version the caller based its edit on."""
+
+
+class InvalidConfig(ValueError):
+    """The edit would leave the document unusable (e.g. an empty ROI)."""
+
+
+def roi_error(roi: dict):
+    """
+    Why these ROI fractions can't be used, or None. Edges that are missing
+    (left to the vision loop's defaults) are only checked once present.
+    """
+    for low, high in (("top", "bottom"), ("left", "right")):
+        a, b = roi.get(low), roi.get(high)
+        for name, value in ((low, a), (high, b)):
+            if value is not None and not 0.0 <= value <= 1.0:
+                return f"roi {name} must be between 0 and 1, got {value}"
+        if a is not None and b is not None and not a < b:
+            return f"roi {low} ({a}) must be less than {high} ({b})"
+    return None
+
+
+def default_config_path() -> str:
+    return os.getenv(
+        "DETECTION_CONFIG_PATH",
+        str(Path(__file__).resolve().parents[1] / "detection_config.json"),
+    )
+
+
+def read_config(path: str) -> dict:
+    """Current document; {"version": 0} if there is no (readable) file yet."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"version": 0}
+    return doc if isinstance(doc, dict) else {"version": 0}
+
+
+@contextmanager
+def _exclusive(path: str):
+    # serialize writers (several API workers may take a PUT at once)
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def write_config(path: str, changes: dict, expected_version: int = None) -> dict:
+    """
+    Merge `changes` into the file and bump its version, atomically
+    (temp file + rename, so the watcher never sees half a document).
+    Raises VersionConflict if expected_version is given and stale, and
+    InvalidConfig if the merged ROI would be empty.
+    """
+    with _exclusive(path):
+        doc = read_config(path)
+        if expected_version is not None and expected_version != doc.get("version", 0):
+            raise VersionConflict(
+                f"config is at version {doc.get('version', 0)}, not {expected_version}"
+            )
+        for key, value in changes.items():
+            if key not in CONFIG_KEYS:
+                continue
+            if value is None:
+                doc.pop(key, None)
+            elif key == "roi" and isinstance(doc.get("roi"), dict):
+                doc["roi"] = {**doc["roi"], **value}  # edit one edge at a time
+            else:
+                doc[key] = value
+        error = roi_error(doc["roi"]) if isinstance(doc.get("roi"), dict) else None
+        if error:
+            raise InvalidConfig(error)
+        doc["version"] = doc.get("version", 0) + 1
+        doc["updated_at"] = time.time()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(doc, f, indent=2)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        return doc
+
+
+class ConfigWatcher:
+    """
+    Cheap change detection for the frame loop: poll() stats the file at
+    most every interval_s and returns the document only when its version
+    differs from the last one returned (None otherwise).
+    """
+
+    def __init__(self, path: str = None, interval_s: float = 1.0):
+        self.path = path or default_config_path()
+        self.interval_s = interval_s
+        self.version = None
+        self._mtime = None
+        self._next_check = 0.0
+
+    def poll(self, now: float = None):
+        now = time.monotonic() if now is None else now
+        if now < self._next_check:
+            return None
+        self._next_check = now + self.interval_s
+
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return None
+        self._mtime = mtime
+
+        doc = read_config(self.path)
+        version = doc.get("version", 0)
+        if version == self.version or (self.version is None and version == 0):
+            return None
+        self.version = version
+        return doc
@@ -0,0 +1,168 @@
+# backend/app/eventbus.py
+"""
+Local event bus between the vision scripts and the API.
+
+The vision process publishes every logged item as one JSON datagram on a
+Unix domain socket; the API binds that socket and updates its in-memory
+EventStore the moment the datagram arrives. current.csv is still written,
+but by a background thread, so disk I/O never sits between a detection
+and the dashboard. If the API isn't running the datagram is simply
+dropped and the csv remains the source of truth.
+
+This module is imported by the vision scripts too, so it must not pull in
+FastAPI or app settings.
+"""
+import csv
+import json
+import os
+import queue
+import socket
+import tempfile
+import uuid
+from threading import Thread
+
+HAS_UNIX_DGRAM = hasattr(socket, "AF_UNIX") and os.name != "nt"
+
+
+def default_bus_path() -> str:
+    return os.getenv(
+        "EVENT_BUS_PATH",
+        os.path.join(tempfile.gettempdir(), "trashcam_events.sock"),
+    )
+
+
+def new_event_id() -> str:
+    return uuid.uuid4().hex
+
+
+class EventPublisher:
+    """Fire-and-forget sender used by the vision loop; never blocks."""
+
+    def __init__(self, path: str = None):
+        self.path = path or default_bus_path()
+        self.sent = 0
+        self.dropped = 0
+        self._sock = None
+        if HAS_UNIX_DGRAM:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.setblocking(False)
+
+    def publish(self, event: dict) -> bool:
+        if self._sock is None:
+            return False
+        try:
+            self._sock.sendto(json.dumps(event).encode("utf-8"), self.path)
+        except OSError:
+            # no subscriber bound, or its receive buffer is full
+            self.dropped += 1
+            return False
+        self.sent += 1
+        return True
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+class EventSubscriber:
+    """Binds the bus socket in the API and hands each event to on_event."""
+
+    def __init__(self, on_event, path: str = None):
+        self.path = path or default_bus_path()
+        self.on_event = on_event
+        self.received = 0
+        self._sock = None
+        self._thread = None
+
+    def start(self):
+        if not HAS_UNIX_DGRAM or self._thread is not None:
+            return
+        try:
+            os.unlink(self.path)  # stale socket from a previous run
+        except FileNotFoundError:
+            pass
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+        self._sock.settimeout(1.0)
+        self._thread = Thread(target=self._run, name="event-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            sock.close()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        try:
+            os.unlink(self.path)
+        except (FileNotFoundError, OSError):
+            pass
+
+    def _run(self):
+        while self._sock is not None:
+            try:
+                data = self._sock.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                event = json.loads(data)
+            except json.JSONDecodeError:
+                continue
+            self.received += 1
+            try:
+                self.on_event(event)
+            except Exception as e:
+                print(f"[bus] Failed to apply event {event!r}: {e}")
+
+
+class AsyncCsvWriter:
+    """
+    Appends rows to a csv from a background thread. The frame loop only
+    pays for a queue.put(); the writer drains everything queued since its
+    last wake-up and writes it with one open/flush.
+    """
+
+    def __init__(self, path: str, fieldnames):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self._queue = queue.Queue()
+        self._thread = Thread(target=self._run, name="csv-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, row: dict):
+        self._queue.put(row)
+
+    def close(self):
+        """Flush everything still queued, then stop the thread."""
+        self._queue.put(None)
+        self._thread.join(timeout=5.0)
+
+    def _run(self):
+        running = True
+        while running:
+            rows = [self._queue.get()]
+            while True:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in rows:
+                running = False
+                rows = [r for r in rows if r is not None]
+            if rows:
+                self._append(rows)
+
+    def _append(self, rows):
+        try:
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=self.fieldnames, extrasaction="ignore")
+                # If file is empty, write header
+                if f.tell() == 0:
+                    writer.writeheader()
+                writer.writerows(rows)
+        except Exception as e:
+            print(f"Failed to write CSV rows: {e}")
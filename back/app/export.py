@@ -0,0 +1,212 @@
+# backend/app/export.py
+"""
+Bulk export of the detection history, straight from current.csv.
+
+Rows are read, filtered and serialized a chunk at a time by generators,
+so memory stays flat no matter how long the file is (the EventStore's
+in-memory copy is not used: it only keeps %H:%M:%S). The export covers the
+file as it was when the request started; rows appended meanwhile are left
+for the next export.
+
+Timestamps come out as full ISO 8601 local time with microseconds; the
+vision scripts wrote either that or epoch seconds.
+"""
+import csv
+import io
+import os
+import zlib
+from datetime import datetime
+
+import orjson
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+EXPORT_FIELDS = ("timestamp", "item", "classification", "location", "event_id", "bin")
+
+# column names used by the different writers of current.csv
+_COLUMNS = {
+    "timestamp": ("timestamp", "time", "ts"),
+    "item": ("item", "label", "object"),
+    "classification": ("classification", "class", "category", "coarse_type", "type"),
+    "location": ("location", "TopCornerOfBoundary"),
+    "event_id": ("event_id",),
+    "bin": ("node_id",),
+}
+
+CHUNK_ROWS = 2000
+PARQUET_ROW_GROUP = 16384
+
+HAS_PARQUET = pq is not None
+
+
+def parse_time(value: str) -> float:
+    """Epoch seconds from a query parameter: epoch seconds or ISO 8601."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def _timestamp(raw: str):
+    """(epoch seconds, ISO string) for a csv timestamp; (None, raw) if unreadable."""
+    try:
+        epoch = float(raw)
+        return epoch, datetime.fromtimestamp(epoch).isoformat(timespec="microseconds")
+    except ValueError:
+        pass
+    try:
+        dt = datetime.fromisoformat(raw)
+    except ValueError:
+        return None, raw
+    return dt.timestamp(), raw
+
+
+def iter_events(path, start=None, end=None, bins=None, classes=None, local_bin="local"):
+    """
+    Tuples in EXPORT_FIELDS order plus epoch seconds as the last element,
+    for rows of the csv at `path` inside [start, end] (epoch seconds),
+    whose bin is in `bins` and classification in `classes` (None = any).
+    Rows without a node_id are the local bin's.
+    """
+    bins = set(bins) if bins else None
+    classes = set(classes) if classes else None
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        reader = csv.reader(_lines(f, os.fstat(f.fileno()).st_size))
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [
+            next((header.index(name) for name in names if name in header), None)
+            for names in _COLUMNS.values()
+        ]
+        ts_col, item_col, class_col, loc_col, id_col, bin_col = columns
+
+        def cell(row, col, default=""):
+            return row[col] if col is not None and col < len(row) else default
+
+        for row in reader:
+            if not row:
+                continue
+            classification = cell(row, class_col)
+            if classes is not None and classification not in classes:
+                continue
+            bin_id = cell(row, bin_col) or local_bin
+            if bins is not None and bin_id not in bins:
+                continue
+            epoch, iso = _timestamp(cell(row, ts_col))
+            if start is not None and (epoch is None or epoch < start):
+                continue
+            if end is not None and (epoch is None or epoch > end):
+                continue
+            yield (iso, cell(row, item_col), classification, cell(row, loc_col),
+                   cell(row, id_col), bin_id, epoch)
+
+
+def _lines(f, size, block=1 << 20):
+    """Complete lines of the first `size` bytes of binary file f, a block at a time."""
+    remaining = size
+    tail = b""
+    while remaining > 0:
+        data = f.read(min(block, remaining))
+        if not data:
+            break
+        remaining -= len(data)
+        data = tail + data
+        cut = data.rfind(b"\n") + 1
+        tail = data[cut:]
+        if cut:
+            # newline="" leaves \r\n and quoted newlines to the csv module
+            yield from io.StringIO(data[:cut].decode("utf-8", errors="replace"), newline="")
+
+
+def _chunked(rows, size=CHUNK_ROWS):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def csv_chunks(rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(EXPORT_FIELDS)
+    for chunk in _chunked(rows):
+        writer.writerows(row[:-1] for row in chunk)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def ndjson_chunks(rows):
+    for chunk in _chunked(rows):
+        yield b"".join(
+            orjson.dumps(dict(zip(EXPORT_FIELDS, row[:-1])), option=orjson.OPT_APPEND_NEWLINE)
+            for row in chunk
+        )
+
+
+class _ChunkSink(io.RawIOBase):
+    """File object that only remembers what was written since the last drain()."""
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def parquet_chunks(rows):
+    """One Parquet row group per PARQUET_ROW_GROUP rows, streamed as it is written."""
+    schema = pa.schema(
+        [("timestamp", pa.timestamp("us"))] + [(name, pa.string()) for name in EXPORT_FIELDS[1:]]
+    )
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    for chunk in _chunked(rows, PARQUET_ROW_GROUP):
+        columns = list(zip(*chunk))
+        stamps = [datetime.fromtimestamp(e) if e is not None else None for e in columns[-1]]
+        table = pa.Table.from_arrays(
+            [pa.array(stamps, pa.timestamp("us"))] + [pa.array(col, pa.string()) for col in columns[1:-1]],
+            schema=schema,
+        )
+        writer.write_table(table)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def gzip_chunks(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
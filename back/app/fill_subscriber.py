@@ -0,0 +1,111 @@
+# backend/app/fill_subscriber.py
+import json
+import socket
+import time
+from threading import Event, Lock, Thread
+
+
+def parse_fill_packet(data: bytes):
+    """Decode one UDP datagram from the depth sensor; None if it isn't JSON."""
+    text = data.decode("utf-8", errors="ignore").strip()
+    if not text.startswith("{"):
+        return None
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return None
+
+
+class FillSubscriber:
+    """
+    Keeps one UDP subscription to the depth sensor open for the lifetime of
+    the app and remembers the latest fill_percentage, so /fill/ is answered
+    from memory instead of a SUBSCRIBE round-trip per request.
+
+    on_reading(bin_id, fill) sees every reading. A packet may name its bin
+    ("bin_id", for a gateway relaying several sensors); those don't change
+    the local bin's latest value, and bin_id is None for the local sensor.
+    """
+
+    def __init__(self, host: str, port: int, resubscribe_s: float = 5.0, on_reading=None):
+        self.host = host
+        self.port = port
+        self.resubscribe_s = resubscribe_s
+        self.on_reading = on_reading
+        self.packets = 0
+        self._latest = None  # (fill, received_at monotonic, received_at wall clock)
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread = None
+
+    def start(self):
+        if not self.host or self._thread is not None:
+            return
+        self._thread = Thread(target=self._run, name="fill-subscriber", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def latest(self, max_age_s: float):
+        """Latest fill percentage if it is fresher than max_age_s, else None."""
+        with self._lock:
+            if self._latest is None:
+                return None
+            fill, received_at, _ = self._latest
+        if time.monotonic() - received_at > max_age_s:
+            return None
+        return fill
+
+    def reading(self):
+        """(fill, received_at epoch seconds) for sharing with other workers."""
+        with self._lock:
+            if self._latest is None:
+                return None, None
+            return self._latest[0], self._latest[2]
+
+    def publish(self, fill: float):
+        with self._lock:
+            self._latest = (fill, time.monotonic(), time.time())
+            self.packets += 1
+
+    def _run(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.settimeout(1.0)
+        last_subscribe = 0.0
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                # the sensor forgets subscribers, so renew periodically
+                if now - last_subscribe > self.resubscribe_s:
+                    try:
+                        sock.sendto(b"SUBSCRIBE", (self.host, self.port))
+                    except OSError as e:
+                        print(f"[fill] SUBSCRIBE to {self.host}:{self.port} failed: {e}")
+                    last_subscribe = now
+
+                try:
+                    data, _ = sock.recvfrom(4096)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    self._stop.wait(1.0)
+                    continue
+
+                depth_info = parse_fill_packet(data)
+                if depth_info is None:
+                    continue
+                try:
+                    fill = float(depth_info["fill_percentage"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                bin_id = depth_info.get("bin_id")
+                if bin_id is None:
+                    self.publish(fill)
+                if self.on_reading is not None:
+                    self.on_reading(bin_id, fill)
+        finally:
+            sock.close()
@@ -0,0 +1,243 @@
+# backend/app/forecast.py
+"""
+Online time-to-full forecasts per bin.
+
+Every fill reading and every logged item updates its bin's estimates in
+O(1) - nothing is recomputed over history, so hundreds of bins cost the
+same per reading as one:
+
+- fill rate: an exponentially weighted least-squares line through the
+  bin's fill readings (half-life FORECAST_HALF_LIFE_S). The weighted sums
+  are kept relative to the latest reading, so they stay small however
+  long the process runs. A drop of FORECAST_EMPTY_DROP points means the
+  bin was emptied and starts a new line.
+- detection rate: an exponentially weighted event rate (half-life
+  FORECAST_RATE_HALF_LIFE_S, shorter, so a rush shows up quickly).
+- fill per item: a slowly weighted regression through the origin of how
+  much the fitted level rose over a stretch of readings against how many
+  items were logged meanwhile.
+
+The forecast fill rate blends the readings' slope with detection rate x
+fill per item (weight FORECAST_DETECTION_WEIGHT on the latter), so it
+follows the current pace of items without waiting for the slower line to
+catch up. Bins without readings (remote nodes with no sensor) get a
+detection rate but no time-to-full.
+"""
+import math
+import time
+from datetime import datetime
+from threading import Lock
+
+from .store import event_epoch
+
+MIN_READINGS = 3          # effective readings before a slope is trusted
+SEGMENT_MIN_S = 60.0      # shortest stretch used for the fill-per-item fit
+
+
+class BinModel:
+    """Running estimates for one bin. Times are epoch seconds."""
+
+    __slots__ = (
+        "t", "s0", "st", "sy", "stt", "sty",       # weighted fill-vs-time sums, origin at t
+        "seg_t", "seg_level", "seg_items",         # current fill-per-item stretch
+        "k_t", "kn2", "kny",                       # fill-per-item regression sums
+        "ev_t", "ev_rate",                         # detection rate (events/s) as of ev_t
+    )
+
+    def __init__(self):
+        self.t = None
+        self.s0 = self.st = self.sy = self.stt = self.sty = 0.0
+        self.seg_t = self.seg_level = None
+        self.seg_items = 0
+        self.k_t = None
+        self.kn2 = self.kny = 0.0
+        self.ev_t = None
+        self.ev_rate = 0.0
+
+    # ---------- updates ----------
+
+    def add_reading(self, t, fill, fill_tau, item_tau, empty_drop):
+        if self.t is not None and t < self.t:
+            return  # late packet
+        if self.t is not None and self.s0 >= MIN_READINGS and fill < self.level_at(t) - empty_drop:
+            self.t = None  # emptied: start a new line, keep what we learned per item
+        if self.t is None:
+            self.t = t
+            self.s0, self.st, self.sy, self.stt, self.sty = 1.0, 0.0, fill, 0.0, 0.0
+            self.seg_t, self.seg_level, self.seg_items = t, fill, 0
+            return
+
+        dt = t - self.t
+        d = math.exp(-dt / fill_tau)
+        s0, st, sy, stt, sty = self.s0 * d, self.st * d, self.sy * d, self.stt * d, self.sty * d
+        # move the origin to the new reading: old points now sit at -dt
+        self.stt = stt - 2.0 * dt * st + dt * dt * s0
+        self.sty = sty - dt * sy
+        self.st = st - dt * s0
+        self.s0 = s0 + 1.0
+        self.sy = sy + fill
+        self.t = t
+
+        if self.seg_items and t - self.seg_t >= SEGMENT_MIN_S:
+            level = self.level_at(t)
+            w = math.exp(-(t - self.k_t) / item_tau) if self.k_t is not None else 0.0
+            n = self.seg_items
+            self.kn2 = self.kn2 * w + n * n
+            self.kny = self.kny * w + n * (level - self.seg_level)
+            self.k_t = t
+            self.seg_t, self.seg_level, self.seg_items = t, level, 0
+
+    def add_event(self, t, rate_tau):
+        if self.ev_t is None:
+            self.ev_t, self.ev_rate = t, 1.0 / rate_tau
+        elif t >= self.ev_t:
+            self.ev_rate = self.ev_rate * math.exp(-(t - self.ev_t) / rate_tau) + 1.0 / rate_tau
+            self.ev_t = t
+        else:
+            self.ev_rate += math.exp(-(self.ev_t - t) / rate_tau) / rate_tau
+        if self.t is not None and t >= self.seg_t:
+            self.seg_items += 1
+
+    # ---------- estimates ----------
+
+    def slope(self):
+        """Fill rate from the readings alone (%/s), None until there are enough."""
+        if self.t is None or self.s0 < MIN_READINGS:
+            return None
+        den = self.s0 * self.stt - self.st * self.st
+        if den <= 1e-9:
+            return None
+        return (self.s0 * self.sty - self.st * self.sy) / den
+
+    def level_at(self, t):
+        slope = self.slope()
+        if slope is None:
+            return self.sy / self.s0
+        return (self.sy - slope * self.st) / self.s0 + slope * (t - self.t)
+
+    def fill_per_item(self):
+        return self.kny / self.kn2 if self.kn2 > 0 else None
+
+    def detection_rate(self, now, rate_tau):
+        if self.ev_t is None:
+            return 0.0
+        return self.ev_rate * math.exp(-max(0.0, now - self.ev_t) / rate_tau)
+
+    # ---------- sharing between workers ----------
+
+    def state(self):
+        return [self.t, self.s0, self.st, self.sy, self.stt, self.sty,
+                self.kn2, self.kny, self.ev_t, self.ev_rate]
+
+    @classmethod
+    def from_state(cls, state):
+        model = cls()
+        (model.t, model.s0, model.st, model.sy, model.stt, model.sty,
+         model.kn2, model.kny, model.ev_t, model.ev_rate) = state
+        return model
+
+
+class FillForecaster:
+    """
+    Per-bin BinModels fed by fill readings (FillSubscriber) and logged
+    items (EventStore), answering forecasts from the current estimates.
+    """
+
+    def __init__(self, local_bin="local", half_life_s=3600.0, rate_half_life_s=900.0,
+                 item_half_life_s=86400.0, detection_weight=0.5, empty_drop=15.0, full_percent=100.0):
+        self.local_bin = local_bin
+        self.fill_tau = half_life_s / math.log(2)
+        self.rate_tau = rate_half_life_s / math.log(2)
+        self.item_tau = item_half_life_s / math.log(2)
+        self.detection_weight = detection_weight
+        self.empty_drop = empty_drop
+        self.full_percent = full_percent
+        self._bins = {}
+        self._lock = Lock()
+
+    def _model(self, bin_id):
+        model = self._bins.get(bin_id)
+        if model is None:
+            model = self._bins[bin_id] = BinModel()
+        return model
+
+    def add_reading(self, bin_id, fill, t=None):
+        """A fill percentage from a depth sensor; bin_id None = the local bin."""
+        t = time.time() if t is None else t
+        with self._lock:
+            self._model(bin_id or self.local_bin).add_reading(
+                t, fill, self.fill_tau, self.item_tau, self.empty_drop,
+            )
+
+    def add_event(self, bin_id, t=None):
+        t = time.time() if t is None else t
+        with self._lock:
+            self._model(bin_id or self.local_bin).add_event(t, self.rate_tau)
+
+    def observe_row(self, row: dict):
+        """EventStore hook: one logged item (bus event or csv row)."""
+        t = event_epoch(row.get("timestamp") or row.get("time") or row.get("ts"))
+        self.add_event(row.get("node_id"), t if t is not None else time.time())
+
+    def forecast(self, bin_id, now=None):
+        with self._lock:
+            model = self._bins.get(bin_id)
+            return None if model is None else self._forecast(bin_id, model, now or time.time())
+
+    def forecasts(self, now=None):
+        """Every bin, soonest full first (bins without a time-to-full last)."""
+        now = now or time.time()
+        with self._lock:
+            out = [self._forecast(b, m, now) for b, m in self._bins.items()]
+        return sorted(out, key=lambda f: (f["timeToFullS"] is None, f["timeToFullS"] or 0.0))
+
+    def export(self):
+        with self._lock:
+            return {bin_id: model.state() for bin_id, model in self._bins.items()}
+
+    def load(self, states: dict):
+        """Replace every bin's estimates with another forecaster's export()."""
+        bins = {bin_id: BinModel.from_state(state) for bin_id, state in states.items()}
+        with self._lock:
+            self._bins = bins
+
+    def _forecast(self, bin_id, model, now):
+        detection_rate = model.detection_rate(now, self.rate_tau)
+        per_item = model.fill_per_item()
+        slope = model.slope()
+        doc = {
+            "bin": bin_id,
+            "fillPercent": None,
+            "fillRatePerHour": None,
+            "timeToFullS": None,
+            "fullAt": None,
+            "detectionsPerHour": round(detection_rate * 3600, 2),
+            "fillPerItem": round(per_item, 3) if per_item is not None else None,
+            "basis": "detections",
+            "lastReadingAgeS": None,
+        }
+        if model.t is None:
+            return doc
+
+        if slope is None:
+            rate, basis = None, "readings"
+        elif per_item is None:
+            rate, basis = slope, "readings"
+        else:
+            w = self.detection_weight
+            rate, basis = (1.0 - w) * slope + w * per_item * detection_rate, "readings+detections"
+        level = model.level_at(model.t)
+        if rate is not None:
+            level += rate * (now - model.t)
+        level = min(100.0, max(0.0, level))
+
+        doc.update(fillPercent=round(level, 1), basis=basis, lastReadingAgeS=round(now - model.t, 1))
+        if rate is not None:
+            doc["fillRatePerHour"] = round(rate * 3600, 3)
+            if level >= self.full_percent:
+                doc["timeToFullS"] = 0.0
+            elif rate > 1e-9:
+                doc["timeToFullS"] = round((self.full_percent - level) / rate, 1)
+            if doc["timeToFullS"] is not None:
+                doc["fullAt"] = datetime.fromtimestamp(now + doc["timeToFullS"]).isoformat(timespec="seconds")
+        return doc
@@ -0,0 +1,191 @@
+# backend/app/ingest.py
+"""
+Durable ingestion of event batches posted by remote vision nodes.
+
+Each node numbers its events 1, 2, 3... within an epoch (a fresh epoch per
+process start). The API keeps the highest sequence number it has stored
+per node in ingest_nodes.json, so a batch that is retried after a timeout
+only adds the events it hasn't seen: replays are acknowledged, never
+written twice. Accepted events are appended to current.csv in one write,
+in the same layout the vision scripts use (store.CSV_FIELDS, node_id set),
+which keeps the csv the single source of truth for every worker.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import zlib
+from pathlib import Path
+from threading import Lock
+
+import orjson
+
+from .store import CSV_FIELDS, prepare_csv, to_csv_row
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class BatchError(ValueError):
+    """Malformed batch (maps to HTTP 400)."""
+
+
+def decode_batch(body: bytes, content_encoding: str = "") -> dict:
+    """Decompress (gzip / deflate) and parse a batch body."""
+    encoding = (content_encoding or "").lower().strip()
+    try:
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            body = zlib.decompress(body)
+        elif encoding not in ("", "identity"):
+            raise BatchError(f"unsupported Content-Encoding: {encoding}")
+        doc = orjson.loads(body)
+    except (OSError, EOFError, zlib.error, orjson.JSONDecodeError) as e:
+        raise BatchError(f"unreadable batch: {e}")
+
+    if not isinstance(doc, dict) or not isinstance(doc.get("events"), list):
+        raise BatchError("batch must be an object with an 'events' list")
+    node_id = doc.get("node_id")
+    if not isinstance(node_id, str) or not node_id or len(node_id) > 128:
+        raise BatchError("batch needs a node_id string")
+    if not isinstance(doc.get("epoch", 0), int):
+        raise BatchError("epoch must be an integer")
+    return doc
+
+
+class IngestLog:
+    """
+    Appends remote events to the csv with per-node idempotency.
+
+    Writers are serialized by a thread lock plus an flock on a lock file,
+    so several API workers can take batches at the same time.
+    """
+
+    def __init__(self, csv_path: Path, state_path: Path = None):
+        self.csv_path = Path(csv_path)
+        self.state_path = Path(state_path or self.csv_path.with_name("ingest_nodes.json"))
+        self._lock = Lock()
+
+    def ingest(self, batch: dict) -> dict:
+        """
+        Store the events of one decoded batch.
+        Returns {"accepted", "duplicates", "ack_seq"}: the node may drop
+        everything up to ack_seq from its buffer.
+        """
+        node_id = batch["node_id"]
+        epoch = batch.get("epoch", 0)
+
+        with self._lock, self._exclusive():
+            nodes = self._load_nodes()
+            node = nodes.get(node_id)
+            if node is None or epoch > node["epoch"]:
+                node = {"epoch": epoch, "seq": 0}
+            elif epoch < node["epoch"]:
+                # a batch from before the node restarted: nothing to ack
+                return {"accepted": 0, "duplicates": len(batch["events"]), "ack_seq": 0, "stale_epoch": True}
+
+            high = node["seq"]
+            fresh = []
+            for event in batch["events"]:
+                if not isinstance(event, dict):
+                    raise BatchError("events must be objects")
+                seq = event.get("seq")
+                if not isinstance(seq, int) or seq <= 0:
+                    raise BatchError("every event needs a positive integer seq")
+                if seq > high:
+                    fresh.append(event)
+            fresh.sort(key=lambda e: e["seq"])
+
+            if fresh:
+                self._append(node_id, epoch, fresh)
+                node["seq"] = fresh[-1]["seq"]
+            nodes[node_id] = node
+            self._save_nodes(nodes)
+
+        return {
+            "accepted": len(fresh),
+            "duplicates": len(batch["events"]) - len(fresh),
+            "ack_seq": node["seq"],
+        }
+
+    def nodes(self) -> dict:
+        with self._lock:
+            return self._load_nodes()
+
+    # ---------- internals ----------
+
+    def _exclusive(self):
+        return _FileLock(self.csv_path.with_name(self.csv_path.name + ".ingest.lock"))
+
+    def _append(self, node_id, epoch, events):
+        backup = prepare_csv(self.csv_path)
+        if backup:
+            print(f"[ingest] Converted current.csv to the current layout (original in {backup})")
+
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=CSV_FIELDS)
+        if self._is_empty():
+            writer.writeheader()
+        for event in events:
+            row = to_csv_row(event, node_id)
+            # deterministic id: a replay that slips past seq checks still dedupes in EventStore
+            row["event_id"] = row["event_id"] or f"{node_id}-{epoch}-{event['seq']}"
+            writer.writerow(row)
+
+        # one O_APPEND write per batch: readers tailing the file see whole rows
+        data = buf.getvalue().encode("utf-8")
+        fd = os.open(self.csv_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    def _is_empty(self):
+        try:
+            return self.csv_path.stat().st_size == 0
+        except FileNotFoundError:
+            return True
+
+    def _load_nodes(self) -> dict:
+        try:
+            with self.state_path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_nodes(self, nodes: dict):
+        fd, tmp = tempfile.mkstemp(dir=self.state_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(nodes, f)
+            os.replace(tmp, self.state_path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+
+
+class _FileLock:
+    def __init__(self, path: Path):
+        self.path = path
+        self._fh = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._fh = open(self.path, "a")
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._fh is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            self._fh.close()
+            self._fh = None
+        return False
@@ -1,17 +1,41 @@
 # backend/app/main.py
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from .config import settings
+from .responses import FastJSONResponse
+from .state import AppState
 from .routers import health
 from .routers import clearData
 from .routers import totalTrash
 from .routers import log   
 from .routers import fill
+from .routers import detectionConfig
+from .routers import events
+from .routers import video
+from .routers import export
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    state = AppState()
+    state.start()
+    app.state.trashcam = state
+    print("FastAPI backend started")
+    try:
+        yield
+    finally:
+        print("FastAPI backend shutting down")
+        state.stop()
+
 
 def create_app():
     app = FastAPI(
         title=settings.APP_NAME,
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse,
     )
     
     app.add_middleware(
@@ -21,20 +45,24 @@ def create_app():
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    # Compress big payloads (/logs/ grows with every item). Brotli is used
+    # when brotli-asgi is installed, gzip otherwise.
+    try:
+        from brotli_asgi import BrotliMiddleware
+        app.add_middleware(BrotliMiddleware, minimum_size=settings.COMPRESS_MIN_BYTES)
+    except ImportError:
+        app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESS_MIN_BYTES)
+
     app.include_router(health.router)
     app.include_router(clearData.router)
     app.include_router(totalTrash.router)
     app.include_router(log.router)
     app.include_router(fill.router)
+    app.include_router(detectionConfig.router)
+    app.include_router(events.router)
+    app.include_router(video.router)
+    app.include_router(export.router)
 
     return app
 
 app = create_app()
-
-@app.on_event("startup")
-async def startup_event():
-    print("FastAPI backend started")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    print("FastAPI backend shutting down")
@@ -0,0 +1,22 @@
+# backend/app/responses.py
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson. Dicts/lists of str/int/float are
+    serialized natively in C, skipping jsonable_encoder + json.dumps.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize once for bodies we cache and reuse (see cache.py)."""
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
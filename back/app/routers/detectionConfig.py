@@ -0,0 +1,45 @@
+# backend/app/routers/detectionConfig.py
+from fastapi import APIRouter, HTTPException
+
+from ..config import settings
+from ..detection_config import (
+    InvalidConfig, VersionConflict, default_config_path, read_config, write_config,
+)
+from ..schemas import DetectionConfigUpdate
+
+router = APIRouter(
+    prefix="/detectionConfig",
+    tags=["Detection Config"],
+)
+
+
+def config_path() -> str:
+    return settings.DETECTION_CONFIG_PATH or default_config_path()
+
+
+@router.get("/")
+def get_detection_config():
+    """Current overrides (the vision loop uses its defaults for anything missing)."""
+    return read_config(config_path())
+
+
+@router.put("/")
+def update_detection_config(update: DetectionConfigUpdate):
+    """
+    Push threshold / ROI / vocabulary changes to the running vision loop.
+    Thresholds apply on its next config poll (~1 s); a new vocabulary is
+    swapped in once its model is ready, without pausing detection.
+    """
+    changes = update.model_dump(exclude_unset=True)
+    expected = changes.pop("version", None)
+    if isinstance(changes.get("roi"), dict):
+        changes["roi"] = {k: v for k, v in changes["roi"].items() if v is not None} or None
+    if not changes:
+        raise HTTPException(status_code=400, detail="No config fields given")
+
+    try:
+        return write_config(config_path(), changes, expected_version=expected)
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except InvalidConfig as e:
+        raise HTTPException(status_code=422, detail=str(e))
@@ -0,0 +1,81 @@
+# backend/app/routers/events.py
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
+from typing import Optional
+
+from ..cache import is_not_modified
+from ..config import settings
+from ..ingest import BatchError, decode_batch
+from ..state import AppState, get_state
+
+router = APIRouter(
+    prefix="/events",
+    tags=["Events"],
+)
+
+
+@router.post("/batch")
+async def ingest_batch(
+    request: Request,
+    content_encoding: Optional[str] = Header(None),
+    x_ingest_token: Optional[str] = Header(None),
+    state: AppState = Depends(get_state),
+):
+    """
+    Events from a remote vision node, optionally gzip/deflate encoded:
+
+        {"node_id": "cam-2", "epoch": 1718000000000,
+         "events": [{"seq": 1, "timestamp": "...", "item": "...", "classification": "..."}, ...]}
+
+    seq numbers are per node and epoch; anything at or below what was
+    already stored is acknowledged without being written again.
+    """
+    if settings.INGEST_TOKEN and x_ingest_token != settings.INGEST_TOKEN:
+        raise HTTPException(status_code=401, detail="Bad or missing X-Ingest-Token")
+
+    body = await request.body()
+    if len(body) > settings.INGEST_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Batch too large")
+
+    try:
+        # decompress, parse, append and tail off the event loop
+        result = await run_in_threadpool(_store_batch, state, body, content_encoding)
+    except BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    state.metrics.incr("ingest.batches")
+    state.metrics.incr("ingest.accepted", result["accepted"])
+    state.metrics.incr("ingest.duplicates", result["duplicates"])
+    return result
+
+
+def _store_batch(state: AppState, body: bytes, content_encoding: Optional[str]) -> dict:
+    result = state.ingest.ingest(decode_batch(body, content_encoding))
+    if result["accepted"]:
+        state.events.refresh()  # visible to /logs/ right away
+    return result
+
+
+@router.get("/nodes")
+def ingest_nodes(state: AppState = Depends(get_state)):
+    """Last stored (epoch, seq) per remote node."""
+    return state.ingest.nodes()
+
+
+@router.get("/{event_id}/snapshot")
+def event_snapshot(event_id: str, request: Request, state: AppState = Depends(get_state)):
+    """
+    JPEG crop of the item when it was logged. The image behind an event
+    never changes (it is stored by content hash), so clients may cache it
+    for good.
+    """
+    found = state.snapshots.lookup(event_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="No snapshot for this event")
+    path, digest = found
+    headers = {"ETag": f'"{digest}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    if is_not_modified(request, headers["ETag"], path.stat().st_mtime):
+        state.metrics.incr("snapshots.not_modified")
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="image/jpeg", headers=headers)
@@ -0,0 +1,64 @@
+# backend/app/routers/export.py
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from ..config import settings
+from ..export import (
+    HAS_PARQUET, csv_chunks, gzip_chunks, iter_events, ndjson_chunks, parquet_chunks, parse_time,
+)
+from ..state import AppState, get_state
+
+router = APIRouter(
+    prefix="/export",
+    tags=["Export"],
+)
+
+_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv", csv_chunks),
+    "ndjson": ("application/x-ndjson", "ndjson", ndjson_chunks),
+    "parquet": ("application/vnd.apache.parquet", "parquet", parquet_chunks),
+}
+
+
+@router.get("/")
+def export_events(
+    format: Literal["csv", "ndjson", "parquet"] = Query("csv"),
+    start: Optional[str] = Query(None, description="epoch seconds or ISO 8601, inclusive"),
+    end: Optional[str] = Query(None, description="epoch seconds or ISO 8601, inclusive"),
+    bin: Optional[List[str]] = Query(None, description="bin / node id, repeatable"),
+    classification: Optional[List[str]] = Query(None, description="repeatable"),
+    gzip: bool = Query(False, description="gzip the body (Content-Encoding: gzip)"),
+    state: AppState = Depends(get_state),
+):
+    """
+    Stream the whole detection history (or a slice of it) with full
+    timestamps. Rows are produced as they are sent, so any length of
+    history exports in constant memory.
+    """
+    try:
+        start_ts = parse_time(start) if start else None
+        end_ts = parse_time(end) if end else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Bad start/end: {e}")
+    if format == "parquet" and not HAS_PARQUET:
+        raise HTTPException(status_code=501, detail="Parquet export needs pyarrow installed")
+
+    media_type, extension, serialize = _FORMATS[format]
+    rows = iter_events(
+        state.events.path, start_ts, end_ts, bin, classification, local_bin=settings.LOCAL_BIN_ID,
+    )
+    body = serialize(rows)
+    headers = {
+        "Content-Disposition": f'attachment; filename="events-{datetime.now():%Y%m%d-%H%M%S}.{extension}"',
+        # keep the compression middleware out: we compress (or not) ourselves
+        "Content-Encoding": "identity",
+    }
+    # Parquet pages are compressed already
+    if gzip and format != "parquet":
+        body = gzip_chunks(body, settings.EXPORT_GZIP_LEVEL)
+        headers["Content-Encoding"] = "gzip"
+    state.metrics.incr(f"export.{format}")
+    return StreamingResponse(body, media_type=media_type, headers=headers)
@@ -1,16 +1,40 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 import socket
 import json
 
 from ..config import settings
+from ..fill_subscriber import FillSubscriber
+from ..state import AppState, get_fill_subscriber, get_state
 
 router = APIRouter(
     prefix="/fill",
     tags=["Fill Level Check"],
 )
 
+@router.get("/forecast")
+def get_fill_forecasts(state: AppState = Depends(get_state)):
+    # every bin, soonest full first: the pickup order
+    state.sync_events()
+    return {"bins": state.forecast.forecasts()}
+
+
+@router.get("/{bin_id}/forecast")
+def get_fill_forecast(bin_id: str, state: AppState = Depends(get_state)):
+    state.sync_events()
+    forecast = state.forecast.forecast(bin_id)
+    if forecast is None:
+        raise HTTPException(status_code=404, detail=f"No fill readings or items for bin {bin_id!r}")
+    return forecast
+
+
 @router.get("/")
-async def get_fill_level():
+async def get_fill_level(subscriber: FillSubscriber = Depends(get_fill_subscriber)):
+    # Normal case: the lifespan-managed subscriber already has a fresh reading
+    fill = subscriber.latest(settings.FILL_MAX_AGE_S)
+    if fill is not None:
+        return {"fillPercent": fill}
+
+    # Fallback: one-shot SUBSCRIBE round-trip (subscriber disabled or stale)
     host = settings.UDP_SERVER_HOST
     port = settings.UDP_SERVER_PORT
 
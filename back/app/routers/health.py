@@ -1,5 +1,7 @@
 # backend/app/routers/health.py
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from ..state import AppState, get_state
 
 router = APIRouter(
     prefix="/health",
@@ -11,5 +13,11 @@ async def health_check():
     return {"status": "ok"}
 
 
-
-
+@router.get("/metrics")
+async def metrics(state: AppState = Depends(get_state)):
+    return {
+        "counters": state.metrics.snapshot(),
+        "events": len(state.events),
+        "fillPackets": state.fill.packets,
+        "busEvents": state.bus.received,
+    }
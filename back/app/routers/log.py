@@ -1,72 +1,79 @@
-from fastapi import APIRouter
-from pathlib import Path
-import csv
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from typing import Literal, Optional, Union
 
-router = APIRouter(prefix="/logs", tags=["Logs"])
+from ..cache import is_not_modified, not_modified_response, validator_headers
+from ..responses import dumps
+from ..schemas import ColumnarLogPage, LogPage
+from ..state import AppState, get_state
 
+router = APIRouter(prefix="/logs", tags=["Logs"])
 
-def get_logs_path() -> Path:
-    # back/current.csv relative to this file
-    return Path(__file__).resolve().parents[2] / "current.csv"
+LOG_FIELDS = ("timestamp", "item", "classification")
 
 
-@router.get("/")
-def get_logs():
-    file_path = get_logs_path()
+@router.get("/", response_model=Union[LogPage, ColumnarLogPage])
+def get_logs(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=10000, description="page size (default: everything)"),
+    shape: Literal["rows", "columnar"] = Query("rows", description="columnar = one array per field"),
+    state: AppState = Depends(get_state),
+):
+    state.sync_events()
+    store = state.events
+    state.metrics.incr("logs.requests")
 
     # If current.csv doesn't exist yet, just return empty list
-    if not file_path.exists():
-        return {"logs": []}
-
-    logs = []
-
-    with file_path.open("r", newline="") as f:
-        reader = csv.DictReader(f)
-
-        for row in reader:
-            if not row:
-                continue
-
-            # --- timestamp handling ---
-            raw_ts = (
-                row.get("timestamp")
-                or row.get("time")
-                or row.get("ts")
-                or ""
-            )
-
-            ts = raw_ts
-            if raw_ts:
-                try:
-                    ts = datetime.fromisoformat(raw_ts).strftime("%H:%M:%S")
-                except Exception:
-                    # leave as-is if format is weird
-                    ts = raw_ts
-
-            # --- item name ---
-            item = (
-                row.get("item")
-                or row.get("label")
-                or row.get("object")
-                or ""
-            )
-
-            # --- class/category label ---
-            cls = (
-                row.get("classification")
-                or row.get("category")
-                or row.get("coarse_type")
-                or row.get("type")
-                or ""
-            )
-
-            logs.append(
-                {
-                    "timestamp": ts,
-                    "item": item,
-                    "classification": cls,
-                }
-            )
-
-    return {"logs": logs}
+    if not store.exists:
+        return {"logs": []} if shape == "rows" else {"columns": {f: [] for f in LOG_FIELDS}}
+
+    # Nothing appended since the client's last poll -> 304, no rows touched
+    etag, last_modified = store.version()
+    if is_not_modified(request, etag, last_modified):
+        state.metrics.incr("logs.not_modified")
+        return not_modified_response(etag, last_modified)
+
+    start = parse_cursor(cursor)
+    cache_key = f"logs:{shape}:{start}:{limit}"
+    body = state.cache.get(cache_key, etag)
+    if body is None:
+        body = dumps(build_page(store, start, limit, shape))
+        state.cache.put(cache_key, etag, body)
+    else:
+        state.metrics.incr("logs.cache_hits")
+
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers=validator_headers(etag, last_modified),
+    )
+
+
+def parse_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        start = int(cursor)
+    except ValueError:
+        start = -1
+    if start < 0:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor!r}")
+    return start
+
+
+def build_page(store, start: int, limit: Optional[int], shape: str) -> dict:
+    """
+    Slice rows [start, start+limit). The log is append-only, so a row
+    index is a stable cursor until /clearData/ resets the file.
+    """
+    total = len(store)
+    end = total if limit is None else min(total, start + limit)
+    page = store.rows(start, end)
+    next_cursor = str(end) if end < total else None
+
+    if shape == "columnar":
+        columns = {field: [row[field] for row in page] for field in LOG_FIELDS}
+        return {"columns": columns, "total": total, "next_cursor": next_cursor}
+
+    return {"logs": page, "total": total, "next_cursor": next_cursor}
+
@@ -1,4 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from ..state import AppState, get_state
 
 router = APIRouter(
     prefix="/totalTrash",
@@ -7,11 +9,7 @@ router = APIRouter(
 
 
 @router.get("/")
-def TrashNumber():
-    def count_lines_readlines(filepath):
-        with open(filepath, 'r') as f:
-            lines = f.readlines()
-            return len(lines)
-
-    file_path = "../../total_trash.csv"  
-    num_lines = count_lines_readlines(file_path)
\ No newline at end of file
+def TrashNumber(state: AppState = Depends(get_state)):
+    # counts are kept up to date while tailing current.csv, no file scan here
+    state.sync_events()
+    return {"total": len(state.events), "byClassification": state.events.counts()}
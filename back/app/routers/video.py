@@ -0,0 +1,78 @@
+# backend/app/routers/video.py
+import os
+import re
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+
+from ..config import settings
+from ..state import AppState, get_state
+from ..videofeed import BOUNDARY, clip_path
+
+_CLIP_ID = re.compile(r"^[0-9A-Za-z_-]{1,64}$")
+
+router = APIRouter(
+    prefix="/video",
+    tags=["Video"],
+)
+
+
+@router.get("/")
+def video_cameras(state: AppState = Depends(get_state)):
+    """Cameras the vision process has connected, with viewer and frame counts."""
+    return state.video.cameras()
+
+
+@router.get("/{camera}")
+async def video_stream(camera: str, state: AppState = Depends(get_state)):
+    """
+    Annotated frames as multipart MJPEG (use directly as an <img> src).
+    Frames are encoded once by the vision process and shared by every
+    viewer; slow viewers skip frames instead of queueing them.
+    """
+    if not state.video.running:
+        # VIDEO_FEED=0, or no Unix sockets on this platform
+        raise HTTPException(status_code=503, detail="Video feed is not enabled")
+    return StreamingResponse(
+        state.video.stream(camera),
+        media_type=f"multipart/x-mixed-replace; boundary={BOUNDARY}",
+        # already JPEG: keep the compression middleware from buffering it
+        headers={"Cache-Control": "no-cache", "Content-Encoding": "identity"},
+    )
+
+
+@router.post("/{camera}/clip", status_code=202)
+def request_clip(
+    camera: str,
+    pre_s: float = Query(10.0, ge=0),
+    post_s: float = Query(5.0, ge=0),
+    state: AppState = Depends(get_state),
+):
+    """
+    Save the camera's last pre_s seconds plus the next post_s seconds from
+    its in-memory DVR. The clip is at /video/clips/{clip_id} once post_s
+    has passed.
+    """
+    if not state.video.running:
+        raise HTTPException(status_code=503, detail="Video feed is not enabled")
+    pre_s = min(pre_s, settings.CLIP_MAX_PRE_S)
+    post_s = min(post_s, settings.CLIP_MAX_POST_S)
+    clip_id = state.video.request_clip(camera, pre_s, post_s)
+    if clip_id is None:
+        raise HTTPException(status_code=404, detail=f"Camera '{camera}' is not connected")
+    return {"clip_id": clip_id, "ready_in_s": post_s, "url": f"/video/clips/{clip_id}"}
+
+
+@router.get("/clips/{clip_id}")
+def get_clip(clip_id: str, state: AppState = Depends(get_state)):
+    """A DVR clip as concatenated JPEGs (event clips use the event id)."""
+    if not _CLIP_ID.match(clip_id):
+        raise HTTPException(status_code=404, detail="No such clip")
+    path = clip_path(state.clip_dir, clip_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="No such clip (or not written yet)")
+    try:
+        os.utime(path)  # recently used: the recorder's size cap evicts it last
+    except OSError:
+        pass
+    return FileResponse(path, media_type="video/x-motion-jpeg", filename=path.name)
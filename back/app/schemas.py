@@ -0,0 +1,63 @@
+# backend/app/schemas.py
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class LogEntry(BaseModel):
+    timestamp: str
+    item: str
+    classification: str
+
+
+class LogPage(BaseModel):
+    logs: List[LogEntry] = []
+    total: int = 0
+    # row index to pass back as ?cursor=, None once the end is reached
+    next_cursor: Optional[str] = None
+
+
+class LogColumns(BaseModel):
+    timestamp: List[str] = []
+    item: List[str] = []
+    classification: List[str] = []
+
+
+class ColumnarLogPage(BaseModel):
+    """Same data as LogPage, one array per field (much smaller on the wire)."""
+
+    columns: LogColumns = LogColumns()
+    total: int = 0
+    next_cursor: Optional[str] = None
+
+
+class RoiFractions(BaseModel):
+    top: Optional[float] = Field(None, ge=0.0, le=1.0)
+    bottom: Optional[float] = Field(None, ge=0.0, le=1.0)
+    left: Optional[float] = Field(None, ge=0.0, le=1.0)
+    right: Optional[float] = Field(None, ge=0.0, le=1.0)
+
+    @model_validator(mode="after")
+    def check_order(self):
+        # an edge given without its opposite is checked against the stored one on write
+        if self.top is not None and self.bottom is not None and self.top >= self.bottom:
+            raise ValueError("roi top must be less than bottom")
+        if self.left is not None and self.right is not None and self.left >= self.right:
+            raise ValueError("roi left must be less than right")
+        return self
+
+
+class DetectionConfigUpdate(BaseModel):
+    """
+    Partial update of detection_config.json. Omitted fields are unchanged,
+    null removes an override. `version`, if given, must match the current
+    file (optimistic locking).
+    """
+
+    version: Optional[int] = None
+    conf_thres: Optional[float] = Field(None, gt=0.0, lt=1.0)
+    iou_thres: Optional[float] = Field(None, gt=0.0, lt=1.0)
+    min_box_area: Optional[int] = Field(None, ge=0)
+    roi: Optional[RoiFractions] = None
+    prompt_to_coarse: Optional[Dict[str, str]] = None
+    coarse_to_bin: Optional[Dict[str, str]] = None
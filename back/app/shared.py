@@ -0,0 +1,176 @@
+# backend/app/shared.py
+import json
+import os
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no multi-worker mode, every process owns ingestion
+    fcntl = None
+
+# seq (u64) | payload length (u32) | payload (JSON)
+_HEADER = struct.Struct("<QI")
+
+
+def attach_untracked(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to a segment another process created without registering it with
+    our resource tracker, so our exit never unlinks it (and we don't trip
+    the creator's unregister when the tracker is shared).
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def claim_ingest_owner(lock_path: Path):
+    """
+    Try to become the one worker that runs ingestion (file tail, UDP
+    subscriber). Returns the open lock file on success (keep it alive for
+    the life of the process), or None if another worker already owns it.
+    """
+    if fcntl is None:
+        return open(lock_path, "a")
+
+    fh = open(lock_path, "a")
+    try:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        fh.close()
+        return None
+    return fh
+
+
+class SharedSnapshot:
+    """
+    One JSON document in shared memory, written by a single process and read
+    by any number of others without locks (seqlock): the writer makes seq odd
+    while it writes and even when done, readers retry if seq was odd or
+    changed while they copied the payload.
+    """
+
+    def __init__(self, name: str, size: int = 64 * 1024, create: bool = False):
+        self.name = name
+        self.create = create
+        if create:
+            try:
+                # stale segment left behind by a killed owner
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            _HEADER.pack_into(self._shm.buf, 0, 0, 0)
+        else:
+            # readers must not unlink the owner's segment when they exit
+            self._shm = attach_untracked(name)
+        self._seq = 0
+
+    @classmethod
+    def attach(cls, name: str, timeout_s: float = 10.0):
+        """Wait for the owner to create the segment, then attach to it."""
+        deadline = time.monotonic() + timeout_s
+        while True:
+            try:
+                return cls(name)
+            except FileNotFoundError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+
+    def write(self, doc: dict):
+        payload = json.dumps(doc, separators=(",", ":")).encode("utf-8")
+        buf = self._shm.buf
+        if _HEADER.size + len(payload) > len(buf):
+            raise ValueError(f"snapshot too large for {self.name}: {len(payload)} bytes")
+
+        self._seq += 1  # odd: write in progress
+        struct.pack_into("<Q", buf, 0, self._seq)
+        buf[_HEADER.size:_HEADER.size + len(payload)] = payload
+        struct.pack_into("<I", buf, 8, len(payload))
+        self._seq += 1  # even: consistent
+        struct.pack_into("<Q", buf, 0, self._seq)
+
+    def read(self, retries: int = 100):
+        """Latest document, or None if nothing has been published yet."""
+        buf = self._shm.buf
+        for _ in range(retries):
+            seq, length = _HEADER.unpack_from(buf, 0)
+            if seq == 0:
+                return None
+            if seq & 1:
+                continue
+            payload = bytes(buf[_HEADER.size:_HEADER.size + length])
+            if struct.unpack_from("<Q", buf, 0)[0] == seq:
+                return json.loads(payload)
+        return None
+
+    def close(self):
+        self._shm.close()
+        if self.create:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SharedFillReader:
+    """Same interface as FillSubscriber, backed by the owner's snapshot."""
+
+    def __init__(self, snapshot: SharedSnapshot):
+        self._snapshot = snapshot
+        self.packets = 0
+
+    def latest(self, max_age_s: float):
+        doc = self._snapshot.read()
+        if not doc or doc.get("fill") is None:
+            return None
+        self.packets = doc.get("fill_packets", 0)
+        if time.time() - doc["fill_at"] > max_age_s:
+            return None
+        return doc["fill"]
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class SharedForecastReader:
+    """
+    Same forecast interface as FillForecaster, answered from the owner's
+    forecast snapshot (its export(), loaded into a local forecaster that
+    holds the settings).
+    """
+
+    def __init__(self, snapshot: SharedSnapshot, forecaster):
+        self._snapshot = snapshot
+        self._forecaster = forecaster
+
+    def _refresh(self):
+        doc = self._snapshot.read()
+        if doc is not None:
+            self._forecaster.load(doc)
+
+    def forecast(self, bin_id, now=None):
+        self._refresh()
+        return self._forecaster.forecast(bin_id, now)
+
+    def forecasts(self, now=None):
+        self._refresh()
+        return self._forecaster.forecasts(now)
+
+
+def snapshot_name(port: int) -> str:
+    return f"trashcam_{port}_{os.getuid() if hasattr(os, 'getuid') else 0}"
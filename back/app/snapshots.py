@@ -0,0 +1,84 @@
+# backend/app/snapshots.py
+"""
+JPEG evidence for logged events, shared between the vision process (writer)
+and the API (reader) through a directory on disk.
+
+Crops are stored content-addressed as objects/<aa>/<sha256>.jpg, so the
+same image is kept once and its URL content never changes. index.log maps
+event ids to hashes, one "event_id sha256" line per event, appended with
+O_APPEND like the csv. The store is capped at max_bytes: the writer
+(snapshot_writer.py) evicts the least recently used objects, where "used"
+is the file mtime - the API touches an object each time it serves it, so
+an object someone looked at survives longer than one nobody did. Index
+lines for evicted objects answer 404 until the writer compacts the log
+(replacing the file), after which the API forgets them.
+
+This module is imported by the vision scripts too, so it must not pull in
+FastAPI or app settings.
+"""
+import os
+from pathlib import Path
+from threading import Lock
+
+
+def default_snapshot_dir() -> Path:
+    path = os.getenv("SNAPSHOT_DIR", "")
+    return Path(path) if path else Path(__file__).resolve().parents[1] / "snapshots"
+
+
+def object_path(root: Path, digest: str) -> Path:
+    return root / "objects" / digest[:2] / f"{digest}.jpg"
+
+
+class SnapshotIndex:
+    """
+    API side: event id -> snapshot file, by tailing index.log the same way
+    EventStore tails the csv.
+    """
+
+    def __init__(self, root: Path = None):
+        self.root = Path(root or default_snapshot_dir())
+        self.index_path = self.root / "index.log"
+        self._lock = Lock()
+        self._digests = {}
+        self._inode = None
+        self._offset = 0
+
+    def lookup(self, event_id: str):
+        """(path, digest) of the event's snapshot, or None if there isn't one (any more)."""
+        self._refresh()
+        with self._lock:
+            digest = self._digests.get(event_id)
+        if digest is None:
+            return None
+        path = object_path(self.root, digest)
+        try:
+            os.utime(path)  # mark as used for the writer's LRU
+        except FileNotFoundError:
+            with self._lock:
+                if self._digests.get(event_id) == digest:
+                    del self._digests[event_id]  # evicted
+            return None
+        return path, digest
+
+    def _refresh(self):
+        with self._lock:
+            try:
+                st = self.index_path.stat()
+            except FileNotFoundError:
+                return
+            if st.st_ino != self._inode or st.st_size < self._offset:
+                self._digests.clear()
+                self._inode = st.st_ino
+                self._offset = 0
+            if st.st_size == self._offset:
+                return
+            with self.index_path.open("rb") as f:
+                f.seek(self._offset)
+                chunk = f.read(st.st_size - self._offset)
+            end = chunk.rfind(b"\n") + 1
+            self._offset += end
+            for line in chunk[:end].decode("ascii", errors="replace").splitlines():
+                event_id, _, digest = line.partition(" ")
+                if digest:
+                    self._digests[event_id] = digest
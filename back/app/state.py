@@ -0,0 +1,169 @@
+# backend/app/state.py
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from threading import Event, Lock, Thread
+
+from fastapi import Depends, Request
+
+from .cache import ResponseCache
+from .config import settings
+from .eventbus import EventSubscriber
+from .fill_subscriber import FillSubscriber
+from .forecast import FillForecaster
+from .ingest import IngestLog
+from .snapshots import SnapshotIndex
+from .shared import (
+    SharedFillReader, SharedForecastReader, SharedSnapshot, claim_ingest_owner, snapshot_name,
+)
+from .store import EventStore, get_current_csv_path
+from .videofeed import VideoHub, default_clip_dir
+
+
+# forecasts of a few thousand bins (~200 bytes each as JSON)
+FORECAST_SNAPSHOT_BYTES = 1024 * 1024
+
+
+class Metrics:
+    """Thread-safe named counters (sync routes run in the threadpool)."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = Lock()
+
+    def incr(self, name: str, n: int = 1):
+        with self._lock:
+            self._counts[name] += n
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+class AppState:
+    """
+    Everything the routers share, created once per process by the lifespan.
+
+    With settings.WORKERS > 1 exactly one worker (whoever wins the lock
+    file) owns ingestion: it tails current.csv, holds the UDP subscription
+    and the video socket, and publishes a snapshot to shared memory. The
+    other workers read that snapshot lock-free and only re-tail the csv
+    when its version moved; their video routes relay through the owner. Fill forecasts go in a second, bigger segment
+    published less often, read only by the forecast routes.
+    """
+
+    def __init__(self):
+        self.forecast = FillForecaster(
+            local_bin=settings.LOCAL_BIN_ID,
+            half_life_s=settings.FORECAST_HALF_LIFE_S,
+            rate_half_life_s=settings.FORECAST_RATE_HALF_LIFE_S,
+            item_half_life_s=settings.FORECAST_ITEM_HALF_LIFE_S,
+            detection_weight=settings.FORECAST_DETECTION_WEIGHT,
+            empty_drop=settings.FORECAST_EMPTY_DROP,
+            full_percent=settings.FORECAST_FULL_PERCENT,
+        )
+        self.events = EventStore(get_current_csv_path(), on_add=self.forecast.observe_row)
+        self.fill = FillSubscriber(
+            settings.UDP_SERVER_HOST, settings.UDP_SERVER_PORT, on_reading=self.forecast.add_reading,
+        )
+        self.bus = EventSubscriber(self.events.push_live, settings.EVENT_BUS_PATH)
+        self.ingest = IngestLog(self.events.path)
+        self.snapshots = SnapshotIndex(settings.SNAPSHOT_DIR or None)
+        self.video = VideoHub(settings.VIDEO_SOCKET_PATH, settings.VIDEO_MAX_FPS)
+        self.clip_dir = Path(settings.CLIP_DIR or default_clip_dir())
+        self.cache = ResponseCache()
+        self.metrics = Metrics()
+        self.is_owner = True
+        self._owner_lock = None
+        self._shared = None
+        self._shared_forecast = None
+        self._stop = Event()
+        self._publisher = None
+
+    def start(self):
+        # warm: load current.csv into memory before the first poll arrives
+        self.events.refresh()
+
+        if settings.WORKERS > 1:
+            lock_path = Path(tempfile.gettempdir()) / f"trashcam_{settings.PORT}.lock"
+            self._owner_lock = claim_ingest_owner(lock_path)
+            self.is_owner = self._owner_lock is not None
+            name = snapshot_name(settings.PORT)
+            if self.is_owner:
+                self._shared = SharedSnapshot(name, create=True)
+                self._shared_forecast = SharedSnapshot(f"{name}_forecast", size=FORECAST_SNAPSHOT_BYTES, create=True)
+                self._publisher = Thread(target=self._publish_loop, name="ingest-publisher", daemon=True)
+                self._publisher.start()
+            else:
+                self._shared = SharedSnapshot.attach(name)
+                self._shared_forecast = SharedSnapshot.attach(f"{name}_forecast")
+                self.fill = SharedFillReader(self._shared)
+                self.events.on_add = None  # the owner's estimates include every row
+                self.forecast = SharedForecastReader(self._shared_forecast, self.forecast)
+
+        if self.is_owner and settings.FILL_SUBSCRIBE:
+            self.fill.start()
+        if self.is_owner and settings.EVENT_BUS:
+            self.bus.start()
+        if settings.VIDEO_FEED:
+            if self.is_owner:
+                self.video.start()
+            else:
+                self.video.start_relay()  # frames and clips via the owner's hub
+        role = "owner" if self.is_owner else "reader"
+        print(f"[state] Loaded {len(self.events)} events from {self.events.path.name} ({role})")
+
+    def stop(self):
+        self._stop.set()
+        if self._publisher is not None:
+            self._publisher.join(timeout=2.0)
+        self.fill.stop()
+        self.bus.stop()
+        self.video.stop()
+        self.cache.clear()
+        if self._shared is not None:
+            self._shared.close()
+        if self._shared_forecast is not None:
+            self._shared_forecast.close()
+        if self._owner_lock is not None:
+            self._owner_lock.close()
+
+    def sync_events(self):
+        """Bring the in-memory event store up to date before answering."""
+        if self.is_owner:
+            self.events.refresh()
+            return
+        doc = self._shared.read()
+        # only the owner gets bus events, so compare the csv alone
+        if doc is None or doc["events_csv"] != self.events.csv_version:
+            self.events.refresh()
+
+    def _publish_loop(self):
+        last_forecast = 0.0
+        while not self._stop.wait(settings.INGEST_PUBLISH_INTERVAL_S):
+            self.events.refresh()
+            now = time.monotonic()
+            if now - last_forecast >= settings.FORECAST_PUBLISH_INTERVAL_S:
+                last_forecast = now
+                try:
+                    self._shared_forecast.write(self.forecast.export())
+                except ValueError as e:
+                    print(f"[state] Forecasts not shared: {e}")
+            fill, fill_at = self.fill.reading()
+            self._shared.write({
+                "events_csv": self.events.csv_version,
+                "events": len(self.events),
+                "counts": self.events.counts(),
+                "fill": fill,
+                "fill_at": fill_at,
+                "fill_packets": self.fill.packets,
+            })
+
+
+def get_state(request: Request) -> AppState:
+    return request.app.state.trashcam
+
+
+def get_fill_subscriber(state: AppState = Depends(get_state)) -> FillSubscriber:
+    return state.fill
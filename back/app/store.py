@@ -0,0 +1,263 @@
+# backend/app/store.py
+import csv
+import io
+import os
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+
+
+def get_current_csv_path() -> Path:
+    # EVENTS_CSV points the API elsewhere (the simulator's load test uses a temp file)
+    path = os.getenv("EVENTS_CSV", "")
+    if path:
+        return Path(path)
+    # This resolves to: RCOS/back/current.csv
+    return Path(__file__).resolve().parents[1] / "current.csv"
+
+
+# The one layout of current.csv, for every writer (the vision scripts and
+# /events/batch): timestamp in epoch seconds, node_id empty for the local bin.
+CSV_FIELDS = ["timestamp", "location", "item", "classification", "event_id", "node_id"]
+
+
+def event_epoch(raw):
+    """Epoch seconds of a timestamp written as epoch seconds or ISO 8601; None if unreadable."""
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(raw).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def to_csv_row(event: dict, node_id: str = "") -> dict:
+    """An event under any of the writers' column names, as a CSV_FIELDS row."""
+    raw = event.get("timestamp") or event.get("time") or event.get("ts")
+    epoch = event_epoch(raw)
+    if epoch is None and not raw:
+        epoch = time.time()
+    return {
+        "timestamp": repr(epoch) if epoch is not None else raw,
+        "location": event.get("location") or event.get("TopCornerOfBoundary") or "",
+        "item": event.get("item") or event.get("label") or event.get("object") or "",
+        "classification": event.get("classification") or event.get("class") or "",
+        "event_id": event.get("event_id") or "",
+        "node_id": node_id or event.get("node_id") or "",
+    }
+
+
+def prepare_csv(path) -> str:
+    """
+    Rewrite `path` in CSV_FIELDS if it has an older header, so appends never
+    mix layouts and no history is lost. The original is kept next to it;
+    returns that backup's path, or "" if the file was left alone.
+    """
+    try:
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            header = next(csv.reader(f), None)
+    except FileNotFoundError:
+        return ""
+    if header is None or header == CSV_FIELDS:
+        return ""
+    backup = f"{path}.{datetime.now():%Y%m%d-%H%M%S}.bak"
+    os.replace(path, backup)
+    tmp = f"{path}.tmp"
+    with open(backup, "r", newline="", encoding="utf-8") as src, \
+            open(tmp, "w", newline="", encoding="utf-8") as dst:
+        writer = csv.DictWriter(dst, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for row in csv.DictReader(src):
+            writer.writerow(to_csv_row(row))
+    os.replace(tmp, path)
+    return backup
+
+
+def normalize_row(row: dict):
+    """Map whatever columns the vision scripts wrote onto the dashboard shape."""
+    if not row:
+        return None
+
+    # --- timestamp handling ---
+    raw_ts = (
+        row.get("timestamp")
+        or row.get("time")
+        or row.get("ts")
+        or ""
+    )
+
+    ts = raw_ts
+    epoch = event_epoch(raw_ts) if raw_ts else None
+    if epoch is not None:
+        ts = datetime.fromtimestamp(epoch).strftime("%H:%M:%S")
+    # else leave as-is if format is weird
+
+    # --- item name ---
+    item = (
+        row.get("item")
+        or row.get("label")
+        or row.get("object")
+        or ""
+    )
+
+    # --- class/category label ---
+    cls = (
+        row.get("classification")
+        or row.get("category")
+        or row.get("coarse_type")
+        or row.get("type")
+        or row.get("class")
+        or ""
+    )
+
+    return {
+        "timestamp": ts,
+        "item": item,
+        "classification": cls,
+    }
+
+
+class EventStore:
+    """
+    In-memory copy of current.csv, kept up to date by tailing the file.
+
+    refresh() only stat()s the file and parses bytes appended since the
+    last call, so requests are answered from memory. The ETag (csv inode +
+    row count) changes exactly when rows are added, and is the same on
+    every API worker holding the same rows - whether they came from the
+    bus or the csv - so polling clients get 304s whichever worker answers.
+    csv_version (inode + byte offset) tracks the file alone, for workers
+    that only tail it.
+
+    push_live() applies an event from the bus before it reaches the csv;
+    when the same event_id is later tailed from disk it is skipped.
+    on_add(row), if set, sees each new row once (the fill forecaster).
+    """
+
+    def __init__(self, path: Path, on_add=None):
+        self.path = path
+        self.on_add = on_add
+        self._lock = Lock()
+        self._announced = set()
+        self._inode = None
+        self._reset(None)
+
+    def _reset(self, inode):
+        # live rows re-read once the csv first appears are not new to on_add
+        if self._inode is not None:
+            self._announced = set()
+        self._rows = []
+        self._counts = Counter()
+        self._ids = set()
+        self._live = 0
+        self._fieldnames = None
+        self._inode = inode
+        self._offset = 0
+        self._mtime = 0.0
+
+    def refresh(self):
+        with self._lock:
+            try:
+                st = self.path.stat()
+            except FileNotFoundError:
+                if self._inode is not None:
+                    self._reset(None)
+                return
+
+            # replaced (clearData) or truncated -> start over
+            if st.st_ino != self._inode or st.st_size < self._offset:
+                self._reset(st.st_ino)
+
+            if st.st_size == self._offset:
+                return
+
+            with self.path.open("rb") as f:
+                f.seek(self._offset)
+                chunk = f.read(st.st_size - self._offset)
+
+            # only consume complete lines; a half-written row waits
+            end = chunk.rfind(b"\n") + 1
+            if end == 0:
+                return
+            self._offset += end
+            self._mtime = st.st_mtime
+            self._parse(chunk[:end].decode("utf-8", errors="replace"))
+
+    def _parse(self, text: str):
+        lines = io.StringIO(text, newline="")
+        if self._fieldnames is None:
+            self._fieldnames = next(csv.reader(lines), None)
+        for row in csv.DictReader(lines, fieldnames=self._fieldnames):
+            self._add(row)
+
+    def _add(self, row: dict) -> bool:
+        event_id = row.get("event_id")
+        if event_id:
+            if event_id in self._ids:
+                return False
+            self._ids.add(event_id)
+        entry = normalize_row(row)
+        if entry is None:
+            return False
+        self._rows.append(entry)
+        self._counts[entry["classification"]] += 1
+        if self.on_add is not None and (not event_id or event_id not in self._announced):
+            if event_id:
+                self._announced.add(event_id)
+            self.on_add(row)
+        return True
+
+    def push_live(self, event: dict):
+        """Apply an event published on the bus ahead of its csv row."""
+        with self._lock:
+            if self._add(event):
+                self._live += 1
+                self._mtime = time.time()
+
+    @property
+    def exists(self) -> bool:
+        return self._inode is not None or bool(self._rows)
+
+    @property
+    def etag(self) -> str:
+        # weak ETag: the compression middleware may change the bytes on the wire
+        return f'W/"{self._inode or 0:x}-{len(self._rows):x}"'
+
+    @property
+    def csv_version(self) -> str:
+        return f"{self._inode or 0:x}-{self._offset:x}"
+
+    @property
+    def last_modified(self) -> float:
+        return self._mtime
+
+    def version(self):
+        """(etag, last_modified) as of the last refresh()."""
+        with self._lock:
+            return self.etag, self.last_modified
+
+    def rows(self, start: int = 0, end=None):
+        with self._lock:
+            # rows are only ever appended, so a slice is a consistent snapshot
+            return self._rows[start:end]
+
+    def counts(self) -> dict:
+        """Items per classification, maintained incrementally while tailing."""
+        with self._lock:
+            return dict(self._counts)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def clear(self):
+        """Empty current.csv on disk and in memory."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.exists():
+                self.path.unlink()
+            self.path.touch()
+            self._reset(os.stat(self.path).st_ino)
@@ -0,0 +1,399 @@
+# backend/app/videofeed.py
+"""
+Live annotated video from the vision process, fanned out to browsers.
+
+The vision process (video_publisher.py) connects to a Unix stream socket
+the API binds, names its camera, and sends JPEG frames - but only while the
+API says somebody is watching, and no faster than the API's frame cap. The
+API wraps each frame into its multipart chunk once and hands that same
+bytes object to every /video/{camera} viewer, so the vision process does
+one encode per frame however many viewers there are. A viewer that can't
+keep up simply skips to the newest frame when it is ready again.
+
+The same control connection carries clip requests the other way: the API
+asks for a clip, the vision process's DVR (dvr.py) writes it to the clip
+directory, and the API serves the file from there.
+
+With several workers only the ingestion owner binds the video socket; it
+also binds <socket>.relay, where the other workers subscribe to a camera
+while their own viewers watch (receiving the same length-prefixed JPEGs
+and sending back their viewer count), ask for clips and list cameras.
+
+This module is imported by the vision scripts too, so it must not pull in
+FastAPI or app settings.
+"""
+import asyncio
+import json
+import os
+import socket
+import struct
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from threading import Event, Lock, Thread
+
+HAS_UNIX_STREAM = hasattr(socket, "AF_UNIX") and os.name != "nt"
+
+BOUNDARY = "frame"
+# vision -> API: one JSON hello line, then length-prefixed JPEGs
+FRAME_HEADER = struct.Struct("!I")
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+
+def default_video_path() -> str:
+    return os.getenv(
+        "VIDEO_SOCKET_PATH",
+        os.path.join(tempfile.gettempdir(), "trashcam_video.sock"),
+    )
+
+
+def default_clip_dir() -> Path:
+    path = os.getenv("CLIP_DIR", "")
+    return Path(path) if path else Path(__file__).resolve().parents[1] / "clips"
+
+
+def clip_path(root: Path, clip_id: str) -> Path:
+    return Path(root) / f"{clip_id}.mjpeg"
+
+
+def multipart_chunk(jpeg: bytes) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode("ascii")
+        + jpeg + b"\r\n"
+    )
+
+
+class _Camera:
+    def __init__(self):
+        self.seq = 0
+        self.chunk = None
+        self.jpeg = None
+        self.frames = 0
+        self.source = None       # socket of the connected vision process (or relay)
+        self.waiters = set()     # (event loop, asyncio.Event) per viewer
+        self.relays = {}         # owner: relay socket -> [viewers, threading.Event]
+        self.relaying = False    # reader: a thread is subscribed to the owner
+
+    def viewers(self):
+        return len(self.waiters) + sum(viewers for viewers, _ in self.relays.values())
+
+
+class VideoHub:
+    """
+    Binds the video socket in the API and fans frames out to viewers.
+    start() in the ingestion owner; start_relay() in the other workers,
+    which then get their frames, clips and camera list from the owner.
+    """
+
+    def __init__(self, path: str = None, max_fps: float = 10.0):
+        self.path = path or default_video_path()
+        self.relay_path = f"{self.path}.relay"
+        self.max_fps = max_fps
+        self._cameras = {}
+        self._lock = Lock()
+        self._sock = None
+        self._relay_sock = None
+        self._threads = []
+        self._relay = False
+
+    @property
+    def running(self) -> bool:
+        return self._sock is not None or self._relay
+
+    def start(self):
+        if not HAS_UNIX_STREAM or self._threads:
+            return
+        self._sock = self._listen(self.path)
+        self._relay_sock = self._listen(self.relay_path)
+        self._threads = [
+            Thread(target=self._accept, args=(self._sock, self._serve), name="video-hub", daemon=True),
+            Thread(target=self._accept, args=(self._relay_sock, self._serve_relay), name="video-relay", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def start_relay(self):
+        """Serve viewers from the owner worker's hub instead of binding the socket."""
+        if HAS_UNIX_STREAM:
+            self._relay = True
+
+    def stop(self):
+        self._relay = False
+        for sock in (self._sock, self._relay_sock):
+            if sock is not None:
+                sock.close()
+        self._sock = self._relay_sock = None
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        self._threads = []
+        with self._lock:
+            for cam in self._cameras.values():
+                if cam.source is not None:
+                    cam.source.close()
+                for relay in cam.relays:
+                    relay.close()
+        for path in (self.path, self.relay_path):
+            try:
+                os.unlink(path)
+            except (FileNotFoundError, OSError):
+                pass
+
+    def cameras(self) -> dict:
+        if self._relay:
+            try:
+                return self._relay_call({"cameras": True})
+            except (OSError, ValueError):
+                return {}
+        with self._lock:
+            return {
+                name: {"connected": cam.source is not None, "viewers": cam.viewers(), "frames": cam.frames}
+                for name, cam in self._cameras.items()
+            }
+
+    def request_clip(self, camera: str, pre_s: float, post_s: float):
+        """Ask the camera's vision process for a clip around now; its id, or None if not connected."""
+        if self._relay:
+            try:
+                reply = self._relay_call({"clip": {"camera": camera, "pre_s": pre_s, "post_s": post_s}})
+            except (OSError, ValueError):
+                return None
+            return reply.get("clip_id")
+        clip_id = uuid.uuid4().hex
+        with self._lock:
+            cam = self._cameras.get(camera)
+            if cam is None or cam.source is None:
+                return None
+            message = json.dumps({"clip": {"id": clip_id, "pre_s": pre_s, "post_s": post_s}}) + "\n"
+            try:
+                cam.source.sendall(message.encode("utf-8"))
+            except OSError:
+                return None
+        return clip_id
+
+    async def stream(self, camera: str):
+        """Multipart chunks for one viewer: always the newest frame, never a backlog."""
+        loop = asyncio.get_running_loop()
+        waiter = (loop, asyncio.Event())
+        with self._lock:
+            cam = self._camera(camera)
+            cam.waiters.add(waiter)
+            self._send_control(cam)
+        try:
+            seen = 0
+            while True:
+                if cam.seq == seen:
+                    waiter[1].clear()
+                    if cam.seq == seen:
+                        await waiter[1].wait()
+                    continue
+                with self._lock:
+                    seen, chunk = cam.seq, cam.chunk
+                yield chunk
+        finally:
+            with self._lock:
+                cam.waiters.discard(waiter)
+                self._send_control(cam)
+
+    # ---------- vision side ----------
+
+    def _camera(self, name):
+        cam = self._cameras.get(name)
+        if cam is None:
+            cam = self._cameras[name] = _Camera()
+        return cam
+
+    def _send_control(self, cam):
+        """Tell the vision process (or owner) how many are watching (caller holds the lock)."""
+        if self._relay and cam.waiters and not cam.relaying:
+            cam.relaying = True
+            name = next(name for name, c in self._cameras.items() if c is cam)
+            Thread(target=self._watch_owner, args=(name, cam), name="video-relay", daemon=True).start()
+        if cam.source is None:
+            return
+        if self._relay and not cam.waiters:
+            try:
+                cam.source.shutdown(socket.SHUT_RDWR)  # last viewer left: unsubscribe
+            except OSError:
+                pass
+            return
+        message = json.dumps({"viewers": cam.viewers(), "max_fps": self.max_fps}) + "\n"
+        try:
+            cam.source.sendall(message.encode("utf-8"))
+        except OSError:
+            pass  # the reader thread notices the broken connection
+
+    @staticmethod
+    def _listen(path):
+        try:
+            os.unlink(path)  # stale socket from a previous run
+        except FileNotFoundError:
+            pass
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(path)
+        sock.listen(8)
+        sock.settimeout(1.0)
+        return sock
+
+    def _accept(self, sock, handler):
+        while self._sock is not None:
+            try:
+                conn, _ = sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            Thread(target=handler, args=(conn,), name="video-source", daemon=True).start()
+
+    def _serve(self, conn):
+        conn.settimeout(None)
+        reader = conn.makefile("rb")
+        cam = None
+        try:
+            hello = json.loads(reader.readline() or b"{}")
+            name = str(hello.get("camera") or "default")
+            with self._lock:
+                cam = self._camera(name)
+                if cam.source is not None:
+                    cam.source.close()  # a restarted vision process replaces the old one
+                cam.source = conn
+                self._send_control(cam)
+            print(f"[video] Camera '{name}' connected")
+            self._read_frames(cam, reader)
+        except (OSError, ValueError):
+            pass
+        finally:
+            if cam is not None:
+                with self._lock:
+                    if cam.source is conn:
+                        cam.source = None
+            reader.close()
+            conn.close()
+
+    def _read_frames(self, cam, reader):
+        """Length-prefixed JPEGs from a vision process (or the owner) until EOF."""
+        while True:
+            prefix = reader.read(FRAME_HEADER.size)
+            if len(prefix) < FRAME_HEADER.size:
+                return
+            (size,) = FRAME_HEADER.unpack(prefix)
+            if size > MAX_FRAME_BYTES:
+                return
+            jpeg = reader.read(size)
+            if len(jpeg) < size:
+                return
+            chunk = multipart_chunk(jpeg)
+            with self._lock:
+                cam.seq += 1
+                cam.frames += 1
+                cam.chunk = chunk
+                cam.jpeg = jpeg
+                waiters = list(cam.waiters)
+                relays = [event for _, event in cam.relays.values()]
+            for loop, event in waiters:
+                try:
+                    loop.call_soon_threadsafe(event.set)
+                except RuntimeError:
+                    pass  # loop already closed (API shutting down)
+            for event in relays:
+                event.set()
+
+    # ---------- owner side of the relay ----------
+
+    def _serve_relay(self, conn):
+        conn.settimeout(None)
+        reader = conn.makefile("rb")
+        try:
+            hello = json.loads(reader.readline() or b"{}")
+            if "watch" in hello:
+                self._serve_watcher(str(hello["watch"]), conn, reader)
+                return
+            if "clip" in hello:
+                clip = hello["clip"]
+                reply = {"clip_id": self.request_clip(str(clip["camera"]), float(clip["pre_s"]), float(clip["post_s"]))}
+            else:
+                reply = self.cameras()
+            conn.sendall((json.dumps(reply) + "\n").encode("utf-8"))
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        finally:
+            reader.close()
+            conn.close()
+
+    def _serve_watcher(self, name, conn, reader):
+        """One worker's viewers of a camera: send it every frame, newest first."""
+        event = Event()
+        with self._lock:
+            cam = self._camera(name)
+            cam.relays[conn] = [0, event]
+        sender = Thread(target=self._send_frames, args=(cam, conn, event), name="video-relay-send", daemon=True)
+        sender.start()
+        try:
+            for line in reader:
+                viewers = int(json.loads(line).get("viewers", 0))
+                with self._lock:
+                    cam.relays[conn][0] = viewers
+                    self._send_control(cam)
+        finally:
+            with self._lock:
+                cam.relays.pop(conn, None)
+                self._send_control(cam)
+            event.set()
+            sender.join(timeout=2.0)
+
+    def _send_frames(self, cam, conn, event):
+        seen = 0
+        while True:
+            event.wait()
+            event.clear()
+            with self._lock:
+                if conn not in cam.relays:
+                    return
+                seq, jpeg = cam.seq, cam.jpeg
+            if seq == seen or jpeg is None:
+                continue
+            seen = seq
+            try:
+                conn.sendall(FRAME_HEADER.pack(len(jpeg)) + jpeg)
+            except OSError:
+                return
+
+    # ---------- reader side of the relay ----------
+
+    def _relay_call(self, request):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(2.0)
+            sock.connect(self.relay_path)
+            sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+            with sock.makefile("rb") as reader:
+                return json.loads(reader.readline())
+
+    def _watch_owner(self, name, cam):
+        """Subscribe to the owner's frames for `name` while this worker has viewers."""
+        while True:
+            with self._lock:
+                if not cam.waiters or not self._relay:
+                    cam.relaying = False
+                    return
+            try:
+                conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                conn.connect(self.relay_path)
+            except OSError:
+                conn.close()
+                time.sleep(1.0)  # owner not up (yet): keep the viewers waiting
+                continue
+            reader = conn.makefile("rb")
+            try:
+                conn.sendall((json.dumps({"watch": name}) + "\n").encode("utf-8"))
+                with self._lock:
+                    cam.source = conn
+                    self._send_control(cam)
+                self._read_frames(cam, reader)
+            except OSError:
+                pass
+            finally:
+                with self._lock:
+                    if cam.source is conn:
+                        cam.source = None
+                reader.close()
+                conn.close()
@@ -0,0 +1,121 @@
+"""
+Per-frame CPU inference latency under each cpu_profile.py profile.
+
+    cd back && python -m benchmarks.bench_cpu_profile [WEIGHTS] [FRAMES]
+
+Each profile runs in a fresh process (thread pools and affinity are
+process-wide and the inter-op pool can only be sized once). The model is
+loaded, optimized and warmed up as VisionBetter does it, then FRAMES
+frames of IMG_SIZE noise are timed one at a time. "setup s" is the
+optimize + warm-up cost paid before the stream opens, "first ms" the
+first real frame after it.
+
+WEIGHTS is an ultralytics checkpoint (e.g. yolov8m-worldv2.pt); without
+ultralytics or the file, a stand-in conv net with YOLOv8 backbone-like
+layers is used so the relative numbers can still be compared.
+"""
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import torch
+from torch import nn
+
+from cpu_profile import CpuProfile, apply_runtime, make_profile, optimize_model, warm_up
+
+IMG_SIZE = 640
+WARMUP_RUNS = 3
+
+
+def _block(c_in, c_out, stride):
+    return nn.Sequential(nn.Conv2d(c_in, c_out, 3, stride, 1, bias=False), nn.BatchNorm2d(c_out), nn.SiLU())
+
+
+class StandIn:
+    """Callable like an ultralytics model: numpy BGR frame in, output out; .model is the nn.Module."""
+
+    def __init__(self):
+        widths = [3, 32, 64, 128, 256, 512]
+        layers = []
+        for c_in, c_out in zip(widths, widths[1:]):
+            layers += [_block(c_in, c_out, 2), _block(c_out, c_out, 1)]
+        self.model = nn.Sequential(*layers).eval()
+
+    def __call__(self, frame, imgsz=IMG_SIZE, **_):
+        x = torch.from_numpy(frame).permute(2, 0, 1).unsqueeze(0).float().div_(255)
+        if x.shape[-1] != imgsz:
+            x = nn.functional.interpolate(x, size=(imgsz, imgsz))
+        return self.model(x)
+
+
+def load(weights):
+    if weights and os.path.exists(weights):
+        try:
+            from ultralytics import YOLO
+            return YOLO(weights), weights
+        except ImportError:
+            pass
+    return StandIn(), "stand-in conv net"
+
+
+def profiles():
+    cores = os.cpu_count() or 1
+    return [
+        make_profile("default", warmup_runs=0),
+        CpuProfile("threads", threads=cores, interop_threads=1, flush_denormal=True, warmup_runs=WARMUP_RUNS),
+        make_profile("tuned", warmup_runs=WARMUP_RUNS),
+        make_profile("compiled", warmup_runs=WARMUP_RUNS),
+    ]
+
+
+def run(index, weights, frames, out):
+    profile = profiles()[index]
+    applied = apply_runtime(profile)
+    model, label = load(weights)
+    blank = np.full((IMG_SIZE, IMG_SIZE, 3), 114, dtype=np.uint8)
+
+    def run_once(m, frame=blank):
+        with torch.inference_mode():
+            m(frame, verbose=False, imgsz=IMG_SIZE)
+
+    t0 = time.perf_counter()
+    applied.update(optimize_model(model, profile, run_once))
+    warm_up(model, run_once, profile.warmup_runs)
+    setup_s = time.perf_counter() - t0
+
+    rng = np.random.default_rng(0)
+    times = []
+    for _ in range(frames):
+        frame = rng.integers(0, 255, (IMG_SIZE, IMG_SIZE, 3), dtype=np.uint8)
+        t = time.perf_counter()
+        run_once(model, frame)
+        times.append((time.perf_counter() - t) * 1000)
+    out.put((label, applied, setup_s, times))
+
+
+def main():
+    weights = sys.argv[1] if len(sys.argv) > 1 else ""
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'profile':<10}{'setup s':>9}{'first ms':>10}{'median ms':>11}{'p95 ms':>8}{'fps':>7}  applied")
+    for i, profile in enumerate(profiles()):
+        out = ctx.Queue()
+        p = ctx.Process(target=run, args=(i, weights, frames, out))
+        p.start()
+        label, applied, setup_s, times = out.get()
+        p.join()
+        if i == 0:
+            print(f"# {label}, {IMG_SIZE}px, {frames} frames, torch {torch.__version__}, "
+                  f"{os.cpu_count()} CPUs")
+        median = statistics.median(times)
+        p95 = sorted(times)[int(len(times) * 0.95) - 1]
+        summary = ", ".join(f"{k}={v}" for k, v in applied.items() if k != "mkldnn")
+        print(f"{profile.name:<10}{setup_s:>9.1f}{times[0]:>10.0f}{median:>11.0f}{p95:>8.0f}"
+              f"{1000 / median:>7.1f}  {summary}")
+
+
+if __name__ == "__main__":
+    main()
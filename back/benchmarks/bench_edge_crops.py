@@ -0,0 +1,157 @@
+"""
+Full-stream mode vs edge pre-filter (split) mode, per bin.
+
+    cd back && python -m benchmarks.bench_edge_crops [BINS] [IDLE_FRAMES]
+
+Each bin replays the simulator's falling-item clip (60 frames of motion)
+followed by IDLE_FRAMES frames of the item lying still, like a bin that is
+mostly idle between deposits.
+
+Full stream: the server receives every 1280x720 JPEG, decodes it and
+resizes it to the model input. Split mode: each bin runs MotionCropper and
+sends crops through EdgeSender to a CropServer on localhost, whose
+"inference" is a stub that resizes the batch to CROP_IMG_SIZE. Reported:
+bytes over the wire, server CPU seconds (decode / pre-inference), edge
+motion cost and pixels handed to the model.
+
+Also checks that a restarted edge node (a new EdgeSender numbering its
+frames from 1 again) still gets every frame delivered.
+"""
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from crop_server import CropServer
+from edge_prefilter import EdgeSender, MotionCropper, encode_crops
+from postprocess import empty_detections
+from simulator.mjpeg_camera import synthetic_jpegs
+
+IMG_SIZE = 640
+CROP_IMG_SIZE = 320
+
+
+def letterbox_pixels(h, w, size):
+    scale = size / float(max(h, w))
+    return int(round(h * scale)), int(round(w * scale))
+
+
+def full_stream(clip, bins):
+    cpu = time.thread_time()
+    pixels = 0
+    for _ in range(bins):
+        for jpeg in clip:
+            frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+            h, w = letterbox_pixels(*frame.shape[:2], IMG_SIZE)
+            cv2.resize(frame, (w, h))
+            pixels += h * w
+    cpu = time.thread_time() - cpu
+    return sum(len(j) for j in clip), cpu / bins, pixels / bins
+
+
+def split_mode(clip, bins):
+    pixels = [0]
+    frames_done = [0]
+
+    def infer(crops, worker):
+        for crop in crops:
+            h, w = letterbox_pixels(*crop.shape[:2], CROP_IMG_SIZE)
+            cv2.resize(crop, (w, h))
+            pixels[0] += h * w
+        return [empty_detections() for _ in crops], {0: "item"}
+
+    def on_frame(bin_id, seq, dets, names, size):
+        frames_done[0] += 1
+
+    server = CropServer(infer, on_frame, host="127.0.0.1", port=0, batch_size=8)
+    server.start()
+
+    # edge side, done up front so its cost is measured on its own
+    decoded = [cv2.imdecode(np.frombuffer(j, np.uint8), cv2.IMREAD_COLOR) for j in clip]
+    edge_cpu = time.thread_time()
+    messages = []
+    cropper = MotionCropper()
+    for seq, frame in enumerate(decoded, 1):
+        regions = cropper.regions(frame)
+        if regions:
+            messages.append((seq, frame.shape, encode_crops(frame, regions)))
+    edge_cpu = time.thread_time() - edge_cpu
+
+    senders = [EdgeSender("127.0.0.1", server.port, max_queue=len(messages) + 1) for _ in range(bins)]
+    for b, sender in enumerate(senders):
+        for seq, shape, crops in messages:
+            sender.send(f"bin-{b}", seq, shape, crops)
+    expected = len(messages) * bins
+    deadline = time.monotonic() + 60
+    while frames_done[0] < expected and time.monotonic() < deadline:
+        time.sleep(0.01)
+    for sender in senders:
+        sender.close()
+    server.stop()
+
+    stats = server.stats()
+    per_bin = [stats[f"bin-{b}"] for b in range(bins)]
+    wire = sum(sender.bytes_sent for sender in senders) / bins
+    return {
+        "messages": len(messages),
+        "crops": sum(s["crops"] for s in per_bin) / bins,
+        "wire_bytes": wire,
+        "decode_cpu": sum(s["decode_cpu_s"] for s in per_bin) / bins,
+        "infer_cpu": sum(s["infer_cpu_s"] for s in per_bin) / bins,
+        "edge_ms": edge_cpu * 1000 / len(clip),
+        "pixels": pixels[0] / bins,
+    }
+
+
+def edge_restart(frames=20):
+    delivered = []
+
+    def infer(crops, worker):
+        return [empty_detections() for _ in crops], {0: "item"}
+
+    def on_frame(bin_id, seq, dets, names, size):
+        delivered.append(seq)
+
+    server = CropServer(infer, on_frame, host="127.0.0.1", port=0)
+    server.start()
+    crop = encode_crops(np.zeros((64, 64, 3), np.uint8), [(0, 0, 32, 32)])
+    for run in range(2):
+        sender = EdgeSender("127.0.0.1", server.port, max_queue=frames + 1)
+        sender.epoch += run  # two starts within the same millisecond still differ
+        for seq in range(1, frames + 1):
+            sender.send("bin-0", seq, (64, 64, 3), crop)
+        deadline = time.monotonic() + 10
+        while len(delivered) < frames * (run + 1) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        sender.close()
+    server.stop()
+    return len(delivered), frames * 2
+
+
+def main():
+    bins = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    idle = int(sys.argv[2]) if len(sys.argv) > 2 else 240
+    moving = synthetic_jpegs(n=60)
+    clip = moving + [moving[-1]] * idle
+    n = len(clip)
+
+    full_bytes, full_cpu, full_pixels = full_stream(clip, bins)
+    split = split_mode(clip, bins)
+
+    print(f"{bins} bins, {n} frames each ({len(moving)} with motion)\n")
+    print(f"{'per bin':<26}{'full stream':>14}{'split mode':>14}")
+    print(f"{'frames sent':<26}{n:>14}{split['messages']:>14}")
+    print(f"{'bytes sent (MB)':<26}{full_bytes / 1e6:>14.2f}{split['wire_bytes'] / 1e6:>14.2f}")
+    print(f"{'server decode+prep CPU s':<26}{full_cpu:>14.3f}{split['decode_cpu'] + split['infer_cpu']:>14.3f}")
+    print(f"{'model input Mpx':<26}{full_pixels / 1e6:>14.2f}{split['pixels'] / 1e6:>14.2f}")
+    print(f"\nedge motion + crop encode: {split['edge_ms']:.2f} ms/frame, "
+          f"{split['crops'] / max(1, split['messages']):.2f} crops per sent frame")
+
+    delivered, sent = edge_restart()
+    print(f"edge node restarted mid-run: {delivered}/{sent} frames delivered")
+    assert delivered == sent
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Rows/s and memory of the streaming /export.
+
+    cd back && python -m benchmarks.bench_export [ROWS]
+
+Writes a csv of ROWS events (mixed epoch / ISO timestamps, two bins),
+then streams it through the real endpoint on uvicorn in this process for
+each format, reading and discarding the body. RSS is sampled every 50 ms:
+"peak +MB" is how far it rose above the level before the request.
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI
+
+from app.export import HAS_PARQUET
+from app.routers import export
+from app.state import Metrics
+from app.store import EventStore
+
+PORT = 8766
+
+
+class BenchState:
+    def __init__(self, csv_path):
+        self.events = EventStore(csv_path)
+        self.metrics = Metrics()
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class RssSampler:
+    def __init__(self):
+        self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(0.05):
+            self.peak = max(self.peak, rss_mb())
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.peak
+
+
+def write_csv(path, n):
+    items = [("soda can", "recycling"), ("plate", "trash"), ("banana", "compost"), ("pen", "trash")]
+    t0 = time.time() - n
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "TopCornerOfBoundary", "item", "class", "event_id", "node_id"])
+        for i in range(n):
+            item, cls = random.choice(items)
+            ts = t0 + i
+            stamp = datetime.fromtimestamp(ts).isoformat() if i % 2 else f"{ts:.6f}"
+            writer.writerow([stamp, f"{i % 640},{i % 480}", item, cls, f"{i:032x}", "" if i % 3 else "bin-2"])
+
+
+def fetch(url):
+    total = 0
+    with urllib.request.urlopen(url) as resp:
+        while True:
+            chunk = resp.read(1 << 16)
+            if not chunk:
+                return total
+            total += len(chunk)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    tmp = Path(tempfile.mkdtemp())
+    path = tmp / "current.csv"
+    write_csv(path, n)
+    print(f"{n:,} rows, {os.path.getsize(path) / 1e6:.0f} MB csv\n")
+
+    app = FastAPI()
+    app.include_router(export.router)
+    app.state.trashcam = BenchState(path)
+    server = uvicorn.Server(uvicorn.Config(app, port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    cases = [("csv", ""), ("csv", "&gzip=true"), ("ndjson", ""), ("csv", "&bin=bin-2&classification=trash")]
+    if HAS_PARQUET:
+        cases.append(("parquet", ""))
+    print(f"{'query':<44}{'rows/s':>12}{'MB out':>10}{'peak +MB':>10}")
+    for fmt, extra in cases:
+        query = f"format={fmt}{extra}"
+        base = rss_mb()
+        sampler = RssSampler()
+        t0 = time.perf_counter()
+        size = fetch(f"http://127.0.0.1:{PORT}/export/?{query}")
+        elapsed = time.perf_counter() - t0
+        peak = sampler.stop()
+        print(f"{query:<44}{n / elapsed:>12,.0f}{size / 1e6:>10.1f}{peak - base:>10.1f}")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
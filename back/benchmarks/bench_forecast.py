@@ -0,0 +1,110 @@
+"""
+Accuracy and cost of the online fill forecasts (app/forecast.py).
+
+    cd back && python -m benchmarks.bench_forecast [BINS]
+
+Accuracy: one simulated bin, a reading every 2 s with sensor noise and
+items arriving as a Poisson process that each add a fixed share of fill.
+After 2 h the item rate doubles (a rush). Time-to-full is compared with
+the truth for readings only (detection weight 0), the default blend, and
+a lifetime-average item rate (items so far / time so far, with the true
+fill per item and level - the best a lifetime average can do).
+
+Cost: BINS bins fed an hour of readings and items, then every bin
+forecast; against a refit of the last hour of readings per bin (what a
+per-request recomputation over history would do).
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from app.forecast import FillForecaster
+
+READING_EVERY_S = 2.0
+NOISE = 0.8
+PER_ITEM = 0.4            # fill % added by one item
+ITEMS_PER_H = 10.0
+
+
+def simulate(forecaster, hours=3.0, rush_at_h=2.0, seed=1):
+    """
+    Feed one bin; every 15 min after the first hour records (hour, true
+    ttf, forecast ttf, lifetime-average ttf), all in seconds.
+    """
+    rng = random.Random(seed)
+    t0 = 1_700_000_000.0
+    level, t, items, out = 5.0, 0.0, 0, []
+    next_item = rng.expovariate(ITEMS_PER_H / 3600)
+    next_check = 3600.0
+    while t < hours * 3600:
+        rate_h = ITEMS_PER_H * (2 if t >= rush_at_h * 3600 else 1)
+        while next_item <= t:
+            level += PER_ITEM
+            items += 1
+            forecaster.add_event(None, t0 + next_item)
+            next_item += rng.expovariate(rate_h / 3600)
+        forecaster.add_reading(None, level + rng.gauss(0, NOISE), t0 + t)
+        if t >= next_check:
+            true_ttf = (100 - level) / (rate_h * PER_ITEM / 3600)
+            lifetime_ttf = (100 - level) / (items * PER_ITEM / t)
+            out.append((t / 3600, true_ttf, forecaster.forecast("local", t0 + t)["timeToFullS"], lifetime_ttf))
+            next_check += 900
+        t += READING_EVERY_S
+    return out
+
+
+def accuracy():
+    readings_only = simulate(FillForecaster(detection_weight=0.0))
+    blended = simulate(FillForecaster())
+    print(f"{'hour':>5}{'true h':>9}{'readings h':>12}{'blend h':>10}{'lifetime h':>12}")
+    for (h, true, r, n), (_, _, b, _) in zip(readings_only, blended):
+        fmt = lambda s: f"{s / 3600:.1f}" if s is not None else "-"
+        print(f"{h:>5.2f}{true / 3600:>9.1f}{fmt(r):>12}{fmt(b):>10}{n / 3600:>12.1f}")
+
+
+def cost(bins):
+    forecaster = FillForecaster()
+    rng = random.Random(2)
+    t0 = 1_700_000_000.0
+    history = {f"bin-{i}": [] for i in range(bins)}
+    updates = 0
+    start = time.perf_counter()
+    for step in range(int(3600 / 10)):   # a reading every 10 s for an hour
+        t = t0 + step * 10
+        for b, readings in history.items():
+            fill = 10 + step * 0.01 + rng.gauss(0, NOISE)
+            forecaster.add_reading(b, fill, t)
+            readings.append((t, fill))
+            updates += 1
+            if rng.random() < 0.03:
+                forecaster.add_event(b, t)
+                updates += 1
+    update_s = time.perf_counter() - start
+
+    now = t0 + 3600
+    start = time.perf_counter()
+    forecaster.forecasts(now)
+    online_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for readings in history.values():
+        ts, ys = np.array(readings).T
+        slope, intercept = np.polyfit(ts - now, ys, 1)
+        (100 - intercept) / slope if slope > 0 else None
+    refit_ms = (time.perf_counter() - start) * 1000
+
+    print(f"\n{bins} bins, {updates:,} updates: {updates / update_s:,.0f} updates/s "
+          f"({update_s / updates * 1e6:.1f} us each)")
+    print(f"forecast every bin: online {online_ms:.1f} ms, refit last hour {refit_ms:.1f} ms")
+
+
+def main():
+    bins = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    accuracy()
+    cost(bins)
+
+
+if __name__ == "__main__":
+    main()
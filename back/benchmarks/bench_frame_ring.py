@@ -0,0 +1,105 @@
+"""
+Aggregate FPS: single-process loop vs capture process + N inference
+processes sharing frames through FrameRing.
+
+    cd back && python -m benchmarks.bench_frame_ring [N] [seconds]
+
+Frames are JPEG-decoded from the simulator's synthetic scene (the capture
+cost) and "inference" is a fixed single-threaded OpenCV workload standing
+in for the model, so the numbers isolate the process/GIL structure rather
+than model speed.
+"""
+import multiprocessing
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from frame_ring import FrameRing
+from simulator.mjpeg_camera import synthetic_jpegs
+
+SLOTS = 8
+
+
+def fake_inference(frame):
+    small = cv2.resize(frame, (640, 360))
+    for _ in range(6):
+        small = cv2.GaussianBlur(small, (9, 9), 0)
+    return float(small.mean())
+
+
+def decode(jpeg):
+    return cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+
+
+def single_process(jpegs, seconds):
+    cv2.setNumThreads(1)
+    done = 0
+    deadline = time.monotonic() + seconds
+    i = 0
+    while time.monotonic() < deadline:
+        fake_inference(decode(jpegs[i % len(jpegs)]))
+        i += 1
+        done += 1
+    return done / seconds
+
+
+def capture(ring_name, jpegs, shape, lock, stop):
+    cv2.setNumThreads(1)
+    ring = FrameRing(ring_name, shape, SLOTS, lock)
+    i = 0
+    while not stop.is_set():
+        ring.write(decode(jpegs[i % len(jpegs)]))
+        i += 1
+    ring.close()
+
+
+def infer(ring_name, shape, lock, counter, stop):
+    cv2.setNumThreads(1)
+    ring = FrameRing(ring_name, shape, SLOTS, lock)
+    done = 0
+    while not stop.is_set():
+        seq, frame = ring.claim_latest()
+        if seq is None:
+            time.sleep(0.0005)
+            continue
+        fake_inference(frame)
+        ring.release(seq)
+        done += 1
+    with counter.get_lock():
+        counter.value += done
+    ring.close()
+
+
+def multi_process(jpegs, n, seconds):
+    ctx = multiprocessing.get_context("spawn")
+    shape = decode(jpegs[0]).shape
+    ring_name = f"bench_ring_{os.getpid()}"
+    stop, lock, counter = ctx.Event(), ctx.Lock(), ctx.Value("q", 0)
+    creator = FrameRing(ring_name, shape, SLOTS, lock, create=True)
+    procs = [ctx.Process(target=capture, args=(ring_name, jpegs, shape, lock, stop))]
+    procs += [ctx.Process(target=infer, args=(ring_name, shape, lock, counter, stop)) for _ in range(n)]
+    for p in procs:
+        p.start()
+    time.sleep(seconds)
+    stop.set()
+    for p in procs:
+        p.join()
+    creator.close()
+    return counter.value / seconds
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else max(1, (os.cpu_count() or 2) - 1)
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    jpegs = synthetic_jpegs()
+
+    print(f"{'mode':<22} {'fps':>8}")
+    print(f"{'single process':<22} {single_process(jpegs, seconds):>8.1f}")
+    print(f"{f'ring, {n} inference proc':<22} {multi_process(jpegs, n, seconds):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
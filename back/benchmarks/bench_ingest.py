@@ -0,0 +1,97 @@
+"""
+Throughput of POST /events/batch on one API worker.
+
+    cd back && python -m benchmarks.bench_ingest [EVENTS] [BATCH]
+
+Starts uvicorn (one worker, in this process) with only the events router,
+writing to a temp csv, and pushes EVENTS events through IngestClient in
+batches of BATCH. Then replays every batch to check that nothing is stored
+twice. Also reports the server-side cost without HTTP
+(decode + IngestLog.ingest + EventStore.refresh).
+"""
+import gzip
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI
+
+from app.ingest import IngestLog, decode_batch
+from app.routers import events
+from app.state import Metrics
+from app.store import EventStore
+from ingest_client import IngestClient
+
+PORT = 8765
+
+
+class BenchState:
+    def __init__(self, csv_path):
+        self.events = EventStore(csv_path)
+        self.ingest = IngestLog(csv_path)
+        self.metrics = Metrics()
+
+
+def make_events(n, first=0):
+    return [
+        {"timestamp": f"2024-01-01T00:00:{i % 60:02d}", "item": "plastic bottle",
+         "classification": "recycling", "event_id": f"e{i}"}
+        for i in range(first, first + n)
+    ]
+
+
+def server_only(tmp, n, batch):
+    state = BenchState(tmp / "server_only.csv")
+    payloads = []
+    for start in range(0, n, batch):
+        evs = [dict(e, seq=start + i + 1) for i, e in enumerate(make_events(batch, start))]
+        payloads.append(gzip.compress(json.dumps({"node_id": "a", "epoch": 1, "events": evs}).encode()))
+    t0 = time.perf_counter()
+    for body in payloads:
+        state.ingest.ingest(decode_batch(body, "gzip"))
+        state.events.refresh()
+    return n / (time.perf_counter() - t0), len(state.events)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    batch = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    tmp = Path(tempfile.mkdtemp())
+
+    rate, stored = server_only(tmp, n, batch)
+    print(f"server only:   {rate:>10,.0f} events/s ({stored} stored)")
+
+    app = FastAPI()
+    app.include_router(events.router)
+    app.state.trashcam = BenchState(tmp / "current.csv")
+    server = uvicorn.Server(uvicorn.Config(app, port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    client = IngestClient(f"http://127.0.0.1:{PORT}", "bench-node", batch_size=batch, flush_interval_s=0.05)
+    t0 = time.perf_counter()
+    for event in make_events(n):
+        client.publish(event)
+    while client.pending:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - t0
+    print(f"over HTTP:     {n / elapsed:>10,.0f} events/s (batch {batch}, gzip)")
+
+    # replay everything (acknowledged by the first batch): nothing new on disk
+    client._buffer.extend(dict(e, seq=i + 1) for i, e in enumerate(make_events(n)))
+    while client.pending:
+        time.sleep(0.01)
+    client.close()
+    store = app.state.trashcam.events
+    store.refresh()
+    print(f"after replay:  {len(store)} events stored, {app.state.trashcam.metrics.snapshot()}")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Per-box vs whole-array post-processing of one frame's detections.
+
+    cd back && python -m benchmarks.bench_postprocess [BOXES] [ITERS]
+
+Builds a fake result with BOXES detections (default 100) over a YOLO-World
+sized vocabulary and times the old loop (box.xyxy[0] / float(box.conf) /
+int(box.cls) and classify per box) against postprocess.filter_detections +
+ClassTable. Uses torch tensors when torch is installed (the real cost of
+per-box tensor indexing), NumPy stand-ins otherwise.
+"""
+import sys
+import time
+
+import numpy as np
+
+from postprocess import CLS, ClassTable, filter_detections
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+NAMES = {i: f"item {i}" for i in range(90)}
+CONF_THRES = 0.30
+MIN_AREA = 35 * 35
+
+
+def classify(label):
+    # stand-in for VisionBetter.classify_item: exact lookup, then substring scan
+    for key in ("item 1", "item 2", "item 3"):
+        if key == label or key in label:
+            return "plastic", "recycling"
+    return None, None
+
+
+class FakeBoxes:
+    """Enough of ultralytics' Boxes for both code paths."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        for i in range(len(self.data)):
+            yield FakeBoxes(self.data[i:i + 1])
+
+    @property
+    def xyxy(self):
+        return self.data[:, :4]
+
+    @property
+    def conf(self):
+        return self.data[:, 4]
+
+    @property
+    def cls(self):
+        return self.data[:, 5]
+
+
+def fake_boxes(n, rng):
+    xy = rng.uniform(0, 600, (n, 2))
+    wh = rng.uniform(10, 120, (n, 2))
+    data = np.column_stack((xy, xy + wh, rng.uniform(0.3, 1.0, n), rng.integers(0, len(NAMES), n)))
+    data = data.astype(np.float32)
+    return FakeBoxes(torch.from_numpy(data) if torch is not None else data)
+
+
+def per_box(boxes):
+    out = []
+    for box in boxes:
+        conf = float(box.conf[0])
+        if conf < CONF_THRES:
+            continue
+        x1, y1, x2, y2 = box.xyxy[0]
+        x1, y1, x2, y2 = int(x1) + 50, int(y1) + 80, int(x2) + 50, int(y2) + 80
+        if (x2 - x1) * (y2 - y1) < MIN_AREA:
+            continue
+        label = NAMES[int(box.cls[0])]
+        coarse, bin_type = classify(label)
+        out.append({"bbox": (x1, y1, x2, y2), "label": label, "conf": conf,
+                    "coarse": coarse, "bin_type": bin_type})
+    return out
+
+
+def vectorized(boxes, table):
+    data = boxes.data.cpu().numpy() if torch is not None else boxes.data
+    dets = filter_detections(data, 50, 80, CONF_THRES, MIN_AREA)
+    table.lookup(dets[:, CLS])
+    return dets
+
+
+def timed(fn, iters):
+    start = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - start) / iters * 1e6
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    iters = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    boxes = fake_boxes(n, np.random.default_rng(0))
+    table = ClassTable(NAMES, classify)
+
+    assert len(per_box(boxes)) == len(vectorized(boxes, table))
+
+    print(f"{n} boxes/frame, {'torch' if torch is not None else 'numpy'} inputs")
+    print(f"{'path':<12} {'us/frame':>10}")
+    print(f"{'per-box':<12} {timed(lambda: per_box(boxes), iters):>10.1f}")
+    print(f"{'vectorized':<12} {timed(lambda: vectorized(boxes, table), iters):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Per-frame latency and allocations of the model-input path and the info panel.
+
+    cd back && python -m benchmarks.bench_preprocess [WEIGHTS] [FRAMES]
+
+A 1280x720 frame cropped to VisionBetter's default ROI goes through
+ultralytics' own preprocessing and through preprocess.ModelInput, then
+end to end through model() and preprocess.predict(); the info panel is
+drawn the old way (full-frame copy + addWeighted) and in place.
+
+Allocations are counted per frame after one untimed call: "np MB" is the
+tracemalloc peak (numpy / OpenCV buffers), "torch allocs" / "torch MB"
+come from the torch profiler's memory events (CPU tensors).
+
+WEIGHTS defaults to yolov8n.yaml: an untrained network built from the
+bundled config, so nothing is downloaded; latency is what matters here.
+"""
+import statistics
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+import torch
+from torch.profiler import ProfilerActivity, profile
+from ultralytics import YOLO
+
+from preprocess import ModelInput, predict
+
+IMG_SIZE = 640
+CONF = 0.25
+IOU = 0.45
+
+
+def old_info_panel(frame):
+    overlay = frame.copy()
+    cv2.rectangle(overlay, (10, 10), (400, 200), (0, 0, 0), -1)
+    return cv2.addWeighted(frame, 0.7, overlay, 0.3, 0)
+
+
+def new_info_panel(frame):
+    panel = frame[10:201, 10:401]
+    cv2.convertScaleAbs(panel, dst=panel, alpha=0.7)
+    return frame
+
+
+def allocations(fn):
+    """(numpy/OpenCV peak MB, torch allocation count, torch MB) for one call of fn."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    with profile(activities=[ProfilerActivity.CPU], profile_memory=True) as prof:
+        fn()
+    np_mb = (tracemalloc.get_traced_memory()[1] - base) / 1e6
+    tracemalloc.stop()
+    allocs = [e.self_cpu_memory_usage for e in prof.events() if e.self_cpu_memory_usage > 0]
+    return np_mb, len(allocs), sum(allocs) / 1e6
+
+
+def timed(fn, frames):
+    times = []
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    weights = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] else "yolov8n.yaml"
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    model = YOLO(weights)
+    frame = np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    h, w = frame.shape[:2]
+    roi = frame[int(h * 0.35):h, int(w * 0.2):int(w * 0.8)]
+    model_input = ModelInput(IMG_SIZE)
+
+    with torch.inference_mode():
+        model(roi, verbose=False, conf=CONF, iou=IOU, imgsz=IMG_SIZE)  # builds the predictor
+        predictor = model.predictor
+        cases = [
+            ("ultralytics preprocess", lambda: predictor.preprocess([roi])),
+            ("ModelInput.load", lambda: model_input.load(roi)),
+            ("model() end to end", lambda: model(roi, verbose=False, conf=CONF, iou=IOU, imgsz=IMG_SIZE)),
+            ("predict() end to end", lambda: predict(model, model_input, roi, CONF, IOU)),
+            ("info panel: copy + blend", lambda: old_info_panel(frame)),
+            ("info panel: in place", lambda: new_info_panel(frame)),
+        ]
+        print(f"# {weights}, {roi.shape[1]}x{roi.shape[0]} ROI of {w}x{h}, torch {torch.__version__}\n")
+        print(f"{'path':<28}{'ms/frame':>10}{'np MB':>8}{'torch allocs':>14}{'torch MB':>10}")
+        for name, fn in cases:
+            fn()
+            np_mb, count, torch_mb = allocations(fn)
+            ms = timed(fn, frames)
+            print(f"{name:<28}{ms:>10.2f}{np_mb:>8.2f}{count:>14}{torch_mb:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Serialization cost of /logs/ payloads.
+
+    cd back && python -m benchmarks.bench_serialization [n_events]
+
+before   = what FastAPI did for get_logs: jsonable_encoder + json.dumps
+orjson   = FastJSONResponse rendering the same row dicts
+columnar = FastJSONResponse rendering shape=columnar
+"""
+import json
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from app.responses import dumps
+from app.routers.log import build_page
+
+ITEMS = [("soda can", "metal"), ("plate", "paper"), ("banana peel", "fruit")]
+
+
+class ListStore(list):
+    """Stands in for EventStore: build_page only needs len() and rows()."""
+
+    def rows(self, start=0, end=None):
+        return self[start:end]
+
+
+def make_logs(n):
+    return ListStore(
+        {
+            "timestamp": f"{(i // 3600) % 24:02d}:{(i // 60) % 60:02d}:{i % 60:02d}",
+            "item": ITEMS[i % 3][0],
+            "classification": ITEMS[i % 3][1],
+        }
+        for i in range(n)
+    )
+
+
+def bench(name, fn, repeat=5):
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+        size = len(out)
+    print(f"{name:<10} {best * 1000:9.1f} ms  {size / 1e6:7.2f} MB")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    logs = make_logs(n)
+    print(f"{n} events")
+
+    bench("before", lambda: json.dumps(jsonable_encoder({"logs": logs})).encode("utf-8"))
+    bench("orjson", lambda: dumps(build_page(logs, 0, None, "rows")))
+    bench("columnar", lambda: dumps(build_page(logs, 0, None, "columnar")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Recall vs latency: single-pass (ROI resized to IMG_SIZE) vs tiled inference.
+
+    cd back && python -m benchmarks.bench_tiling FRAMES_DIR [LABELS_DIR]
+
+FRAMES_DIR holds recorded frames (*.jpg / *.png). LABELS_DIR, if given,
+holds YOLO-format ground truth (<frame>.txt, "cls cx cy w h" normalized to
+the full frame); recall is the fraction of ground-truth boxes matched at
+IoU >= 0.5 by any detection. Without labels only counts are reported.
+"""
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+import VisionBetter as vb
+from motion import iou_matrix
+from tiling import run_tiled
+
+
+def roi_of(frame):
+    h, w = frame.shape[:2]
+    x1, y1 = int(w * vb.ROI_LEFT_FRAC), int(h * vb.ROI_TOP_FRAC)
+    x2, y2 = int(w * vb.ROI_RIGHT_FRAC), int(h * vb.ROI_BOTTOM_FRAC)
+    return frame[y1:y2, x1:x2], x1, y1
+
+
+def single_pass(model, frame):
+    roi, ox, oy = roi_of(frame)
+    res = model(roi, verbose=False, conf=vb.CONF_THRES, iou=vb.IOU_THRES, imgsz=vb.IMG_SIZE)[0]
+    boxes = res.boxes.xyxy.cpu().numpy().astype(np.float64)
+    boxes[:, [0, 2]] += ox
+    boxes[:, [1, 3]] += oy
+    return filter_area(boxes, vb.MIN_BOX_AREA)
+
+
+def tiled(model, frame):
+    roi, ox, oy = roi_of(frame)
+    boxes, _, _, _ = run_tiled(
+        model, roi, tile=vb.TILE_SIZE, overlap=vb.TILE_OVERLAP,
+        conf=vb.CONF_THRES, iou=vb.IOU_THRES,
+    )
+    boxes[:, [0, 2]] += ox
+    boxes[:, [1, 3]] += oy
+    return filter_area(boxes, vb.MIN_BOX_AREA_TILED)
+
+
+def filter_area(boxes, min_area):
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return boxes[areas >= min_area]
+
+
+def load_labels(path, w, h):
+    if not path.exists():
+        return np.zeros((0, 4))
+    rows = np.loadtxt(path, ndmin=2)
+    if rows.size == 0:
+        return np.zeros((0, 4))
+    cx, cy, bw, bh = rows[:, 1] * w, rows[:, 2] * h, rows[:, 3] * w, rows[:, 4] * h
+    return np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+
+
+def main():
+    frames_dir = Path(sys.argv[1])
+    labels_dir = Path(sys.argv[2]) if len(sys.argv) > 2 else None
+    frames = sorted(p for p in frames_dir.iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+
+    model = YOLO("yolov8m-worldv2.pt")
+    model.set_classes(list(vb.PROMPT_TO_COARSE.keys()))
+
+    for name, fn in (("single", single_pass), ("tiled", tiled)):
+        fn(model, cv2.imread(str(frames[0])))  # warm-up
+        times, n_det, n_gt, n_hit = [], 0, 0, 0
+        for path in frames:
+            frame = cv2.imread(str(path))
+            t0 = time.perf_counter()
+            boxes = fn(model, frame)
+            times.append(time.perf_counter() - t0)
+            n_det += len(boxes)
+            if labels_dir is not None:
+                gt = load_labels(labels_dir / (path.stem + ".txt"), frame.shape[1], frame.shape[0])
+                n_gt += len(gt)
+                if len(gt) and len(boxes):
+                    n_hit += int((iou_matrix(gt, boxes).max(axis=1) >= 0.5).sum())
+
+        recall = f"{n_hit / n_gt:.3f}" if n_gt else "n/a"
+        print(
+            f"{name:<7} mean {np.mean(times) * 1000:7.1f} ms  p95 {np.percentile(times, 95) * 1000:7.1f} ms"
+            f"  detections {n_det:6d}  recall {recall}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Cost of the tracing layer on the frame loop.
+
+    cd back && python -m benchmarks.bench_tracing [FRAMES]
+
+Runs a stand-in frame loop (seven stages of real OpenCV work on a 720p
+frame, like VisionBetter's capture/preprocess/inference/postprocess/track/
+persist/render) with tracing off and on, and reports the per-span cost
+and the overhead as a fraction of frame time. Also checks the Chrome
+trace export.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from tracing import Tracer
+
+STAGES = ("capture", "preprocess", "inference", "postprocess", "track", "persist", "render")
+
+
+def run(tracer, frame, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        for name in STAGES:
+            with tracer.span(name):
+                cv2.GaussianBlur(frame, (5, 5), 0)
+    return (time.perf_counter() - start) / frames
+
+
+def span_cost(tracer, n=200_000):
+    start = time.perf_counter()
+    for _ in range(n):
+        with tracer.span("x"):
+            pass
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    cv2.setNumThreads(1)
+    frame = np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+
+    off, on = Tracer(enabled=False), Tracer()
+    run(on, frame, 10)  # warm-up
+    t_off = min(run(off, frame, frames) for _ in range(3))
+    t_on = min(run(on, frame, frames) for _ in range(3))
+
+    cost_on, cost_off = span_cost(Tracer()), span_cost(Tracer(enabled=False))
+    per_frame = (cost_on - cost_off) * len(STAGES)
+
+    print(f"frame time, tracing off: {t_off * 1000:8.3f} ms")
+    print(f"frame time, tracing on:  {t_on * 1000:8.3f} ms")
+    print(f"span cost: {cost_on * 1e6:.2f} us (disabled {cost_off * 1e6:.2f} us)")
+    print(f"overhead: {per_frame * 1e6:.1f} us/frame = {per_frame / t_off:.3%} of this frame")
+
+    path = os.path.join(tempfile.gettempdir(), "bench_tracing.json")
+    on.export_chrome(path)
+    with open(path) as f:
+        events = json.load(f)["traceEvents"]
+    print(f"chrome trace: {len(events)} events -> {path}")
+    on.print_summary()
+
+
+if __name__ == "__main__":
+    main()
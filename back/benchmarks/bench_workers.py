@@ -0,0 +1,90 @@
+"""
+Throughput of /logs/ and /fill/ with 1 vs N uvicorn workers.
+
+    cd back && python -m benchmarks.bench_workers [N] [seconds]
+
+Starts the API itself for each worker count (prod mode, see start.sh) and
+drives it with one client process per CPU using keep-alive connections.
+/fill/ needs a depth sensor (or the simulator) at UDP_SERVER_HOST,
+otherwise every call waits for the one-shot UDP timeout.
+"""
+import http.client
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+PORT = 8765
+PATHS = ["/logs/", "/fill/"]
+
+
+def wait_healthy(timeout_s=30.0):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=1)
+            conn.request("GET", "/health/")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("API did not come up")
+
+
+def client(args):
+    path, seconds = args
+    conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=5)
+    done = 0
+    errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status == 200:
+                done += 1
+            else:
+                errors += 1
+        except OSError:
+            errors += 1
+            conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=5)
+    return done, errors
+
+
+def run(workers, seconds):
+    env = dict(os.environ, WORKERS=str(workers), PORT=str(PORT))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT),
+         "--workers", str(workers), "--no-access-log", "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        wait_healthy()
+        results = {}
+        n_clients = os.cpu_count() or 4
+        with multiprocessing.Pool(n_clients) as pool:
+            for path in PATHS:
+                out = pool.map(client, [(path, seconds)] * n_clients)
+                ok = sum(d for d, _ in out)
+                err = sum(e for _, e in out)
+                results[path] = (ok / seconds, err)
+        return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 4)
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+
+    print(f"{'workers':>8} {'path':<8} {'req/s':>10} {'errors':>7}")
+    for workers in (1, n):
+        for path, (rps, err) in run(workers, seconds).items():
+            print(f"{workers:>8} {path:<8} {rps:>10.0f} {err:>7}")
+
+
+if __name__ == "__main__":
+    main()
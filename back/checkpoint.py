@@ -0,0 +1,41 @@
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path, mode="w", **open_kwargs):
+    """
+    Open a temp file next to `path` and rename it over `path` on success,
+    so a crash mid-write leaves the previous version intact, never half a
+    file. On error the temp file is removed and the exception propagates.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **open_kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def atomic_write_json(path, doc, indent=None):
+    with atomic_write(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=indent, separators=None if indent else (",", ":"))
+
+
+def load_json(path):
+    """Parsed JSON at `path`, or None if it's missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
@@ -0,0 +1,170 @@
+import os
+import time
+
+import numpy as np
+import torch
+
+
+class CpuProfile:
+    """
+    How to run the detector on a host without CUDA.
+
+    threads / interop_threads: PyTorch intra-op and inter-op pools
+    (None = PyTorch's default). cores: CPU ids to pin the process to
+    (None = leave affinity alone). channels_last: NHWC weights, which the
+    oneDNN convolutions prefer. compile: torch.compile the network.
+    warmup_runs: inferences at the real input size before the first frame,
+    so allocation, oneDNN primitive creation and compilation are paid up
+    front rather than by the first detections.
+
+    Every option can be refused (old PyTorch, no compiler toolchain, an OS
+    without affinity); apply_runtime() and optimize_model() report what
+    actually took effect.
+    """
+
+    def __init__(self, name, threads=None, interop_threads=None, cores=None,
+                 channels_last=False, compile=False, compile_mode="default",
+                 flush_denormal=False, warmup_runs=0):
+        self.name = name
+        self.threads = threads
+        self.interop_threads = interop_threads
+        self.cores = cores
+        self.channels_last = channels_last
+        self.compile = compile
+        self.compile_mode = compile_mode
+        self.flush_denormal = flush_denormal
+        self.warmup_runs = warmup_runs
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_cores(spec):
+    """"0-3,6" -> [0, 1, 2, 3, 6]; "" -> None."""
+    if not spec:
+        return None
+    cores = []
+    for part in spec.split(","):
+        lo, _, hi = part.strip().partition("-")
+        cores.extend(range(int(lo), int(hi or lo) + 1))
+    return cores
+
+
+def make_profile(name, threads=0, cores=None, warmup_runs=3):
+    """
+    Named profiles: "default" (PyTorch as it comes), "tuned" (pinned
+    threads, one inter-op thread, channels-last, warm-up) and "compiled"
+    (tuned + torch.compile). threads=0 uses every core we may run on.
+    """
+    cores = cores or None
+    threads = threads or len(cores or available_cores())
+    if name == "default":
+        return CpuProfile("default", warmup_runs=warmup_runs)
+    if name not in ("tuned", "compiled"):
+        raise ValueError(f"unknown CPU profile {name!r} (default, tuned, compiled)")
+    return CpuProfile(
+        name,
+        threads=threads,
+        interop_threads=1,
+        cores=cores,
+        channels_last=True,
+        compile=name == "compiled",
+        flush_denormal=True,
+        warmup_runs=warmup_runs,
+    )
+
+
+def apply_runtime(profile):
+    """
+    Process-wide settings. Call before the model is loaded: PyTorch only
+    accepts an inter-op pool size before any inter-op work has run.
+    """
+    applied = {}
+    if profile.cores is not None:
+        try:
+            os.sched_setaffinity(0, profile.cores)
+            applied["cores"] = profile.cores
+        except (AttributeError, OSError, ValueError) as e:
+            applied["cores"] = f"unchanged ({e})"
+    if profile.threads is not None:
+        torch.set_num_threads(profile.threads)
+    applied["threads"] = torch.get_num_threads()
+    if profile.interop_threads is not None:
+        try:
+            torch.set_num_interop_threads(profile.interop_threads)
+        except RuntimeError as e:
+            applied["interop_threads"] = f"unchanged ({e})"
+    applied.setdefault("interop_threads", torch.get_num_interop_threads())
+    if profile.flush_denormal:
+        applied["flush_denormal"] = torch.set_flush_denormal(True)
+    applied["mkldnn"] = torch.backends.mkldnn.is_available()
+    return applied
+
+
+def _network(model):
+    """The nn.Module doing the work: inside the ultralytics predictor once it exists."""
+    predictor = getattr(model, "predictor", None)
+    backend = getattr(predictor, "model", None)
+    if isinstance(getattr(backend, "model", None), torch.nn.Module):
+        return backend, "model"
+    if isinstance(getattr(model, "model", None), torch.nn.Module):
+        return model, "model"
+    return None, None
+
+
+def optimize_model(model, profile, run_once):
+    """
+    Channels-last and torch.compile for `model` (an ultralytics YOLO or
+    anything with a .model nn.Module). run_once(model) runs one inference;
+    it is used to build the predictor and to check that each option works -
+    an option that fails is undone. Returns what was applied.
+    """
+    applied = {}
+    if not (profile.channels_last or profile.compile):
+        return applied
+    run_once(model)
+
+    holder, attr = _network(model)
+    if holder is None:
+        return {"channels_last": "off (no torch module)", "compile": "off (no torch module)"}
+    net = getattr(holder, attr)
+
+    if profile.channels_last:
+        try:
+            net.to(memory_format=torch.channels_last)
+            run_once(model)
+            applied["channels_last"] = True
+        except Exception as e:
+            net.to(memory_format=torch.contiguous_format)
+            applied["channels_last"] = f"off ({type(e).__name__}: {e})"
+
+    if profile.compile:
+        if not hasattr(torch, "compile"):
+            applied["compile"] = "off (needs PyTorch 2)"
+        else:
+            try:
+                setattr(holder, attr, torch.compile(net, mode=profile.compile_mode))
+                run_once(model)  # compiles now, not on the first frame
+                applied["compile"] = profile.compile_mode
+            except Exception as e:
+                setattr(holder, attr, net)
+                applied["compile"] = f"off ({type(e).__name__})"
+    return applied
+
+
+def warm_up(model, run_once, runs):
+    """Run `runs` inferences; returns their times in ms (first one is the cold cost)."""
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        run_once(model)
+        times.append((time.perf_counter() - t0) * 1000)
+    return times
+
+
+def blank_frame(size):
+    """A mid-gray size x size BGR frame for warm-up runs."""
+    return np.full((size, size, 3), 114, dtype=np.uint8)
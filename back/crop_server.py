@@ -0,0 +1,244 @@
+import hmac
+import queue
+import socketserver
+import threading
+import time
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+from edge_prefilter import read_message
+from postprocess import empty_detections
+from tiling import nms
+
+
+class _Frame:
+    """One edge frame whose crops are being inferred, possibly by several workers."""
+
+    __slots__ = ("bin_id", "epoch", "seq", "ts", "size", "pending", "parts", "names")
+
+    def __init__(self, bin_id, epoch, seq, ts, size, n_crops):
+        self.bin_id = bin_id
+        self.epoch = epoch
+        self.seq = seq
+        self.ts = ts
+        self.size = size
+        self.pending = n_crops
+        self.parts = []
+        self.names = None
+
+
+class CropServer:
+    """
+    Central half of split mode: edge nodes (edge_prefilter.py) send JPEG
+    crops of moving regions, this server runs the detector over them.
+
+    Every crop from every bin goes into one queue. Each of `workers`
+    threads takes up to batch_size crops (waiting at most max_wait_s for a
+    batch to fill), decodes them and calls infer(crops, worker) once for
+    the whole batch; worker (0..workers-1) picks that thread's own model,
+    since one model must not run two batches at once. infer returns
+    ([(N, 6) raw detections per crop], names). Boxes
+    are shifted back to full-frame coordinates and, once every crop of a
+    frame is done, merged with class-aware NMS and handed to
+    on_frame(bin_id, seq, detections, names, frame_size) - always from one
+    thread, in per-bin sequence order, so tracking code needs no locks.
+    Sequence numbers count within the sender's epoch: a new epoch (the
+    edge node restarted) starts the bin's order over, and frames still in
+    flight from the epoch before it are dropped.
+
+    With a `token`, every message must carry it ("token" in the header) and
+    the default is to listen on all interfaces; without one, only on
+    loopback. A connection sending a bad token or a malformed message is
+    closed.
+    """
+
+    def __init__(self, infer, on_frame, host=None, port=8770, workers=1,
+                 batch_size=8, max_wait_s=0.01, max_queue=256, iou=0.45, token=""):
+        if host is None:
+            host = "0.0.0.0" if token else "127.0.0.1"
+        elif not token and host not in ("127.0.0.1", "localhost", "::1"):
+            print(f"[crops] Warning: listening on {host} without CROP_TOKEN; anyone there can send crops")
+        self.host = host
+        self.infer = infer
+        self.token = token
+        self.on_frame = on_frame
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_wait_s = max_wait_s
+        self.iou = iou
+
+        self._crops = queue.Queue(maxsize=max_queue)
+        self._done = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._last_seq = {}  # bin -> (epoch, seq, previous epoch)
+        self._stats = defaultdict(lambda: defaultdict(float))
+        self._threads = []
+
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while not server._stop.is_set():
+                    try:
+                        message = read_message(self.rfile)
+                        if message is None:
+                            return
+                        server._accept(*message)
+                    except (OSError, ValueError) as e:
+                        if not isinstance(e, OSError):
+                            print(f"[crops] Closing {self.client_address[0]}: {e}")
+                        return
+
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler, bind_and_activate=False)
+        self._server.allow_reuse_address = True
+        self._server.daemon_threads = True
+        self._server.server_bind()
+        self._server.server_activate()
+        self.port = self._server.server_address[1]
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        self._threads = [threading.Thread(target=self._server.serve_forever, name="crop-accept", daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._work, args=(i,), name=f"crop-infer-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        self._threads.append(threading.Thread(target=self._deliver, name="crop-deliver", daemon=True))
+        for t in self._threads:
+            t.start()
+        print(f"[crops] Listening on {self.host}:{self.port} with {self.workers} inference worker(s)")
+
+    def stop(self):
+        self._stop.set()
+        self._server.shutdown()
+        self._server.server_close()
+        self._done.put(None)
+
+    def stats(self):
+        """Per bin: frames, crops, bytes in, server CPU seconds (decode / inference)."""
+        with self._lock:
+            return {
+                bin_id: {key: s[key] for key in ("frames", "crops", "bytes", "dropped", "decode_cpu_s", "infer_cpu_s")}
+                for bin_id, s in self._stats.items()
+            }
+
+    # ---------- pipeline ----------
+
+    def _accept(self, header, blobs):
+        if self.token and not hmac.compare_digest(str(header.get("token", "")), self.token):
+            raise ValueError("bad token")
+        try:
+            bin_id = str(header["bin"])
+            seq = int(header["seq"])
+            epoch = int(header.get("epoch", 0))
+            size = tuple(int(v) for v in header["frame"])
+            regions = [tuple(int(v) for v in region) for region in header["regions"]]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"bad header: {e!r}")
+        if len(size) != 2 or len(regions) != len(blobs) or any(len(r) != 4 for r in regions):
+            raise ValueError("bad header: frame/regions don't match the crops")
+        frame = _Frame(bin_id, epoch, seq, header.get("ts"), size, max(1, len(blobs)))
+        with self._lock:
+            s = self._stats[bin_id]
+            s["frames"] += 1
+            s["crops"] += len(blobs)
+            s["bytes"] += sum(len(b) for b in blobs) + 8
+        # a frame without crops still queues (as one empty job) so it can't overtake earlier frames
+        for region, jpeg in zip(regions, blobs) if blobs else [(None, None)]:
+            try:
+                self._crops.put_nowait((frame, region, jpeg))
+            except queue.Full:
+                # server saturated: drop the crop but still finish the frame
+                with self._lock:
+                    self._stats[bin_id]["dropped"] += 1
+                self._finish_part(frame, None)
+
+    def _work(self, worker):
+        while not self._stop.is_set():
+            try:
+                batch = [self._crops.get(timeout=0.2)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.max_wait_s
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._crops.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            t0 = time.thread_time()
+            images = [
+                cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR) if jpeg else None
+                for _, _, jpeg in batch
+            ]
+            t1 = time.thread_time()
+            ok = [i for i, img in enumerate(images) if img is not None]
+            raws, names = self.infer([images[i] for i in ok], worker) if ok else ([], None)
+            t2 = time.thread_time()
+
+            per_crop_decode = (t1 - t0) / len(batch)
+            per_crop_infer = (t2 - t1) / max(1, len(ok))
+            results = dict(zip(ok, raws))
+            for i, (frame, region, _) in enumerate(batch):
+                with self._lock:
+                    s = self._stats[frame.bin_id]
+                    s["decode_cpu_s"] += per_crop_decode
+                    s["infer_cpu_s"] += per_crop_infer if i in results else 0.0
+                raw = results.get(i)
+                if raw is not None and len(raw):
+                    raw = np.array(raw, dtype=np.float32)
+                    raw[:, [0, 2]] += region[0]
+                    raw[:, [1, 3]] += region[1]
+                self._finish_part(frame, raw, names)
+
+    def _finish_part(self, frame, raw, names=None):
+        with self._lock:
+            if names is not None:
+                if frame.names is None:
+                    frame.names = names
+                elif names is not frame.names and names != frame.names:
+                    # mid vocabulary swap another worker answered this frame's
+                    # other crops; its class ids mean different labels
+                    raw = None
+            if raw is not None and len(raw):
+                frame.parts.append(raw)
+            frame.pending -= 1
+            complete = frame.pending == 0
+        if complete:
+            self._done.put(frame)
+
+    def _deliver(self):
+        while True:
+            frame = self._done.get()
+            if frame is None:
+                return
+            # workers can finish a bin's frames out of order; never go backwards
+            epoch, seq, previous = self._last_seq.get(frame.bin_id, (None, 0, None))
+            if frame.epoch == epoch:
+                if frame.seq <= seq:
+                    continue
+            elif frame.epoch == previous:
+                continue  # late frame from before the node restarted
+            else:
+                if epoch is not None:
+                    print(f"[crops] {frame.bin_id} restarted (epoch {frame.epoch}); sequence starts over")
+                previous = epoch
+            self._last_seq[frame.bin_id] = (frame.epoch, frame.seq, previous)
+
+            if frame.parts:
+                dets = np.concatenate(frame.parts)
+                # an item cut by two overlapping crops shows up in both
+                dets = dets[nms(dets[:, :4], dets[:, 4], dets[:, 5].astype(np.int64), self.iou)]
+            else:
+                dets = empty_detections()
+            try:
+                self.on_frame(frame.bin_id, frame.seq, dets, frame.names, frame.size)
+            except Exception as e:
+                print(f"[crops] on_frame failed for {frame.bin_id}#{frame.seq}: {e}")
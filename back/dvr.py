@@ -0,0 +1,245 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+
+from app.videofeed import clip_path, default_clip_dir
+
+
+class JpegRing:
+    """
+    The last max_seconds of compressed frames, in one preallocated
+    max_bytes buffer: memory use is fixed no matter the bitrate or frame
+    rate. Frames are stored back to back and wrap around to the start when
+    the end is reached; whatever the new frame overwrites (or anything
+    older than max_seconds) is dropped from the index.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_seconds=30.0):
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self._buf = bytearray(max_bytes)
+        self._view = memoryview(self._buf)
+        self._index = deque()     # (timestamp, offset, length), oldest first
+        self._head = 0            # where the next frame goes
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._index)
+
+    def append(self, jpeg, timestamp=None):
+        size = len(jpeg)
+        if size > self.max_bytes:
+            return False
+        ts = time.time() if timestamp is None else timestamp
+        with self._lock:
+            start = self._head if self._head + size <= self.max_bytes else 0
+            if start == 0:
+                # wrapping: frames past the head are the oldest; drop them so
+                # the index stays in buffer order from here on
+                while self._index and self._index[0][1] >= self._head:
+                    self._index.popleft()
+            end = start + size
+            # drop frames whose bytes we are about to overwrite
+            while self._index:
+                _, off, length = self._index[0]
+                if off < end and start < off + length:
+                    self._index.popleft()
+                else:
+                    break
+            self._view[start:end] = jpeg
+            self._index.append((ts, start, size))
+            self._head = end
+            while self._index and self._index[0][0] < ts - self.max_seconds:
+                self._index.popleft()
+        return True
+
+    def span(self):
+        """(oldest, newest) timestamp held, or None when empty."""
+        with self._lock:
+            if not self._index:
+                return None
+            return self._index[0][0], self._index[-1][0]
+
+    def frames_between(self, start, end):
+        """[(timestamp, jpeg bytes)] for frames with start <= timestamp <= end (copies)."""
+        with self._lock:
+            return [
+                (ts, bytes(self._view[off:off + length]))
+                for ts, off, length in self._index
+                if start <= ts <= end
+            ]
+
+
+class ClipRecorder:
+    """
+    Exports clips from a JpegRing. mark(clip_id) notes the current time;
+    once post_s more seconds have been recorded a background thread copies
+    the frames from pre_s before to post_s after and writes them to
+    <clip_dir>/<clip_id>.mjpeg (the JPEGs back to back, playable with
+    ffplay/VLC - nothing is re-encoded) with a .json of frame timestamps.
+
+    Marks whose windows overlap while pending become one clip (up to the
+    ring's length); the later ids are hard links to the same file, so each
+    event still has its clip and no frame is written twice. A mark that
+    overlaps a clip already written starts where that one ended. The clip
+    directory is capped at max_bytes: the least recently used clips go
+    first, where "used" is the file mtime, which the API touches on every
+    download (like the snapshot store).
+    """
+
+    def __init__(self, ring, clip_dir=None, pre_s=10.0, post_s=5.0, max_pending=32,
+                 max_bytes=1024 * 1024 * 1024):
+        self.ring = ring
+        self.clip_dir = Path(clip_dir or default_clip_dir())
+        self.pre_s = pre_s
+        self.post_s = post_s
+        self.max_pending = max_pending
+        self.max_bytes = max_bytes
+        self.written = 0
+        self.merged = 0
+        self.dropped = 0
+        self.evicted = 0
+
+        self._pending = []        # [due, [clip_ids], start, end]
+        self._written_until = 0.0  # end of the newest clip written
+        self._clips = OrderedDict()  # first clip id -> (bytes, mtime, [clip ids]), oldest first
+        self._total = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="clip-recorder", daemon=True)
+        self._thread.start()
+
+    def mark(self, clip_id, at=None, pre_s=None, post_s=None):
+        at = time.time() if at is None else at
+        pre_s = self.pre_s if pre_s is None else min(pre_s, self.ring.max_seconds)
+        post_s = self.post_s if post_s is None else min(post_s, self.ring.max_seconds)
+        start, end = at - pre_s, at + post_s
+        with self._cond:
+            for pending in self._pending:
+                _, ids, p_start, p_end = pending
+                if start <= p_end and p_start <= end and max(end, p_end) - min(start, p_start) <= self.ring.max_seconds:
+                    pending[0] = pending[3] = max(end, p_end)
+                    pending[2] = min(start, p_start)
+                    ids.append(clip_id)
+                    self.merged += 1
+                    self._cond.notify()
+                    return True
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending.append([end, [clip_id], start, end])
+            self._cond.notify()
+        return True
+
+    def close(self):
+        """Stop without waiting for clips whose post-roll hasn't been recorded."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5.0)
+
+    def _run(self):
+        self._scan()
+        while True:
+            with self._cond:
+                while not self._closed:
+                    now = time.time()
+                    due = [p for p in self._pending if p[0] <= now]
+                    if due:
+                        break
+                    wait = min((p[0] for p in self._pending), default=now + 1.0) - now
+                    self._cond.wait(max(0.05, wait))
+                if self._closed:
+                    return
+                self._pending = [p for p in self._pending if p[0] > now]
+            for _, ids, start, end in sorted(due, key=lambda p: p[2]):
+                # frames before _written_until are in the previous clip already
+                start = max(start, self._written_until)
+                try:
+                    self._write(ids, self.ring.frames_between(start, end))
+                except Exception as e:
+                    print(f"[dvr] Failed to write clip {ids[0]}: {e}")
+                self._written_until = max(self._written_until, end)
+
+    def _scan(self):
+        """Size and age of the clips already on disk (hard links count once)."""
+        found = {}
+        for path in self.clip_dir.glob("*.mjpeg"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            key = (st.st_dev, st.st_ino)
+            mtime, size, ids = found.get(key, (st.st_mtime, st.st_size, []))
+            ids.append(path.stem)
+            found[key] = (max(mtime, st.st_mtime), size, ids)
+        for mtime, size, ids in sorted(found.values()):
+            self._clips[ids[0]] = (size, mtime, ids)
+            self._total += size
+
+    def _write(self, ids, frames):
+        clip_id = ids[0]
+        if not frames:
+            print(f"[dvr] No frames buffered for clip {clip_id}")
+            return
+        path = clip_path(self.clip_dir, clip_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        size = 0
+        with open(tmp, "wb") as f:
+            for _, jpeg in frames:
+                f.write(jpeg)
+                size += len(jpeg)
+        meta = {
+            "clip_id": clip_id,
+            "clip_ids": ids,
+            "start": frames[0][0],
+            "end": frames[-1][0],
+            "frames": len(frames),
+            "timestamps": [round(ts, 3) for ts, _ in frames],
+        }
+        for other in ids:
+            with open(clip_path(self.clip_dir, other).with_suffix(".json"), "w", encoding="utf-8") as f:
+                json.dump(dict(meta, clip_id=other), f)
+        os.replace(tmp, path)  # the .mjpeg appears only once it is complete
+        for other in ids[1:]:
+            try:
+                os.link(path, clip_path(self.clip_dir, other))
+            except FileExistsError:
+                pass
+        self._clips[clip_id] = (size, path.stat().st_mtime, ids)
+        self._total += size
+        self.written += 1
+        print(f"[dvr] Wrote clip {path.name}: {len(frames)} frames, "
+              f"{frames[-1][0] - frames[0][0]:.1f}s" + (f", {len(ids)} events" if len(ids) > 1 else ""))
+        self._evict(keep=clip_id)
+
+    def _evict(self, keep):
+        while self._total > self.max_bytes and len(self._clips) > 1:
+            clip_id, (size, mtime, ids) = next(iter(self._clips.items()))
+            if clip_id == keep:
+                break  # everything older was just used; stay over the cap until next time
+            current = mtime
+            for other in ids:
+                try:
+                    current = max(current, clip_path(self.clip_dir, other).stat().st_mtime)
+                except FileNotFoundError:
+                    pass
+            if current > mtime:
+                # downloaded since we last looked: recently used after all
+                self._clips[clip_id] = (size, current, ids)
+                self._clips.move_to_end(clip_id)
+                continue
+            del self._clips[clip_id]
+            self._total -= size
+            self.evicted += 1
+            for other in ids:
+                base = clip_path(self.clip_dir, other)
+                for victim in (base, base.with_suffix(".json")):
+                    try:
+                        victim.unlink()
+                    except FileNotFoundError:
+                        pass
@@ -0,0 +1,285 @@
+"""
+Edge side of split mode: cheap motion detection on the Pi's stream, JPEG
+crops of the changed regions sent to the central crop server
+(crop_server.py) instead of the full stream.
+
+    cd back && PI_URL=... python -m edge_prefilter --server HOST:PORT --bin bin-1
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+
+import cv2
+import numpy as np
+from dotenv import load_dotenv
+
+from stream import StreamReader
+
+# message: total length (u32) | header length (u32) | header JSON | blobs
+_LENGTHS = struct.Struct("!II")
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024   # a frame's crops are far smaller; anything bigger is garbage
+MAX_HEADER_BYTES = 64 * 1024
+
+
+def pack_message(header: dict, blobs) -> bytes:
+    header = dict(header, sizes=[len(b) for b in blobs])
+    head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    body = b"".join(blobs)
+    return _LENGTHS.pack(4 + len(head) + len(body), len(head)) + head + body
+
+
+def read_message(stream, max_bytes=MAX_MESSAGE_BYTES):
+    """
+    (header, blobs) from a binary file-like object, or None at EOF.
+    Raises ValueError for a malformed or oversized message; the lengths
+    are checked before anything is allocated for them.
+    """
+    prefix = stream.read(_LENGTHS.size)
+    if len(prefix) < _LENGTHS.size:
+        return None
+    total, head_len = _LENGTHS.unpack(prefix)
+    if total < 4 or total > max_bytes:
+        raise ValueError(f"message length {total} out of range")
+    if head_len > min(total - 4, MAX_HEADER_BYTES):
+        raise ValueError(f"header length {head_len} out of range")
+    payload = stream.read(total - 4)
+    if len(payload) < total - 4:
+        return None
+    header = json.loads(payload[:head_len])
+    sizes = header.get("sizes") if isinstance(header, dict) else None
+    if (not isinstance(sizes, list)
+            or not all(isinstance(size, int) and size >= 0 for size in sizes)
+            or sum(sizes) != total - 4 - head_len):
+        raise ValueError("header sizes don't match the message")
+    blobs, offset = [], head_len
+    for size in sizes:
+        blobs.append(payload[offset:offset + size])
+        offset += size
+    return header, blobs
+
+
+def _merge(boxes):
+    """Union overlapping xyxy boxes until none overlap."""
+    boxes = [list(b) for b in boxes]
+    merged = True
+    while merged:
+        merged = False
+        out = []
+        while boxes:
+            a = boxes.pop()
+            for b in boxes:
+                if a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]:
+                    b[0], b[1] = min(a[0], b[0]), min(a[1], b[1])
+                    b[2], b[3] = max(a[2], b[2]), max(a[3], b[3])
+                    merged = True
+                    break
+            else:
+                out.append(a)
+        boxes = out
+    return [tuple(b) for b in boxes]
+
+
+class MotionCropper:
+    """
+    Regions of the frame that changed, in full-resolution xyxy.
+
+    Motion is a frame-vs-running-background difference on a small grayscale
+    copy (width px wide). Changed blobs are padded by `pad` (fraction of
+    their size), merged when they overlap, and kept for hold_frames after
+    the motion stops so a newly dropped item is still sent for the few
+    frames the tracker needs to call it stable. More than max_crops
+    regions collapse into their bounding union.
+    """
+
+    def __init__(self, width=320, thresh=25, min_area_frac=0.0005, pad=0.25,
+                 hold_frames=6, max_crops=4, bg_alpha=0.05, min_crop_px=96):
+        self.width = width
+        self.thresh = thresh
+        self.min_area_frac = min_area_frac
+        self.pad = pad
+        self.hold_frames = hold_frames
+        self.max_crops = max_crops
+        self.bg_alpha = bg_alpha
+        self.min_crop_px = min_crop_px
+        self._bg = None
+        self._held = []          # [region, frames left]
+        self._kernel = np.ones((3, 3), np.uint8)
+
+    def regions(self, frame):
+        h, w = frame.shape[:2]
+        scale = w / float(self.width)
+        small_h = max(1, int(round(h / scale)))
+        small = cv2.cvtColor(cv2.resize(frame, (self.width, small_h), interpolation=cv2.INTER_AREA),
+                             cv2.COLOR_BGR2GRAY)
+        small = cv2.GaussianBlur(small, (5, 5), 0)
+
+        if self._bg is None or self._bg.shape != small.shape:
+            self._bg = small.astype(np.float32)
+            self._held = []
+            return []
+
+        diff = cv2.absdiff(small, cv2.convertScaleAbs(self._bg))
+        cv2.accumulateWeighted(small, self._bg, self.bg_alpha)
+        _, mask = cv2.threshold(diff, self.thresh, 255, cv2.THRESH_BINARY)
+        mask = cv2.dilate(mask, self._kernel, iterations=2)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        min_area = self.min_area_frac * mask.size
+        fresh = []
+        for c in contours:
+            x, y, cw, ch = cv2.boundingRect(c)
+            if cw * ch < min_area:
+                continue
+            fresh.append(self._to_frame(x, y, x + cw, y + ch, scale, w, h))
+
+        self._held = [[r, n - 1] for r, n in self._held if n > 1]
+        self._held.extend([r, self.hold_frames] for r in fresh)
+        regions = _merge([r for r, _ in self._held])
+        if len(regions) > self.max_crops:
+            regions = [(
+                min(r[0] for r in regions), min(r[1] for r in regions),
+                max(r[2] for r in regions), max(r[3] for r in regions),
+            )]
+        return regions
+
+    def _to_frame(self, x1, y1, x2, y2, scale, w, h):
+        x1, y1, x2, y2 = x1 * scale, y1 * scale, x2 * scale, y2 * scale
+        pad_x = max((x2 - x1) * self.pad, (self.min_crop_px - (x2 - x1)) / 2)
+        pad_y = max((y2 - y1) * self.pad, (self.min_crop_px - (y2 - y1)) / 2)
+        return (
+            max(0, int(x1 - pad_x)), max(0, int(y1 - pad_y)),
+            min(w, int(x2 + pad_x)), min(h, int(y2 + pad_y)),
+        )
+
+
+def encode_crops(frame, regions, quality=85):
+    """[(region, jpeg bytes)] for each region of frame."""
+    out = []
+    for x1, y1, x2, y2 in regions:
+        ok, buf = cv2.imencode(".jpg", frame[y1:y2, x1:x2], [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if ok:
+            out.append(((x1, y1, x2, y2), buf.tobytes()))
+    return out
+
+
+class EdgeSender:
+    """
+    Sends crop messages to the crop server over one TCP connection, from a
+    background thread. Reconnects with backoff; when the link can't keep up
+    the oldest queued frame is dropped (the newest crops matter most).
+    Every message carries this process's epoch, so the server knows a
+    restarted node's sequence numbers start over.
+    """
+
+    def __init__(self, host, port, max_queue=8, backoff_initial=0.5, backoff_max=10.0, token=""):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.epoch = time.time_ns() // 1_000_000
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.bytes_sent = 0
+        self.messages = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="edge-sender", daemon=True)
+        self._thread.start()
+
+    def send(self, bin_id, seq, frame_shape, crops, timestamp=None):
+        header = {
+            "bin": bin_id,
+            "epoch": self.epoch,
+            "seq": seq,
+            "ts": time.time() if timestamp is None else timestamp,
+            "frame": [int(frame_shape[1]), int(frame_shape[0])],
+            "regions": [list(region) for region, _ in crops],
+        }
+        if self.token:
+            header["token"] = self.token
+        message = pack_message(header, [jpeg for _, jpeg in crops])
+        while True:
+            try:
+                self._queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def close(self):
+        self._closed.set()
+        self._thread.join(timeout=2.0)
+
+    def _run(self):
+        sock = None
+        backoff = self.backoff_initial
+        while not self._closed.is_set():
+            try:
+                message = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            while not self._closed.is_set():
+                try:
+                    if sock is None:
+                        sock = socket.create_connection((self.host, self.port), timeout=5.0)
+                        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    sock.sendall(message)
+                    self.bytes_sent += len(message)
+                    self.messages += 1
+                    backoff = self.backoff_initial
+                    break
+                except OSError as e:
+                    print(f"[edge] Crop server {self.host}:{self.port} unavailable ({e}), retrying")
+                    if sock is not None:
+                        sock.close()
+                        sock = None
+                    self._closed.wait(backoff)
+                    backoff = min(backoff * 2, self.backoff_max)
+        if sock is not None:
+            sock.close()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Send motion crops to the central crop server")
+    parser.add_argument("--server", required=True, help="crop server HOST:PORT")
+    parser.add_argument("--bin", default=os.getenv("CAMERA_ID", socket.gethostname()))
+    parser.add_argument("--url", default=os.getenv("PI_URL"))
+    parser.add_argument("--quality", type=int, default=85)
+    parser.add_argument("--token", default=os.getenv("CROP_TOKEN", ""), help="shared secret of the crop server")
+    args = parser.parse_args()
+
+    host, port = args.server.rsplit(":", 1)
+    sender = EdgeSender(host, int(port), token=args.token)
+    cropper = MotionCropper()
+    cap = StreamReader(args.url)
+    seq = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            seq += 1
+            regions = cropper.regions(frame)
+            if regions:
+                sender.send(args.bin, seq, frame.shape, encode_crops(frame, regions, args.quality))
+            if seq % 300 == 0:
+                print(f"[edge] {seq} frames, {sender.messages} sent, {sender.bytes_sent / 1e6:.1f} MB, "
+                      f"{sender.dropped} dropped")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cap.close()
+        sender.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from app.shared import attach_untracked
+
+_EMPTY = -1
+_WRITING = -2
+
+
+class FrameRing:
+    """
+    Fixed ring of preallocated frames in one shared-memory block.
+
+    One capture process write()s decoded frames; any number of inference
+    processes get NumPy views of the same memory (no pickling, no copies).
+    A reader pins the slot it takes (claim_latest / pin) and the writer
+    skips pinned slots, so a frame can't be overwritten or torn while it's
+    being used however slow inference is; release() hands the slot back.
+    A pin may be released by another process (the one the result went to).
+
+    Every process passes the same multiprocessing lock: it guards slot
+    choice and pin counts, never a frame copy.
+
+    Layout: int64 header [latest_seq, claimed_seq, slot_seq * slots,
+    pins * slots] then `slots` frames of `shape` uint8.
+    """
+
+    def __init__(self, name, shape, slots, lock, create=False):
+        self.name = name
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.lock = lock
+        self.dropped = 0  # writer: frames skipped because every slot was pinned
+        self._next = 0
+        header_bytes = 8 * (2 + 2 * slots)
+        self._frames_offset = (header_bytes + 63) // 64 * 64
+        frame_bytes = int(np.prod(self.shape))
+        size = self._frames_offset + frame_bytes * slots
+
+        self.create = create
+        if create:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            # readers must not unlink the capture process's block on exit
+            self._shm = attach_untracked(name)
+
+        header = np.ndarray((2 + 2 * slots,), dtype=np.int64, buffer=self._shm.buf)
+        self._header = header
+        self._seqs = header[2:2 + slots]
+        self._pins = header[2 + slots:]
+        self._frames = np.ndarray(
+            (slots,) + self.shape, dtype=np.uint8, buffer=self._shm.buf, offset=self._frames_offset
+        )
+        if create:
+            self._header[:2] = 0
+            self._seqs[:] = _EMPTY
+            self._pins[:] = 0
+
+    @staticmethod
+    def slots_needed(readers, queued):
+        """
+        Slots for `readers` processes each pinning one frame, `queued` pinned
+        results waiting for their consumer plus the one it is drawing, the
+        newest frame and the one being written: with that many, write()
+        never has to drop a frame.
+        """
+        return readers + queued + 3
+
+    # ---------- writer ----------
+
+    def write(self, frame):
+        """Copy one frame into a free slot; returns its sequence number, or None if all were pinned."""
+        with self.lock:
+            latest = int(self._header[0])
+            for i in range(self.slots):
+                slot = (self._next + i) % self.slots
+                if self._pins[slot] == 0 and self._seqs[slot] != latest:
+                    break
+            else:
+                self.dropped += 1
+                return None
+            self._seqs[slot] = _WRITING
+        self._next = slot + 1
+        np.copyto(self._frames[slot], frame)
+        seq = latest + 1
+        with self.lock:
+            self._seqs[slot] = seq
+            self._header[0] = seq
+        return seq
+
+    # ---------- readers ----------
+
+    @property
+    def latest_seq(self):
+        return int(self._header[0])
+
+    def _slot(self, seq):
+        slots = np.flatnonzero(self._seqs == seq)
+        return int(slots[0]) if len(slots) else None
+
+    def claim_latest(self):
+        """
+        Newest frame no other reader has taken yet, pinned: (seq, view) or
+        (None, None). Frames older than the newest are skipped, never queued.
+        """
+        with self.lock:
+            latest = int(self._header[0])
+            if latest <= self._header[1]:
+                return None, None
+            self._header[1] = latest
+            slot = self._slot(latest)
+            if slot is None:
+                return None, None
+            self._pins[slot] += 1
+        return latest, self._frames[slot]
+
+    def pin(self, seq):
+        """Pinned zero-copy view of frame `seq`, or None if it's no longer in the ring."""
+        with self.lock:
+            slot = self._slot(seq)
+            if slot is None:
+                return None
+            self._pins[slot] += 1
+        return self._frames[slot]
+
+    def view(self, seq):
+        """Zero-copy view of frame `seq` for a caller holding (or handed) its pin."""
+        slot = self._slot(seq)
+        return self._frames[slot] if slot is not None else None
+
+    def release(self, seq):
+        """Drop one pin on frame `seq` (from claim_latest or pin)."""
+        with self.lock:
+            slot = self._slot(seq)
+            if slot is not None and self._pins[slot] > 0:
+                self._pins[slot] -= 1
+
+    def close(self):
+        # drop our numpy views before closing the mapping
+        self._header = self._seqs = self._pins = None
+        self._frames = None
+        self._shm.close()
+        if self.create:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,134 @@
+import gzip
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+
+
+class IngestClient:
+    """
+    Ships events from an edge vision node to a central API's
+    POST /events/batch.
+
+    publish() only appends to an in-memory buffer (same interface as
+    app.eventbus.EventPublisher). A background thread sends up to
+    batch_size events per request, gzip-compressed, once a batch is full or
+    flush_interval_s has passed. Every event gets a sequence number within
+    this process's epoch, so a retried batch is never stored twice; events
+    stay buffered until the server acknowledges them, with exponential
+    backoff while it's unreachable. If the buffer reaches max_buffer the
+    oldest events are dropped (and counted) - the local csv still has them.
+    """
+
+    def __init__(self, base_url, node_id, batch_size=500, flush_interval_s=0.5,
+                 max_buffer=100_000, timeout_s=5.0, token="", backoff_initial=0.5,
+                 backoff_max=30.0):
+        self.url = base_url.rstrip("/") + "/events/batch"
+        self.node_id = node_id
+        self.epoch = time.time_ns() // 1_000_000
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.max_buffer = max_buffer
+        self.timeout_s = timeout_s
+        self.token = token
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self.sent = 0
+        self.dropped = 0
+        self.failures = 0
+
+        self._seq = 0
+        self._buffer = deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._close_deadline = None
+        self._thread = threading.Thread(target=self._run, name="ingest-client", daemon=True)
+        self._thread.start()
+
+    def publish(self, event: dict) -> bool:
+        with self._cond:
+            self._seq += 1
+            self._buffer.append(dict(event, seq=self._seq))
+            if len(self._buffer) > self.max_buffer:
+                self._buffer.popleft()
+                self.dropped += 1
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def close(self, timeout_s: float = 10.0):
+        """Try to deliver what's buffered (up to timeout_s), then stop."""
+        with self._cond:
+            self._closing = True
+            self._close_deadline = time.monotonic() + timeout_s
+            self._cond.notify()
+        self._thread.join(timeout=timeout_s + self.timeout_s)
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    # ---------- sender thread ----------
+
+    def _run(self):
+        backoff = self.backoff_initial
+        while True:
+            with self._cond:
+                if not self._closing and len(self._buffer) < self.batch_size:
+                    self._cond.wait(self.flush_interval_s)
+                if not self._buffer:
+                    if self._closing:
+                        return
+                    continue
+                batch = [self._buffer[i] for i in range(min(self.batch_size, len(self._buffer)))]
+
+            ack, delivered = self._send(batch)
+            if ack is None:
+                self.failures += 1
+                if self._closing and time.monotonic() >= self._close_deadline:
+                    print(f"[ingest] Giving up with {len(self._buffer)} events unsent")
+                    return
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
+                continue
+
+            backoff = self.backoff_initial
+            with self._cond:
+                while self._buffer and self._buffer[0]["seq"] <= ack:
+                    self._buffer.popleft()
+                    if delivered:
+                        self.sent += 1
+
+    def _send(self, batch):
+        """
+        POST one batch. Returns (acknowledged seq, delivered); seq is None
+        if the batch should be retried.
+        """
+        body = gzip.compress(
+            json.dumps({"node_id": self.node_id, "epoch": self.epoch, "events": batch}).encode("utf-8"),
+            compresslevel=5,
+        )
+        headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        if self.token:
+            headers["X-Ingest-Token"] = self.token
+        request = urllib.request.Request(self.url, data=body, headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout_s) as resp:
+                result = json.loads(resp.read())
+        except urllib.error.HTTPError as e:
+            if e.code == 400:
+                # the server will never take this batch; don't retry it forever
+                print(f"[ingest] Batch rejected: {e.read()[:200]!r}, dropping {len(batch)} events")
+                self.dropped += len(batch)
+                return batch[-1]["seq"], False
+            print(f"[ingest] {self.url} answered {e.code}, retrying")
+            return None, False
+        except (OSError, ValueError) as e:
+            print(f"[ingest] {self.url} unreachable ({e}), retrying")
+            return None, False
+        if result.get("stale_epoch"):
+            return batch[-1]["seq"], False
+        return result["ack_seq"], True
@@ -0,0 +1,148 @@
+import numpy as np
+
+
+def xyxy_to_cxcywh(boxes):
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    out = np.empty_like(boxes)
+    out[:, 0] = (boxes[:, 0] + boxes[:, 2]) * 0.5
+    out[:, 1] = (boxes[:, 1] + boxes[:, 3]) * 0.5
+    out[:, 2] = boxes[:, 2] - boxes[:, 0]
+    out[:, 3] = boxes[:, 3] - boxes[:, 1]
+    return out
+
+
+def cxcywh_to_xyxy(boxes):
+    out = np.empty_like(boxes)
+    half_w = np.maximum(boxes[:, 2], 1.0) * 0.5
+    half_h = np.maximum(boxes[:, 3], 1.0) * 0.5
+    out[:, 0] = boxes[:, 0] - half_w
+    out[:, 1] = boxes[:, 1] - half_h
+    out[:, 2] = boxes[:, 0] + half_w
+    out[:, 3] = boxes[:, 1] + half_h
+    return out
+
+
+def iou_matrix(a, b):
+    """IoU between every box in a (M,4) and every box in b (N,4), xyxy."""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+
+    iw = np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0])
+    ih = np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1])
+    inter = np.clip(iw, 0, None) * np.clip(ih, 0, None)
+
+    area_a = np.clip(a[:, 2] - a[:, 0], 0, None) * np.clip(a[:, 3] - a[:, 1], 0, None)
+    area_b = np.clip(b[:, 2] - b[:, 0], 0, None) * np.clip(b[:, 3] - b[:, 1], 0, None)
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def greedy_match(ious, threshold):
+    """
+    One-to-one assignment, highest IoU first.
+    Returns {row: col} for pairs with IoU > threshold.
+    """
+    if ious.size == 0:
+        return {}
+    rows, cols = np.nonzero(ious > threshold)
+    order = np.argsort(-ious[rows, cols], kind="stable")
+    matches = {}
+    used_cols = set()
+    for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if r in matches or c in used_cols:
+            continue
+        matches[r] = c
+        used_cols.add(c)
+    return matches
+
+
+class KalmanBoxBank:
+    """
+    Constant-velocity Kalman filters for all live tracks, stored as stacked
+    arrays so predict/update run once per frame for every track.
+
+    State per track: [cx, cy, w, h, vcx, vcy, vw, vh], velocities in px/s,
+    so prediction scales with the real time between processed frames and
+    holds up when the loop only manages a few FPS. Noise is proportional
+    to box height (as in SORT/DeepSORT).
+    """
+
+    def __init__(self, pos_weight=1.0 / 20, vel_weight=1.0 / 2):
+        self.pos_weight = pos_weight
+        self.vel_weight = vel_weight
+        self.clear()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def clear(self):
+        self.ids = []
+        self._index = {}
+        self.x = np.zeros((0, 8))
+        self.P = np.zeros((0, 8, 8))
+
+    def add(self, track_id, bbox):
+        z = xyxy_to_cxcywh(bbox)
+        x = np.zeros((1, 8))
+        x[:, :4] = z
+        h = max(z[0, 3], 1.0)
+        std = np.array([2 * self.pos_weight * h] * 4 + [10 * self.vel_weight * h] * 4)
+
+        self._index[track_id] = len(self.ids)
+        self.ids.append(track_id)
+        self.x = np.concatenate([self.x, x])
+        self.P = np.concatenate([self.P, np.diag(std ** 2)[None]])
+
+    def remove(self, track_id):
+        row = self._index.pop(track_id, None)
+        if row is None:
+            return
+        last = len(self.ids) - 1
+        if row != last:
+            # move the last filter into the hole
+            moved = self.ids[last]
+            self.ids[row] = moved
+            self._index[moved] = row
+            self.x[row] = self.x[last]
+            self.P[row] = self.P[last]
+        self.ids.pop()
+        self.x = self.x[:last]
+        self.P = self.P[:last]
+
+    def predict(self, dt):
+        """Advance every filter by dt seconds; returns (ids, predicted xyxy boxes)."""
+        if len(self.ids) and dt > 0:
+            F = np.eye(8)
+            F[:4, 4:] = np.eye(4) * dt
+            self.x = self.x @ F.T
+
+            h = np.maximum(self.x[:, 3], 1.0)
+            q = np.empty((len(self.ids), 8))
+            q[:, :4] = ((self.pos_weight * h) ** 2 * dt)[:, None]
+            q[:, 4:] = ((self.vel_weight * h) ** 2 * dt)[:, None]
+
+            self.P = F @ self.P @ F.T
+            diag = np.arange(8)
+            self.P[:, diag, diag] += q
+        return list(self.ids), cxcywh_to_xyxy(self.x[:, :4])
+
+    def update(self, track_ids, bboxes):
+        """Correct the listed filters with their matched measurements (batched)."""
+        if not track_ids:
+            return
+        rows = np.array([self._index[t] for t in track_ids])
+        z = xyxy_to_cxcywh(bboxes)
+        x = self.x[rows]
+        P = self.P[rows]
+
+        h = np.maximum(x[:, 3], 1.0)
+        S = P[:, :4, :4].copy()
+        diag = np.arange(4)
+        S[:, diag, diag] += ((self.pos_weight * h) ** 2)[:, None]
+
+        K = P[:, :, :4] @ np.linalg.inv(S)          # (k, 8, 4)
+        y = z - x[:, :4]
+        self.x[rows] = x + (K @ y[:, :, None])[:, :, 0]
+        self.P[rows] = P - K @ P[:, :4, :]
@@ -0,0 +1,66 @@
+import numpy as np
+
+# Detections travel as one (N, 6) float32 array: x1, y1, x2, y2, conf, cls.
+# Box corners are whole pixels in full-frame coordinates.
+X1, Y1, X2, Y2, CONF, CLS = range(6)
+DET_COLUMNS = 6
+
+
+def empty_detections():
+    return np.zeros((0, DET_COLUMNS), dtype=np.float32)
+
+
+class ClassTable:
+    """
+    Class id -> (label, coarse, bin_type), resolved once per model vocabulary
+    instead of once per box. `classify` is the label -> (coarse, bin_type)
+    function; unmapped labels get None for both.
+    """
+
+    def __init__(self, names, classify):
+        self.names = names
+        size = max(names) + 1 if names else 0
+        self.labels = np.full(size, "", dtype=object)
+        self.coarse = np.full(size, None, dtype=object)
+        self.bin_type = np.full(size, None, dtype=object)
+        for cls, label in names.items():
+            self.labels[cls] = label
+            self.coarse[cls], self.bin_type[cls] = classify(label)
+
+    def lookup(self, classes):
+        """Labels, coarse types and bin types for a whole column of class ids."""
+        idx = np.asarray(classes).astype(np.intp)
+        return self.labels[idx], self.coarse[idx], self.bin_type[idx]
+
+
+def results_to_array(results):
+    """One device -> host transfer of an ultralytics result's boxes: (N, 6) float32."""
+    if len(results.boxes) == 0:
+        return empty_detections()
+    return results.boxes.data.cpu().numpy().astype(np.float32, copy=False)
+
+
+def filter_detections(raw, offset_x, offset_y, conf_thres, min_area):
+    """
+    Whole-array post-processing of raw (N, 6) detections from an ROI crop:
+    truncate to whole pixels, shift into full-frame coordinates and drop
+    boxes under conf_thres or min_area. Returns a new (M, 6) float32 array.
+    """
+    if len(raw) == 0:
+        return empty_detections()
+
+    dets = np.array(raw[:, :DET_COLUMNS], dtype=np.float32)
+    np.trunc(dets[:, :4], out=dets[:, :4])
+    dets[:, [X1, X2]] += offset_x
+    dets[:, [Y1, Y2]] += offset_y
+
+    area = (dets[:, X2] - dets[:, X1]) * (dets[:, Y2] - dets[:, Y1])
+    keep = (dets[:, CONF] >= conf_thres) & (area >= min_area)
+    return dets[keep]
+
+
+def as_array(boxes, confs, classes):
+    """Separate (N,4) / (N,) / (N,) arrays (e.g. from run_tiled) -> (N, 6) float32."""
+    if len(boxes) == 0:
+        return empty_detections()
+    return np.column_stack((boxes, confs, classes)).astype(np.float32, copy=False)
@@ -0,0 +1,121 @@
+import cv2
+import numpy as np
+import torch
+
+try:
+    from ultralytics.utils.nms import non_max_suppression
+except ImportError:
+    try:
+        from ultralytics.utils.ops import non_max_suppression  # older ultralytics
+    except ImportError:
+        non_max_suppression = None
+
+PAD_VALUE = 114  # ultralytics' letterbox gray
+
+
+class _Slot:
+    """Letterbox geometry and buffers for one input image shape."""
+
+    def __init__(self, h, w, size, stride, device, dtype, channels_last):
+        r = min(size / h, size / w)
+        nw, nh = round(w * r), round(h * r)
+        # minimal padding to a stride multiple, centered, as ultralytics' LetterBox(auto=True)
+        dw, dh = (size - nw) % stride / 2, (size - nh) % stride / 2
+        self.top, self.left = round(dh - 0.1), round(dw - 0.1)
+        height = nh + self.top + round(dh + 0.1)
+        width = nw + self.left + round(dw + 0.1)
+        self.height, self.width = h, w
+        self.scale = r
+        self.new_size = (nw, nh)
+        self.resized = np.empty((nh, nw, 3), np.uint8) if (nw, nh) != (w, h) else None
+        # CUDA: upload uint8 (a third of the bytes), convert on the device
+        self.staging = (
+            torch.empty((nh, nw, 3), dtype=torch.uint8, device=device)
+            if torch.device(device).type != "cpu" else None
+        )
+        memory_format = torch.channels_last if channels_last else torch.contiguous_format
+        self.tensor = torch.full((1, 3, height, width), PAD_VALUE / 255, dtype=dtype, device=device)
+        self.tensor = self.tensor.contiguous(memory_format=memory_format)
+        # the border never changes; each frame only rewrites the image area
+        self.interior = self.tensor[0, :, self.top:self.top + nh, self.left:self.left + nw]
+
+    def fill(self, image):
+        if self.resized is not None:
+            cv2.resize(image, self.new_size, dst=self.resized, interpolation=cv2.INTER_LINEAR)
+            image = self.resized
+        src = torch.from_numpy(image)  # ROI slices are fine: any strides
+        if self.staging is not None:
+            self.staging.copy_(src, non_blocking=False)
+            src = self.staging
+        # BGR -> RGB and uint8 -> float in the copy, then / 255 in place: no
+        # temporaries (torch.mul(..., out=) would make a float copy of the input)
+        for c in range(3):
+            self.interior[c].copy_(src[:, :, 2 - c])
+        self.interior.mul_(1 / 255)
+        return self.tensor
+
+
+class ModelInput:
+    """
+    The detector's input tensor, built without per-frame allocations.
+
+    ultralytics' own preprocessing letterboxes into a new array, then
+    makes new tensors for the layout change, the BGR -> RGB flip and the
+    float conversion - four or five frame-sized allocations per call.
+    Here the letterbox geometry, the resize buffer and the padded input
+    tensor are created once per input shape (the ROI rarely changes, so
+    normally once) and each frame is resized into the buffer and
+    converted straight into the tensor's image area. Boxes predicted on
+    the tensor go back to image coordinates with to_image().
+
+    Not thread-safe: one instance per inference loop.
+    """
+
+    def __init__(self, size, stride=32, channels_last=False, max_shapes=4):
+        self.size = size
+        self.stride = stride
+        self.channels_last = channels_last
+        self.max_shapes = max_shapes
+        self._slots = {}
+        self._last = None
+
+    def load(self, image, device="cpu", dtype=torch.float32):
+        """(1, 3, H, W) RGB tensor in [0, 1] for a BGR uint8 image. Reused: valid until the next load()."""
+        h, w = image.shape[:2]
+        key = (h, w, str(device), dtype)
+        slot = self._slots.get(key)
+        if slot is None:
+            if len(self._slots) >= self.max_shapes:
+                self._slots.pop(next(iter(self._slots)))
+            slot = self._slots[key] = _Slot(h, w, self.size, self.stride, device, dtype, self.channels_last)
+        self._last = slot
+        return slot.fill(image)
+
+    def to_image(self, dets):
+        """Map (N, 6) xyxy boxes from the last load()'s tensor back to its image, in place."""
+        slot = self._last
+        dets[:, [0, 2]] -= slot.left
+        dets[:, [1, 3]] -= slot.top
+        dets[:, :4] /= slot.scale
+        dets[:, [0, 2]] = dets[:, [0, 2]].clip(0, slot.width)
+        dets[:, [1, 3]] = dets[:, [1, 3]].clip(0, slot.height)
+        return dets
+
+
+def predict(model, model_input, image, conf, iou):
+    """
+    Run an ultralytics model's network on model_input's buffers, skipping
+    its per-call preprocessing and Results objects. Returns ((N, 6) float32
+    detections in `image` coordinates, class names), or None when the model
+    has no predictor yet (the first ordinary model() call builds it).
+    """
+    predictor = getattr(model, "predictor", None)
+    backend = getattr(predictor, "model", None)
+    if backend is None or non_max_suppression is None:
+        return None
+    dtype = torch.float16 if getattr(backend, "fp16", False) else torch.float32
+    im = model_input.load(image, backend.device, dtype)
+    preds = backend(im)
+    det = non_max_suppression(preds, conf, iou, max_det=predictor.args.max_det)[0]
+    raw = det[:, :6].float().cpu().numpy()
+    return model_input.to_image(raw), backend.names
@@ -0,0 +1,158 @@
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from checkpoint import atomic_write_json, load_json
+
+
+class RoiCalibrator:
+    """
+    Learns where items actually show up for one camera and proposes a tight ROI.
+
+    While calibrating, inference runs on the full frame and every frame adds
+    to a coarse heatmap: detection boxes (strong signal) plus cheap frame-
+    difference motion (weak signal). After warmup_s the ROI is the smallest
+    rectangle holding `coverage` of the heat, padded by `margin`, and it is
+    saved to `path` keyed by camera id.
+
+    Once locked, motion is still accumulated (it's full-frame and cheap); at
+    every revalidate_s, if more than outside_tolerance of the motion fell
+    outside the ROI, calibration starts over.
+    """
+
+    MOTION_WIDTH = 160      # motion is computed on a tiny grayscale copy
+    MOTION_THRESH = 25      # per-pixel diff that counts as motion
+    MOTION_WEIGHT = 0.2     # one box ~ five frames of full-cell motion
+
+    def __init__(self, camera_id, path, warmup_s=120.0, grid=32, coverage=0.98,
+                 margin=0.05, revalidate_s=3600.0, outside_tolerance=0.05):
+        self.camera_id = camera_id
+        self.path = path
+        self.warmup_s = warmup_s
+        self.grid = grid
+        self.coverage = coverage
+        self.margin = margin
+        self.revalidate_s = revalidate_s
+        self.outside_tolerance = outside_tolerance
+
+        self.roi = None            # (top, bottom, left, right) fractions
+        self._prev_small = None
+        self._start_calibration(time.time())
+
+        saved = self._load()
+        if saved is not None:
+            self.roi = saved
+            self.calibrating = False
+            print(f"[roi] Using saved ROI for {camera_id}: {saved}")
+
+    # ---------- public ----------
+
+    def current_roi(self):
+        """Fractions to crop with right now (full frame while calibrating)."""
+        if self.calibrating or self.roi is None:
+            return (0.0, 1.0, 0.0, 1.0)
+        return self.roi
+
+    def observe_frame(self, frame):
+        """Accumulate motion from the difference to the previous frame."""
+        h, w = frame.shape[:2]
+        small_h = max(1, int(h * self.MOTION_WIDTH / w))
+        small = cv2.cvtColor(cv2.resize(frame, (self.MOTION_WIDTH, small_h)), cv2.COLOR_BGR2GRAY)
+        prev, self._prev_small = self._prev_small, small
+        if prev is None or prev.shape != small.shape:
+            return
+        moving = (cv2.absdiff(small, prev) > self.MOTION_THRESH).astype(np.float32)
+        cells = cv2.resize(moving, (self.grid, self.grid), interpolation=cv2.INTER_AREA)
+        self.heat += cells * self.MOTION_WEIGHT
+        self.motion += cells
+
+    def observe_boxes(self, boxes, frame_w, frame_h):
+        """Add full-frame xyxy detection boxes to the heatmap."""
+        g = self.grid
+        for x1, y1, x2, y2 in boxes:
+            gx1 = min(g - 1, max(0, int(x1 * g / frame_w)))
+            gx2 = min(g - 1, max(0, int(x2 * g / frame_w)))
+            gy1 = min(g - 1, max(0, int(y1 * g / frame_h)))
+            gy2 = min(g - 1, max(0, int(y2 * g / frame_h)))
+            self.heat[gy1:gy2 + 1, gx1:gx2 + 1] += 1.0
+
+    def step(self, now=None):
+        """Call once per frame; finishes calibration / revalidates when due."""
+        now = time.time() if now is None else now
+        elapsed = now - self.phase_start
+
+        if self.calibrating:
+            if elapsed >= self.warmup_s and self.heat.sum() > 0:
+                self.roi = self.propose()
+                self.calibrating = False
+                self.phase_start = now
+                self.motion[:] = 0
+                self._save()
+                print(f"[roi] Calibrated ROI for {self.camera_id}: {self.roi}")
+            return
+
+        if elapsed >= self.revalidate_s:
+            outside = self.outside_fraction()
+            if outside > self.outside_tolerance:
+                print(f"[roi] {outside:.0%} of motion outside ROI, recalibrating {self.camera_id}")
+                self._start_calibration(now)
+            else:
+                self.phase_start = now
+                self.motion[:] = 0
+
+    def propose(self):
+        """Tightest (top, bottom, left, right) holding `coverage` of the heat."""
+        tail = (1.0 - self.coverage) / 2.0
+        top, bottom = self._trim(self.heat.sum(axis=1), tail)
+        left, right = self._trim(self.heat.sum(axis=0), tail)
+        g = float(self.grid)
+        return (
+            round(max(0.0, top / g - self.margin), 3),
+            round(min(1.0, (bottom + 1) / g + self.margin), 3),
+            round(max(0.0, left / g - self.margin), 3),
+            round(min(1.0, (right + 1) / g + self.margin), 3),
+        )
+
+    def outside_fraction(self):
+        total = self.motion.sum()
+        if total <= 0 or self.roi is None:
+            return 0.0
+        top, bottom, left, right = self.roi
+        g = self.grid
+        inside = self.motion[int(top * g):int(np.ceil(bottom * g)), int(left * g):int(np.ceil(right * g))].sum()
+        return float(1.0 - inside / total)
+
+    # ---------- internals ----------
+
+    def _start_calibration(self, now):
+        self.calibrating = True
+        self.phase_start = now
+        self.heat = np.zeros((self.grid, self.grid), np.float32)
+        self.motion = np.zeros((self.grid, self.grid), np.float32)
+
+    @staticmethod
+    def _trim(profile, tail):
+        cdf = np.cumsum(profile) / max(profile.sum(), 1e-9)
+        lo = int(np.searchsorted(cdf, tail, side="right"))
+        hi = int(np.searchsorted(cdf, 1.0 - tail, side="left"))
+        return lo, max(lo, min(hi, len(profile) - 1))
+
+    def _load(self):
+        entry = (load_json(self.path) or {}).get(self.camera_id)
+        if not entry:
+            return None
+        return (entry["top"], entry["bottom"], entry["left"], entry["right"])
+
+    def _save(self):
+        data = load_json(self.path) or {}
+        top, bottom, left, right = self.roi
+        data[self.camera_id] = {
+            "top": top, "bottom": bottom, "left": left, "right": right,
+            "updated": datetime.now().isoformat(),
+        }
+        try:
+            atomic_write_json(self.path, data, indent=2)
+        except Exception as e:
+            print(f"[roi] Failed to save ROI: {e}")
@@ -0,0 +1 @@
+"""Local stand-ins for the Pi camera and sensors, for development and load tests."""
@@ -0,0 +1,163 @@
+"""
+Fake depth sensor: the UDP fill-level protocol app/fill_subscriber.py and
+/fill/ speak.
+
+    cd back && python -m simulator.depth_sensor [--rate 2] [--jitter 0.2] [--port 5002]
+    UDP_SERVER_HOST=127.0.0.1 UDP_SERVER_PORT=5002 ./start.sh
+
+A client sends the datagram b"SUBSCRIBE"; the sensor answers right away
+and then pushes {"fill_percentage": ...} JSON to it --rate times a
+second, each packet delayed by up to --jitter of the interval and lost
+with probability --loss. Subscribers that don't renew within --ttl
+seconds are forgotten, as the real sensor does. The fill level creeps up
+with noise and drops back to empty when the bin is "emptied" at 100%.
+"""
+import argparse
+import json
+import random
+import socket
+import threading
+import time
+
+
+class FillModel:
+    """Fill percentage that rises by `per_s` a second with noise and resets at 100."""
+
+    def __init__(self, start=10.0, per_s=0.5, noise=0.8, seed=None):
+        self.level = start
+        self.per_s = per_s
+        self.noise = noise
+        self._rng = random.Random(seed)
+        self._last = time.monotonic()
+
+    def read(self):
+        now = time.monotonic()
+        self.level += self.per_s * (now - self._last)
+        self._last = now
+        if self.level >= 100.0:
+            self.level = 0.0
+        return round(min(100.0, max(0.0, self.level + self._rng.gauss(0.0, self.noise))), 1)
+
+
+class DepthSensor:
+    """UDP server: SUBSCRIBE registers the sender, readings go out at `rate` Hz to every subscriber."""
+
+    def __init__(self, host="127.0.0.1", port=5002, rate=2.0, jitter=0.0, loss=0.0,
+                 ttl_s=30.0, model=None, seed=None):
+        self.rate = rate
+        self.jitter = jitter
+        self.loss = loss
+        self.ttl_s = ttl_s
+        self.model = model or FillModel(seed=seed)
+        self.packets_sent = 0
+        self.packets_lost = 0
+        self.subscribes = 0
+
+        self._rng = random.Random(seed)
+        self._subscribers = {}  # addr -> last SUBSCRIBE (monotonic)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, port))
+        self._sock.settimeout(0.5)
+        self.address = self._sock.getsockname()
+        self._threads = []
+
+    @property
+    def subscribers(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def start(self):
+        for target, name in ((self._listen, "depth-listen"), (self._push, "depth-push")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        self._sock.close()
+
+    def _packet(self):
+        with self._lock:
+            fill = self.model.read()
+        return json.dumps({"fill_percentage": fill, "ts": time.time()}).encode("utf-8")
+
+    def _send(self, addr, packet):
+        if self.loss and self._rng.random() < self.loss:
+            self.packets_lost += 1
+            return
+        try:
+            self._sock.sendto(packet, addr)
+            self.packets_sent += 1
+        except OSError:
+            pass
+
+    def _listen(self):
+        while not self._stop.is_set():
+            try:
+                data, addr = self._sock.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            if data.strip() != b"SUBSCRIBE":
+                continue
+            with self._lock:
+                self._subscribers[addr] = time.monotonic()
+            self.subscribes += 1
+            self._send(addr, self._packet())  # the one-shot /fill/ fallback waits for this
+
+    def _push(self):
+        interval = 1.0 / self.rate
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            next_at += interval
+            delay = next_at - time.monotonic()
+            if self.jitter:
+                delay += self._rng.uniform(0.0, self.jitter * interval)
+            if self._stop.wait(max(0.0, delay)):
+                return
+            now = time.monotonic()
+            with self._lock:
+                for addr, seen in list(self._subscribers.items()):
+                    if now - seen > self.ttl_s:
+                        del self._subscribers[addr]
+                targets = list(self._subscribers)
+            if targets:
+                packet = self._packet()
+                for addr in targets:
+                    self._send(addr, packet)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5002)
+    parser.add_argument("--rate", type=float, default=2.0, help="readings per second per subscriber")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra delay, as a fraction of the interval")
+    parser.add_argument("--loss", type=float, default=0.0, help="probability a packet is dropped")
+    parser.add_argument("--ttl", type=float, default=30.0, help="forget subscribers after this many seconds")
+    parser.add_argument("--fill-rate", type=float, default=0.5, help="percentage points per second")
+    args = parser.parse_args()
+
+    sensor = DepthSensor(
+        args.host, args.port, args.rate, args.jitter, args.loss, args.ttl, FillModel(per_s=args.fill_rate),
+    ).start()
+    print(f"Depth sensor on udp://{sensor.address[0]}:{sensor.address[1]} at {args.rate} Hz")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"[sensor] {sensor.subscribers} subscribers, {sensor.packets_sent} packets sent, "
+                  f"{sensor.packets_lost} lost, fill {sensor.model.level:.1f}%")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sensor.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Fake vision process: emits logged-item events at a configurable rate.
+
+    cd back && python -m simulator.event_generator [--rate 20] [--seconds 60] [--sink local]
+    cd back && python -m simulator.event_generator --sink ingest --api http://127.0.0.1:8000 --nodes 4
+
+--sink local does what VisionBetter.py does for each logged item: one
+datagram on the event bus (app/eventbus.py) plus a row queued for
+current.csv (EVENTS_CSV, or --csv). --sink ingest behaves like --nodes
+edge nodes shipping to POST /events/batch through IngestClient.
+Arrivals are evenly spaced, or a Poisson process with --poisson; --burst N
+sends N events back to back at each arrival (an armful of trash).
+"""
+import argparse
+import itertools
+import os
+import random
+import threading
+import time
+
+from app.eventbus import AsyncCsvWriter, EventPublisher, new_event_id
+from app.store import CSV_FIELDS, get_current_csv_path
+from ingest_client import IngestClient
+
+ITEMS = [
+    ("plastic bottle", "plastic"),
+    ("soda can", "metal"),
+    ("glass bottle", "glass"),
+    ("paper cup", "paper"),
+    ("banana peel", "fruit"),
+    ("pizza crust", "food"),
+    ("chip bag", "unknown"),
+]
+
+
+class LocalSink:
+    """Event bus + async csv append, like the local vision process."""
+
+    def __init__(self, csv_path=None, bus_path=None):
+        self.bus = EventPublisher(bus_path)
+        self.csv = AsyncCsvWriter(str(csv_path or get_current_csv_path()), CSV_FIELDS)
+
+    def send(self, event):
+        self.bus.publish(event)
+        self.csv.write(event)
+
+    def close(self):
+        self.csv.close()
+        self.bus.close()
+
+
+class IngestSink:
+    """One IngestClient per simulated edge node; events go round-robin."""
+
+    def __init__(self, api_url, nodes=1, token=""):
+        self.clients = [IngestClient(api_url, f"sim-{i}", token=token) for i in range(nodes)]
+        self._next = itertools.cycle(self.clients)
+
+    def send(self, event):
+        next(self._next).publish(event)
+
+    def close(self):
+        for client in self.clients:
+            client.close()
+
+    @property
+    def pending(self):
+        return sum(c.pending for c in self.clients)
+
+
+class EventGenerator:
+    """
+    Sends events to `sink` at `rate` per second from a background thread.
+    sent_at[i] is the time.monotonic() at which event i was handed to the
+    sink, for measuring how long it takes to show up downstream.
+    """
+
+    def __init__(self, sink, rate=20.0, poisson=False, burst=1, seed=None):
+        self.sink = sink
+        self.rate = rate
+        self.poisson = poisson
+        self.burst = max(1, burst)
+        self.sent_at = []
+        self._rng = random.Random(seed)
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def sent(self):
+        return len(self.sent_at)
+
+    def make_event(self):
+        item, coarse = self._rng.choice(ITEMS)
+        x, y = self._rng.randrange(0, 1280), self._rng.randrange(0, 720)
+        return {
+            "timestamp": time.time(),
+            "location": f"{x},{y}",
+            "item": item,
+            "classification": coarse,
+            "event_id": new_event_id(),
+        }
+
+    def start(self, seconds=None):
+        self._thread = threading.Thread(target=self._run, args=(seconds,), name="event-generator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+
+    def join(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, seconds):
+        interval = self.burst / self.rate
+        start = time.monotonic()
+        next_at = start
+        while not self._stop.is_set():
+            if seconds is not None and time.monotonic() - start >= seconds:
+                return
+            for _ in range(self.burst):
+                self.sink.send(self.make_event())
+                self.sent_at.append(time.monotonic())
+            next_at += self._rng.expovariate(1.0 / interval) if self.poisson else interval
+            self._stop.wait(max(0.0, next_at - time.monotonic()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=20.0, help="events per second")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--poisson", action="store_true", help="random (exponential) gaps between arrivals")
+    parser.add_argument("--burst", type=int, default=1, help="events per arrival")
+    parser.add_argument("--sink", choices=("local", "ingest"), default="local")
+    parser.add_argument("--csv", default=os.getenv("EVENTS_CSV", ""), help="local sink: csv to append to")
+    parser.add_argument("--api", default="http://127.0.0.1:8000", help="ingest sink: API base URL")
+    parser.add_argument("--nodes", type=int, default=1, help="ingest sink: simulated edge nodes")
+    args = parser.parse_args()
+
+    if args.sink == "local":
+        sink = LocalSink(args.csv or None)
+    else:
+        sink = IngestSink(args.api, args.nodes, os.getenv("INGEST_TOKEN", ""))
+    generator = EventGenerator(sink, args.rate, args.poisson, args.burst).start(args.seconds)
+    try:
+        generator.join()
+    except KeyboardInterrupt:
+        generator.stop()
+    finally:
+        sink.close()
+    print(f"Sent {generator.sent} events in {args.seconds:.0f}s to the {args.sink} sink")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+End-to-end load test of the API on simulated inputs, all on loopback.
+
+    cd back && python -m simulator.loadtest [--seconds 20] [--clients 8] [--event-rate 50]
+    cd back && python -m simulator.loadtest --sink ingest --nodes 4 --workers 2
+
+Starts, with every file in a temp dir (the real current.csv is untouched):
+- the fake camera, read by a StreamReader the way VisionBetter.py reads the Pi
+- the fake depth sensor at --sensor-rate Hz (with --sensor-jitter / --sensor-loss)
+- the API as start.sh runs it (uvicorn, --workers), pointed at both via env
+- the event generator: event bus + csv like the local vision process, or
+  --nodes edge nodes posting to /events/batch
+- --clients dashboard clients polling ENDPOINTS round-robin on keep-alive
+  connections (with If-None-Match, as the dashboard does for /logs/)
+
+Reported: per endpoint req/s, 304s, errors and latency percentiles; events
+accepted per second and publish -> visible latency (a probe polls
+/totalTrash/ and matches the count against send times, so with several
+ingest nodes it's approximate); fill packets sent vs received by the API;
+camera frames/s and JPEG decode time.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from stream import StreamReader
+from simulator.depth_sensor import DepthSensor
+from simulator.event_generator import EventGenerator, IngestSink, LocalSink
+from simulator.mjpeg_camera import MjpegCamera, synthetic_jpegs
+
+ENDPOINTS = ["/logs/?limit=100", "/totalTrash/", "/fill/", "/health/"]
+BACK_DIR = Path(__file__).resolve().parents[1]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def get_json(port, path, timeout=5.0):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        conn.request("GET", path)
+        resp = conn.getresponse()
+        return resp.status, json.loads(resp.read() or b"null")
+    finally:
+        conn.close()
+
+
+def start_api(port, workers, env, timeout_s=30.0):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--no-access-log", "--log-level", "warning"],
+        cwd=BACK_DIR, env=env,
+    )
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if get_json(port, "/health/", timeout=1.0)[0] == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("API did not come up")
+
+
+class Client(threading.Thread):
+    """One dashboard: requests ENDPOINTS in turn, recording latency per path."""
+
+    def __init__(self, port, stop, think_s=0.0):
+        super().__init__(daemon=True)
+        self.port = port
+        self.stop_event = stop
+        self.think_s = think_s
+        self.latency = defaultdict(list)
+        self.not_modified = defaultdict(int)
+        self.errors = defaultdict(int)
+
+    def run(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        etags = {}
+        i = 0
+        while not self.stop_event.is_set():
+            path = ENDPOINTS[i % len(ENDPOINTS)]
+            i += 1
+            headers = {"Accept-Encoding": "gzip"}
+            if path in etags:
+                headers["If-None-Match"] = etags[path]
+            t0 = time.perf_counter()
+            try:
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+            except OSError:
+                self.errors[path] += 1
+                conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+                continue
+            self.latency[path].append(time.perf_counter() - t0)
+            if resp.status == 304:
+                self.not_modified[path] += 1
+            elif resp.status != 200:
+                self.errors[path] += 1
+            elif resp.getheader("ETag"):
+                etags[path] = resp.getheader("ETag")
+            if self.think_s:
+                self.stop_event.wait(self.think_s)
+
+
+class VisibilityProbe(threading.Thread):
+    """Polls /totalTrash/; event i counts as visible once the total exceeds i."""
+
+    def __init__(self, port, generator, stop, interval_s=0.02):
+        super().__init__(daemon=True)
+        self.port = port
+        self.generator = generator
+        self.stop_event = stop
+        self.interval_s = interval_s
+        self.visible = 0
+        self.latency = []
+
+    def run(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        while not self.stop_event.wait(self.interval_s):
+            try:
+                conn.request("GET", "/totalTrash/")
+                total = json.loads(conn.getresponse().read())["total"]
+            except (OSError, ValueError, KeyError):
+                conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+                continue
+            now = time.monotonic()
+            sent_at = self.generator.sent_at
+            for i in range(self.visible, min(total, len(sent_at))):
+                self.latency.append(now - sent_at[i])
+            self.visible = max(self.visible, total)
+
+
+class CameraReader(threading.Thread):
+    """Pulls the fake camera through StreamReader (MJPEG direct) and counts frames."""
+
+    def __init__(self, url, stop):
+        super().__init__(daemon=True)
+        self.reader = StreamReader(url, mjpeg_direct=True)
+        self.stop_event = stop
+        self.decode_times = []
+
+    def run(self):
+        while not self.stop_event.is_set():
+            ok, _ = self.reader.read()
+            if not ok:
+                return
+            if self.reader.decode_times:
+                self.decode_times.append(self.reader.decode_times[-1])
+
+    def close(self):
+        self.reader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--think", type=float, default=0.0, help="pause between a client's requests (s)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--event-rate", type=float, default=50.0, help="events per second")
+    parser.add_argument("--poisson", action="store_true")
+    parser.add_argument("--burst", type=int, default=1)
+    parser.add_argument("--sink", choices=("local", "ingest"), default="local")
+    parser.add_argument("--nodes", type=int, default=1, help="ingest sink: simulated edge nodes")
+    parser.add_argument("--sensor-rate", type=float, default=5.0)
+    parser.add_argument("--sensor-jitter", type=float, default=0.2)
+    parser.add_argument("--sensor-loss", type=float, default=0.0)
+    parser.add_argument("--camera-fps", type=float, default=15.0)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="trashcam_load_"))
+    stop = threading.Event()
+    port = free_port()
+
+    camera = MjpegCamera(synthetic_jpegs(), port=0, fps=args.camera_fps).start()
+    sensor = DepthSensor(port=0, rate=args.sensor_rate, jitter=args.sensor_jitter, loss=args.sensor_loss).start()
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        WORKERS=str(args.workers),
+        EVENTS_CSV=str(tmp / "current.csv"),
+        EVENT_BUS_PATH=str(tmp / "events.sock"),
+        UDP_SERVER_HOST="127.0.0.1",
+        UDP_SERVER_PORT=str(sensor.address[1]),
+        VIDEO_SOCKET_PATH=str(tmp / "video.sock"),
+        SNAPSHOT_DIR=str(tmp / "snapshots"),
+        CLIP_DIR=str(tmp / "clips"),
+        DETECTION_CONFIG_PATH=str(tmp / "detection_config.json"),
+    )
+    api = start_api(port, args.workers, env)
+    if args.sink == "local":
+        sink = LocalSink(env["EVENTS_CSV"], env["EVENT_BUS_PATH"])
+    else:
+        sink = IngestSink(f"http://127.0.0.1:{port}", args.nodes)
+
+    print(f"API :{port} ({args.workers} worker(s)), camera {camera.url}, "
+          f"sensor udp :{sensor.address[1]}, files in {tmp}")
+    generator = EventGenerator(sink, args.event_rate, args.poisson, args.burst)
+    probe = VisibilityProbe(port, generator, stop)
+    cam_reader = CameraReader(camera.url, stop)
+    clients = [Client(port, stop, args.think) for _ in range(args.clients)]
+    try:
+        for thread in [probe, cam_reader] + clients:
+            thread.start()
+        started = time.monotonic()
+        generator.start(args.seconds)
+        generator.join()
+        elapsed = time.monotonic() - started
+        # let the pipeline drain before stopping the probe
+        deadline = time.monotonic() + 10.0
+        while probe.visible < generator.sent and time.monotonic() < deadline:
+            time.sleep(0.05)
+        stop.set()
+        _, metrics = get_json(port, "/health/metrics")
+        sensor_sent = sensor.packets_sent
+    finally:
+        stop.set()
+        cam_reader.close()
+        sink.close()
+        api.terminate()
+        api.wait()
+        sensor.stop()
+        camera.stop()
+
+    print(f"\n{'endpoint':<20}{'req/s':>9}{'304':>8}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for path in ENDPOINTS:
+        latency = [t for c in clients for t in c.latency[path]]
+        not_modified = sum(c.not_modified[path] for c in clients)
+        errors = sum(c.errors[path] for c in clients)
+        print(f"{path:<20}{len(latency) / elapsed:>9.0f}{not_modified:>8}{errors:>8}"
+              f"{percentile(latency, 0.5) * 1000:>9.1f}{percentile(latency, 0.95) * 1000:>9.1f}"
+              f"{percentile(latency, 0.99) * 1000:>9.1f}")
+
+    print(f"\n{'pipeline':<20}{'sent':>9}{'arrived':>9}{'per s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    lat = probe.latency
+    print(f"{'events (' + args.sink + ')':<20}{generator.sent:>9}{probe.visible:>9}{probe.visible / elapsed:>9.1f}"
+          f"{percentile(lat, 0.5) * 1000:>9.1f}{percentile(lat, 0.95) * 1000:>9.1f}{percentile(lat, 0.99) * 1000:>9.1f}")
+    fill_packets = metrics.get("fillPackets", 0)
+    print(f"{'fill packets':<20}{sensor_sent:>9}{fill_packets:>9}{fill_packets / elapsed:>9.1f}")
+    decode = cam_reader.decode_times
+    frames = cam_reader.reader.frames
+    print(f"{'camera frames':<20}{camera.frames_sent:>9}{frames:>9}{frames / elapsed:>9.1f}"
+          f"{percentile(decode, 0.5) * 1000:>9.1f}{percentile(decode, 0.95) * 1000:>9.1f}"
+          f"{percentile(decode, 0.99) * 1000:>9.1f}")
+    print("(camera latency columns: JPEG decode time)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Fake Pi camera: serves a looping multipart MJPEG stream over HTTP.
+
+    cd back && python -m simulator.mjpeg_camera [--frames DIR] [--fps 15] [--port 8090]
+    PI_URL=http://127.0.0.1:8090/stream.mjpeg python VisionBetter.py
+
+Frames come from a directory of recorded images (looped) or, without
+--frames, from a synthetic scene with an item falling into the bin.
+--drop-every N closes each connection after N frames to exercise the
+reader's reconnect path.
+"""
+import argparse
+import itertools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+BOUNDARY = b"frame"
+
+
+def load_jpegs(frames_dir, quality=80):
+    """Every image in frames_dir as JPEG bytes (re-encoded if not already .jpg)."""
+    out = []
+    for path in sorted(Path(frames_dir).iterdir()):
+        suffix = path.suffix.lower()
+        if suffix in (".jpg", ".jpeg"):
+            out.append(path.read_bytes())
+        elif suffix in (".png", ".bmp"):
+            ok, buf = cv2.imencode(".jpg", cv2.imread(str(path)), [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if ok:
+                out.append(buf.tobytes())
+    if not out:
+        raise SystemExit(f"No frames found in {frames_dir}")
+    return out
+
+
+def synthetic_jpegs(width=1280, height=720, n=60, quality=80):
+    """A gray bin with a coloured box falling through it, n frames long."""
+    out = []
+    for i in range(n):
+        frame = np.full((height, width, 3), 90, np.uint8)
+        cv2.rectangle(frame, (width // 4, height // 3), (3 * width // 4, height - 10), (60, 60, 60), 4)
+        y = int(height * 0.3 + (height * 0.6) * i / n)
+        cv2.rectangle(frame, (width // 2 - 30, y), (width // 2 + 30, y + 80), (40, 40, 200), -1)
+        cv2.putText(frame, f"sim {i:03d}", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        out.append(buf.tobytes())
+    return out
+
+
+class MjpegCamera:
+    """Threaded HTTP server streaming `jpegs` in a loop at `fps` to every client."""
+
+    def __init__(self, jpegs, host="127.0.0.1", port=8090, fps=15.0, drop_every=0):
+        self.jpegs = jpegs
+        self.fps = fps
+        self.drop_every = drop_every
+        self.frames_sent = 0
+        camera = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                camera._serve(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_port}/stream.mjpeg"
+        self._thread = None
+
+    def _serve(self, handler):
+        handler.send_response(200)
+        handler.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY.decode()}")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.end_headers()
+        interval = 1.0 / self.fps
+        next_at = time.perf_counter()
+        try:
+            for sent, jpeg in enumerate(itertools.cycle(self.jpegs), start=1):
+                handler.wfile.write(
+                    b"--" + BOUNDARY + b"\r\nContent-Type: image/jpeg\r\n"
+                    + f"Content-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg + b"\r\n"
+                )
+                self.frames_sent += 1
+                if self.drop_every and sent % self.drop_every == 0:
+                    return  # simulate a Wi-Fi drop
+                next_at += interval
+                time.sleep(max(0.0, next_at - time.perf_counter()))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mjpeg-camera", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", help="directory of recorded frames (default: synthetic)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--fps", type=float, default=15.0)
+    parser.add_argument("--drop-every", type=int, default=0, help="close the connection every N frames")
+    args = parser.parse_args()
+
+    jpegs = load_jpegs(args.frames) if args.frames else synthetic_jpegs()
+    camera = MjpegCamera(jpegs, args.host, args.port, args.fps, args.drop_every)
+    print(f"Serving {len(jpegs)} frames at {args.fps} fps on {camera.url}")
+    try:
+        camera.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
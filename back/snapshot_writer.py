@@ -0,0 +1,180 @@
+import hashlib
+import os
+import queue
+from collections import OrderedDict
+from pathlib import Path
+from threading import Thread
+
+import cv2
+
+from app.snapshots import default_snapshot_dir, object_path
+
+
+class SnapshotWriter:
+    """
+    Vision side of app/snapshots.py. submit() copies the bbox region out of
+    the frame (a few KB) and queues it; a background thread downsizes,
+    JPEG-encodes, hashes, writes and evicts. A full queue drops the
+    snapshot rather than wait, so the frame loop never blocks on disk.
+
+    Once the index.log lines of evicted objects outnumber the live ones
+    (and at least compact_min of them), the log is rewritten without them,
+    so it stays proportional to what the store holds.
+    """
+
+    def __init__(self, root: Path = None, max_bytes: int = 256 * 1024 * 1024,
+                 max_side: int = 256, pad: float = 0.1, quality: int = 80, max_queue: int = 64,
+                 compact_min: int = 1024):
+        self.root = Path(root or default_snapshot_dir())
+        self.max_bytes = max_bytes
+        self.max_side = max_side
+        self.pad = pad
+        self.quality = quality
+        self.compact_min = compact_min
+        self.written = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.compactions = 0
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._objects = OrderedDict()   # digest -> (size, mtime), oldest first
+        self._total = 0
+        self._refs = {}   # digest -> index.log lines naming it
+        self._live = 0    # index.log lines whose object still exists
+        self._dead = 0    # ... and whose object was evicted
+        self._thread = Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, event_id: str, frame, bbox) -> bool:
+        h, w = frame.shape[:2]
+        x1, y1, x2, y2 = bbox
+        px, py = int((x2 - x1) * self.pad), int((y2 - y1) * self.pad)
+        x1, y1 = max(0, int(x1) - px), max(0, int(y1) - py)
+        x2, y2 = min(w, int(x2) + px), min(h, int(y2) + py)
+        if x2 <= x1 or y2 <= y1:
+            return False
+        try:
+            self._queue.put_nowait((event_id, frame[y1:y2, x1:x2].copy()))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def close(self):
+        """Write whatever is still queued, then stop the thread."""
+        self._queue.put(None)
+        self._thread.join(timeout=5.0)
+
+    # ---------- background ----------
+
+    def _run(self):
+        self._scan()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            event_id, crop = item
+            try:
+                h, w = crop.shape[:2]
+                scale = self.max_side / float(max(h, w))
+                if scale < 1.0:
+                    crop = cv2.resize(crop, (max(1, int(w * scale)), max(1, int(h * scale))),
+                                      interpolation=cv2.INTER_AREA)
+                ok, buf = cv2.imencode(".jpg", crop, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                if ok:
+                    self._store(event_id, buf.tobytes())
+            except Exception as e:
+                print(f"[snapshots] Failed to store snapshot for {event_id}: {e}")
+
+    def _scan(self):
+        """Size and age of what's already on disk (a restart keeps the store)."""
+        found = []
+        for path in (self.root / "objects").glob("*/*.jpg"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            found.append((st.st_mtime, path.stem, st.st_size))
+        for mtime, digest, size in sorted(found):
+            self._objects[digest] = (size, mtime)
+            self._total += size
+        try:
+            lines = (self.root / "index.log").read_bytes().decode("ascii", errors="replace").splitlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            digest = line.partition(" ")[2]
+            if digest in self._objects:
+                self._refs[digest] = self._refs.get(digest, 0) + 1
+                self._live += 1
+            else:
+                self._dead += 1
+        if self._dead:
+            self._compact()
+
+    def _store(self, event_id, jpeg):
+        digest = hashlib.sha256(jpeg).hexdigest()
+        path = object_path(self.root, digest)
+        if digest in self._objects:
+            os.utime(path)  # same picture again: just make it recent
+            self._objects.move_to_end(digest)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(jpeg)
+            os.replace(tmp, path)  # readers never see half an image
+            self._objects[digest] = (len(jpeg), path.stat().st_mtime)
+            self._total += len(jpeg)
+
+        fd = os.open(self.root / "index.log", os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, f"{event_id} {digest}\n".encode("ascii", errors="replace"))
+        finally:
+            os.close(fd)
+        self._refs[digest] = self._refs.get(digest, 0) + 1
+        self._live += 1
+        self.written += 1
+        self._evict(keep=digest)
+        if self._dead > max(self.compact_min, self._live):
+            self._compact()
+
+    def _evict(self, keep):
+        while self._total > self.max_bytes and len(self._objects) > 1:
+            digest, (size, mtime) = next(iter(self._objects.items()))
+            if digest == keep:
+                break  # everything older was just used; stay over the cap until next time
+            path = object_path(self.root, digest)
+            try:
+                current = path.stat().st_mtime
+            except FileNotFoundError:
+                current = mtime
+            if current > mtime:
+                # served by the API since we last looked: recently used after all
+                self._objects[digest] = (size, current)
+                self._objects.move_to_end(digest)
+                continue
+            del self._objects[digest]
+            self._total -= size
+            self.evicted += 1
+            refs = self._refs.pop(digest, 0)
+            self._live -= refs
+            self._dead += refs
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _compact(self):
+        """Rewrite index.log with only the lines whose object still exists."""
+        path = self.root / "index.log"
+        try:
+            lines = path.read_bytes().decode("ascii", errors="replace").splitlines()
+        except FileNotFoundError:
+            return
+        kept = [line for line in lines if line.partition(" ")[2] in self._objects]
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes("".join(f"{line}\n" for line in kept).encode("ascii", errors="replace"))
+        os.replace(tmp, path)  # a new inode: the API re-reads it from the start
+        self._live = len(kept)
+        self._dead = 0
+        self.compactions += 1
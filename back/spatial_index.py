@@ -0,0 +1,104 @@
+import time
+from collections import deque
+
+
+class SpatialDedupeIndex:
+    """
+    Grid of recently logged positions, per class, with time-based expiry.
+
+    A position (x, y) falls into cell (x // cell_px, y // cell_px). An item
+    is a duplicate if the same class was logged in that cell or one of its
+    neighbours (within neighbor_radius cells) less than ttl_s seconds ago.
+    Keys are packed ints, so a lookup is (2r+1)^2 dict probes and memory
+    is bounded by max_entries regardless of how long the camera runs.
+    """
+
+    _AXIS_BITS = 20
+    _AXIS_MASK = (1 << _AXIS_BITS) - 1
+
+    def __init__(self, cell_px=45, ttl_s=60.0, neighbor_radius=1, max_entries=4096):
+        self.cell_px = max(1, int(cell_px))
+        self.ttl_s = ttl_s
+        self.neighbor_radius = neighbor_radius
+        self.max_entries = max_entries
+        self._class_ids = {}
+        self._class_names = []
+        self._cells = {}          # packed key -> last time logged
+        self._order = deque()     # (time, key) in insertion order, for expiry
+
+    def _class_id(self, cls):
+        cid = self._class_ids.get(cls)
+        if cid is None:
+            cid = len(self._class_names)
+            self._class_ids[cls] = cid
+            self._class_names.append(cls)
+        return cid
+
+    def _key(self, cid, gx, gy):
+        return (
+            (cid << (2 * self._AXIS_BITS))
+            | ((gx & self._AXIS_MASK) << self._AXIS_BITS)
+            | (gy & self._AXIS_MASK)
+        )
+
+    def _unpack(self, key):
+        cid = key >> (2 * self._AXIS_BITS)
+        gx = (key >> self._AXIS_BITS) & self._AXIS_MASK
+        gy = key & self._AXIS_MASK
+        return self._class_names[cid], gx, gy
+
+    def _expire(self, now):
+        cutoff = now - self.ttl_s
+        order = self._order
+        while order and (order[0][0] < cutoff or len(self._cells) > self.max_entries):
+            t, key = order.popleft()
+            # only drop the cell if it wasn't refreshed after this entry
+            if self._cells.get(key) == t:
+                del self._cells[key]
+        # refreshed cells leave stale entries behind; keep the deque bounded too
+        if len(order) > 2 * self.max_entries:
+            self._order = deque(sorted((t, k) for k, t in self._cells.items()))
+
+    def seen(self, cls, x, y, now=None):
+        """True if cls was logged near (x, y) within the last ttl_s seconds."""
+        now = time.time() if now is None else now
+        self._expire(now)
+        cid = self._class_ids.get(cls)
+        if cid is None:
+            return False
+        gx, gy = int(x) // self.cell_px, int(y) // self.cell_px
+        r = self.neighbor_radius
+        cells = self._cells
+        for dx in range(-r, r + 1):
+            for dy in range(-r, r + 1):
+                if self._key(cid, gx + dx, gy + dy) in cells:
+                    return True
+        return False
+
+    def add(self, cls, x, y, now=None):
+        now = time.time() if now is None else now
+        key = self._key(self._class_id(cls), int(x) // self.cell_px, int(y) // self.cell_px)
+        self._cells[key] = now
+        self._order.append((now, key))
+        self._expire(now)
+
+    def check_and_add(self, cls, x, y, now=None):
+        """Record (x, y) for cls; returns True if it was already a duplicate."""
+        now = time.time() if now is None else now
+        if self.seen(cls, x, y, now):
+            return True
+        self.add(cls, x, y, now)
+        return False
+
+    def entries(self):
+        """(cls, x, y, time) per live cell, x/y at the cell origin."""
+        for key, t in self._cells.items():
+            cls, gx, gy = self._unpack(key)
+            yield cls, gx * self.cell_px, gy * self.cell_px, t
+
+    def __len__(self):
+        return len(self._cells)
+
+    def clear(self):
+        self._cells.clear()
+        self._order.clear()
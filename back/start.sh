@@ -1 +1,10 @@
-uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
+# dev (default): single process with autoreload
+# prod:          MODE=prod WORKERS=4 ./start.sh
+#                one worker owns ingestion (csv tail, UDP fill subscription),
+#                the others read its shared-memory snapshot
+if [ "${MODE:-dev}" = "prod" ]; then
+  export WORKERS="${WORKERS:-$(nproc)}"
+  exec uvicorn app.main:app --host 0.0.0.0 --port "${PORT:-8000}" --workers "$WORKERS" --no-access-log
+else
+  uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
+fi
@@ -0,0 +1,175 @@
+import os
+import time
+import urllib.request
+from collections import deque
+
+import cv2
+import numpy as np
+
+# Ask FFmpeg not to buffer/probe: we want the newest frame, not a smooth replay.
+LOW_LATENCY_FFMPEG_OPTIONS = (
+    "fflags;nobuffer|flags;low_delay|probesize;32|analyzeduration;0|max_delay;0"
+)
+
+# JPEG DCT-domain downscale: decoding at 1/2, 1/4, 1/8 skips most of the IDCT work
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+class StreamReader:
+    """
+    Frame source that survives network hiccups.
+
+    read() never gives up on a dropped connection: it reconnects with
+    exponential backoff (backoff_initial doubling up to backoff_max, reset
+    after a good frame) and only returns (False, None) once close() was
+    called. Two backends:
+
+    - OpenCV/FFmpeg (any URL) with low-latency capture options.
+    - mjpeg_direct: read the multipart MJPEG HTTP stream ourselves and
+      decode each JPEG with cv2.imdecode, optionally at 1/reduce scale.
+      The raw JPEG bytes of the last frame are kept in `last_jpeg`.
+    """
+
+    def __init__(self, url, mjpeg_direct=False, reduce=1, timeout_s=5.0,
+                 backoff_initial=0.5, backoff_max=30.0):
+        if reduce not in _REDUCED_FLAGS:
+            raise ValueError(f"reduce must be one of {sorted(_REDUCED_FLAGS)}, got {reduce}")
+        self.url = url
+        self.mjpeg_direct = mjpeg_direct
+        self.reduce = reduce
+        self.timeout_s = timeout_s
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self.reconnects = 0
+        self.frames = 0
+        self.decode_times = deque(maxlen=100)
+        self.last_jpeg = None
+
+        self._backoff = backoff_initial
+        self._closed = False
+        self._cap = None
+        self._http = None
+        self._buf = bytearray()
+
+    # ---------- public ----------
+
+    def read(self):
+        while not self._closed:
+            if not self._is_open() and not self._open():
+                self._wait_backoff()
+                continue
+
+            t0 = time.perf_counter()
+            frame = self._read_mjpeg() if self.mjpeg_direct else self._read_cv()
+            if frame is not None:
+                self.decode_times.append(time.perf_counter() - t0)
+                self.frames += 1
+                self._backoff = self.backoff_initial
+                return True, frame
+
+            print(f"[stream] Lost {self.url}, reconnecting in {self._backoff:.1f}s")
+            self._disconnect()
+            self.reconnects += 1
+            self._wait_backoff()
+        return False, None
+
+    def stats(self):
+        avg = float(np.mean(self.decode_times)) if self.decode_times else 0.0
+        return {
+            "frames": self.frames,
+            "reconnects": self.reconnects,
+            "avg_decode_ms": avg * 1000,
+            "backend": "mjpeg" if self.mjpeg_direct else "ffmpeg",
+        }
+
+    def close(self):
+        self._closed = True
+        self._disconnect()
+
+    release = close  # drop-in for cv2.VideoCapture
+
+    # ---------- connection handling ----------
+
+    def _is_open(self):
+        return self._http is not None if self.mjpeg_direct else self._cap is not None
+
+    def _open(self):
+        try:
+            if self.mjpeg_direct:
+                self._http = urllib.request.urlopen(self.url, timeout=self.timeout_s)
+                self._buf.clear()
+                return True
+
+            os.environ.setdefault("OPENCV_FFMPEG_CAPTURE_OPTIONS", LOW_LATENCY_FFMPEG_OPTIONS)
+            cap = cv2.VideoCapture(self.url, cv2.CAP_FFMPEG)
+            if not cap.isOpened():
+                cap.release()
+                return False
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            self._cap = cap
+            return True
+        except (OSError, ValueError) as e:
+            print(f"[stream] Failed to open {self.url}: {e}")
+            return False
+
+    def _disconnect(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+        if self._http is not None:
+            try:
+                self._http.close()
+            except OSError:
+                pass
+            self._http = None
+
+    def _wait_backoff(self):
+        if self._closed:
+            return
+        time.sleep(self._backoff)
+        self._backoff = min(self._backoff * 2, self.backoff_max)
+
+    # ---------- backends ----------
+
+    def _read_cv(self):
+        ret, frame = self._cap.read()
+        return frame if ret else None
+
+    def _read_mjpeg(self):
+        while True:
+            jpeg = self._next_jpeg()
+            if jpeg is None:
+                return None
+            frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), _REDUCED_FLAGS[self.reduce])
+            if frame is not None:  # skip a corrupt frame, keep the connection
+                self.last_jpeg = jpeg
+                return frame
+
+    def _next_jpeg(self):
+        """Next complete JPEG (SOI..EOI) from the multipart stream, or None on error."""
+        buf = self._buf
+        while True:
+            start = buf.find(b"\xff\xd8")
+            if start != -1:
+                end = buf.find(b"\xff\xd9", start + 2)
+                if end != -1:
+                    jpeg = bytes(buf[start:end + 2])
+                    del buf[:end + 2]
+                    return jpeg
+                # keep the partial frame, drop the multipart headers before it
+                del buf[:start]
+            elif len(buf) > 1:
+                del buf[:-1]
+            try:
+                chunk = self._http.read1(64 * 1024)
+            except (OSError, ValueError):
+                return None
+            if not chunk:
+                return None
+            buf += chunk
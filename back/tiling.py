@@ -0,0 +1,82 @@
+import numpy as np
+
+
+def make_tiles(h, w, tile, overlap):
+    """
+    Overlapping (x1, y1, x2, y2) windows covering an h x w image. Tiles are
+    tile x tile (or the whole axis if it's smaller) and neighbours overlap
+    by `overlap` (fraction of tile), so an item cut by one edge is whole in
+    the next tile.
+    """
+    def starts(length):
+        if length <= tile:
+            return [0]
+        stride = max(1, int(tile * (1.0 - overlap)))
+        out = list(range(0, length - tile, stride))
+        out.append(length - tile)  # last tile flush with the edge
+        return out
+
+    return [
+        (x, y, min(x + tile, w), min(y + tile, h))
+        for y in starts(h)
+        for x in starts(w)
+    ]
+
+
+def nms(boxes, scores, classes, iou_thres):
+    """Class-aware greedy NMS over (N,4) xyxy boxes. Returns kept indices."""
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # shift each class into its own coordinate range so one pass is class-aware
+    offset = classes.astype(np.float64)[:, None] * (boxes.max() + 1.0)
+    b = boxes + offset
+    areas = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    order = np.argsort(-scores)
+
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        iw = np.minimum(b[i, 2], b[rest, 2]) - np.maximum(b[i, 0], b[rest, 0])
+        ih = np.minimum(b[i, 3], b[rest, 3]) - np.maximum(b[i, 1], b[rest, 1])
+        inter = np.clip(iw, 0, None) * np.clip(ih, 0, None)
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_thres]
+    return np.array(keep, dtype=np.int64)
+
+
+def run_tiled(model, image, tile, overlap, conf, iou, **kwargs):
+    """
+    Run the model on overlapping tiles of `image` as one batched call and
+    merge the results with cross-tile NMS.
+
+    Returns (boxes (N,4) xyxy in image coordinates, confs (N,), class ids (N,), names).
+    """
+    h, w = image.shape[:2]
+    tiles = make_tiles(h, w, tile, overlap)
+    crops = [image[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+
+    results = model(crops, verbose=False, conf=conf, iou=iou, imgsz=tile, **kwargs)
+
+    all_boxes, all_confs, all_cls = [], [], []
+    for (x1, y1, _, _), res in zip(tiles, results):
+        if len(res.boxes) == 0:
+            continue
+        boxes = res.boxes.xyxy.cpu().numpy().astype(np.float64)
+        boxes[:, [0, 2]] += x1
+        boxes[:, [1, 3]] += y1
+        all_boxes.append(boxes)
+        all_confs.append(res.boxes.conf.cpu().numpy())
+        all_cls.append(res.boxes.cls.cpu().numpy().astype(np.int64))
+
+    names = results[0].names if results else {}
+    if not all_boxes:
+        return np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=np.int64), names
+
+    boxes = np.concatenate(all_boxes)
+    confs = np.concatenate(all_confs)
+    classes = np.concatenate(all_cls)
+    keep = nms(boxes, confs, classes, iou)
+    return boxes[keep], confs[keep], classes[keep], names
@@ -0,0 +1,197 @@
+import cProfile
+import json
+import os
+import signal
+import threading
+import time
+
+import numpy as np
+
+
+class _Span:
+    """Reusable timer for one span name (no allocation per frame)."""
+
+    __slots__ = ("_ring", "_t0")
+
+    def __init__(self, ring):
+        self._ring = ring
+        self._t0 = 0
+
+    def __enter__(self):
+        self._t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self._ring.record(self._t0, time.perf_counter_ns() - self._t0)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Ring:
+    """Last `capacity` (start_ns, duration_ns) samples of one span."""
+
+    __slots__ = ("starts", "durs", "count", "capacity")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.starts = [0] * capacity
+        self.durs = [0] * capacity
+        self.count = 0
+
+    def record(self, start_ns, dur_ns):
+        i = self.count % self.capacity
+        self.starts[i] = start_ns
+        self.durs[i] = dur_ns
+        self.count += 1
+
+    def samples(self):
+        n = min(self.count, self.capacity)
+        return self.starts[:n], self.durs[:n]
+
+
+class Tracer:
+    """
+    Named spans for the frame loop, kept in fixed-size ring buffers.
+
+        with TRACER.span("inference"):
+            results = model(frame)
+
+    Each span name owns a ring of the last `capacity` (start, duration)
+    samples, so memory is fixed no matter how long the camera runs. Spans
+    are meant for the frame-loop thread; one name must not be open twice
+    at once. When disabled, span() returns a shared no-op.
+    """
+
+    def __init__(self, capacity=2048, enabled=True):
+        self.capacity = capacity
+        self.enabled = enabled
+        self._rings = {}
+        self._spans = {}
+
+    def span(self, name):
+        if not self.enabled:
+            return _NO_SPAN
+        span = self._spans.get(name)
+        if span is None:
+            ring = self._rings[name] = _Ring(self.capacity)
+            span = self._spans[name] = _Span(ring)
+        return span
+
+    def summary(self):
+        """{name: {count, mean_ms, p50_ms, p95_ms, max_ms}} over the buffered samples."""
+        out = {}
+        for name, ring in self._rings.items():
+            _, durs = ring.samples()
+            if not durs:
+                continue
+            ms = np.asarray(durs, dtype=np.float64) / 1e6
+            out[name] = {
+                "count": ring.count,
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "max_ms": float(ms.max()),
+            }
+        return out
+
+    def print_summary(self):
+        summary = self.summary()
+        if not summary:
+            return
+        print(f"{'span':<12} {'count':>8} {'mean ms':>9} {'p50':>8} {'p95':>8} {'max':>8}")
+        for name, s in sorted(summary.items(), key=lambda kv: -kv[1]["mean_ms"]):
+            print(
+                f"{name:<12} {s['count']:>8} {s['mean_ms']:>9.2f} {s['p50_ms']:>8.2f} "
+                f"{s['p95_ms']:>8.2f} {s['max_ms']:>8.2f}"
+            )
+
+    def export_chrome(self, path):
+        """
+        Write the buffered spans as Chrome trace JSON (chrome://tracing,
+        ui.perfetto.dev): one complete ("X") event per sample.
+        """
+        pid = os.getpid()
+        events = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+             "args": {"name": f"vision {pid}"}},
+        ]
+        for name, ring in self._rings.items():
+            starts, durs = ring.samples()
+            events.extend(
+                {"name": name, "ph": "X", "pid": pid, "tid": 0,
+                 "ts": start / 1000.0, "dur": dur / 1000.0}
+                for start, dur in zip(starts, durs)
+            )
+        events.sort(key=lambda e: e.get("ts", 0))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
+
+
+class ProfileTrigger:
+    """
+    On-demand profiling without restarting.
+
+    toggle_profile() starts cProfile; the next call stops it and dumps a
+    pstats file (snakeviz / `python -m pstats`). dump_trace() writes the
+    tracer's Chrome trace. Both can be requested from a signal handler
+    (SIGUSR1 = profile, SIGUSR2 = trace) and run on the next poll() from
+    the frame loop. For sampling instead, `py-spy record --pid <pid>`
+    attaches to the same process from outside.
+    """
+
+    def __init__(self, tracer, out_dir="."):
+        self.tracer = tracer
+        self.out_dir = out_dir
+        self._profiler = None
+        self._want_profile = threading.Event()
+        self._want_trace = threading.Event()
+
+    def install_signal_handlers(self):
+        if not hasattr(signal, "SIGUSR1"):
+            return False  # Windows: keys only
+        signal.signal(signal.SIGUSR1, lambda *_: self._want_profile.set())
+        signal.signal(signal.SIGUSR2, lambda *_: self._want_trace.set())
+        return True
+
+    def poll(self):
+        if self._want_profile.is_set():
+            self._want_profile.clear()
+            self.toggle_profile()
+        if self._want_trace.is_set():
+            self._want_trace.clear()
+            self.dump_trace()
+
+    def toggle_profile(self):
+        if self._profiler is None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+            print(f"[trace] cProfile started (pid {os.getpid()}), trigger again to dump")
+            return None
+        self._profiler.disable()
+        path = self._path("profile", "prof")
+        self._profiler.dump_stats(path)
+        self._profiler = None
+        print(f"[trace] cProfile written to {path}")
+        return path
+
+    def dump_trace(self):
+        path = self.tracer.export_chrome(self._path("trace", "json"))
+        print(f"[trace] Chrome trace written to {path}")
+        return path
+
+    def _path(self, kind, ext):
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return os.path.join(self.out_dir, f"{kind}_{os.getpid()}_{stamp}.{ext}")
@@ -0,0 +1,147 @@
+import json
+import socket
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from app.videofeed import FRAME_HEADER, HAS_UNIX_STREAM, default_video_path
+
+
+class VideoPublisher:
+    """
+    Vision side of /video/{camera} (see app/videofeed.py).
+
+    wants_frame() is the cheap check the frame loop makes: True only while
+    the API reports at least one viewer and the frame cap allows another
+    frame. publish() hands the annotated frame to a background thread that
+    JPEG-encodes and sends it once; if a newer frame arrives first the older
+    one is skipped. With no viewers nothing is encoded or sent, and more
+    viewers never cost this process anything extra. The API being down is
+    not an error: the thread keeps retrying in the background.
+
+    Clip requests from the API (POST /video/{camera}/clip) are queued for
+    take_clip_requests().
+    """
+
+    def __init__(self, camera, path=None, quality=80, retry_s=2.0):
+        self.camera = camera
+        self.path = path or default_video_path()
+        self.quality = quality
+        self.retry_s = retry_s
+        self.viewers = 0
+        self.max_fps = 0.0
+        self.frames_sent = 0
+        self._clip_requests = deque(maxlen=32)
+
+        self._next_due = 0.0
+        self._pending = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._sock = None
+        self._link_up = False
+        self._thread = None
+        if HAS_UNIX_STREAM:
+            self._thread = threading.Thread(target=self._run, name="video-publisher", daemon=True)
+            self._thread.start()
+
+    def wants_frame(self) -> bool:
+        if self.viewers <= 0:
+            return False
+        return self.max_fps <= 0 or time.monotonic() >= self._next_due
+
+    def publish(self, frame):
+        """Queue `frame` for sending; it must not be modified afterwards."""
+        if self.max_fps > 0:
+            self._next_due = time.monotonic() + 1.0 / self.max_fps
+        with self._cond:
+            self._pending = frame
+            self._cond.notify()
+
+    def take_clip_requests(self):
+        """[{"id", "pre_s", "post_s"}] received since the last call."""
+        requests = []
+        while self._clip_requests:
+            requests.append(self._clip_requests.popleft())
+        return requests
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    # ---------- background ----------
+
+    def _run(self):
+        while not self._closed:
+            try:
+                self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._sock.connect(self.path)
+                self._sock.sendall((json.dumps({"camera": self.camera}) + "\n").encode("utf-8"))
+            except OSError:
+                self._sock.close()
+                self._sock = None
+                with self._cond:
+                    self._cond.wait(self.retry_s)
+                continue
+
+            self._link_up = True
+            control = threading.Thread(target=self._read_control, args=(self._sock,), daemon=True)
+            control.start()
+            try:
+                self._send_frames(self._sock)
+            except OSError:
+                pass
+            self.viewers = 0
+            self._sock.close()
+            self._sock = None
+            control.join(timeout=1.0)
+
+    def _send_frames(self, sock):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed and self._link_up:
+                    self._cond.wait()
+                if self._closed or not self._link_up:
+                    return
+                frame, self._pending = self._pending, None
+            ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok:
+                continue
+            sock.sendall(FRAME_HEADER.pack(len(buf)) + buf.tobytes())
+            self.frames_sent += 1
+
+    def _read_control(self, sock):
+        reader = sock.makefile("rb")
+        try:
+            for line in reader:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                if "clip" in message:
+                    self._clip_requests.append(message["clip"])
+                    continue
+                self.max_fps = float(message.get("max_fps", self.max_fps))
+                self.viewers = int(message.get("viewers", 0))
+        except OSError:
+            pass
+        finally:
+            self.viewers = 0
+            self._link_up = False
+            reader.close()
+            # wake the sender so it notices the connection is gone
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            with self._cond:
+                self._cond.notify()
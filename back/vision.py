@@ -1,6 +1,7 @@
 import cv2
 import time
 import os
+import socket
 from datetime import datetime
 import math
 
@@ -10,6 +11,13 @@ from ultralytics import YOLO   # note: YOLO-World weights, same API
 from dotenv import load_dotenv
 import csv
 
+from app.eventbus import AsyncCsvWriter, EventPublisher, new_event_id
+from app.store import CSV_FIELDS, prepare_csv
+from checkpoint import atomic_write
+from ingest_client import IngestClient
+from stream import StreamReader
+from video_publisher import VideoPublisher
+
 # --------------------------
 # YOLO-World setup
 # --------------------------
@@ -80,8 +88,28 @@ CATEGORY_MAP = {
 
 currentItems = []
 
+# new items reach the API over the local bus (or, with INGEST_URL set, are
+# batched to a central API); current.csv is appended in the background
+INGEST_URL = os.getenv("INGEST_URL", "")
+EVENT_BUS = (
+    IngestClient(INGEST_URL, os.getenv("NODE_ID", socket.gethostname()), token=os.getenv("INGEST_TOKEN", ""))
+    if INGEST_URL else EventPublisher()
+)
+# annotated frames for the API's /video/{camera}; encoded only while someone watches
+VIDEO = VideoPublisher(os.getenv("CAMERA_ID", "default"))
+prepare_csv('current.csv')  # older layouts are converted, not appended to
+CSV_WRITER = AsyncCsvWriter('current.csv', fieldnames=CSV_FIELDS)
+
+# per-item state: when/where we last logged that item (one entry per label, so bounded)
+last_seen = {}              # item -> {"time": float, "x": int, "y": int}
+TIME_THRESH = 10.0           # seconds between logs for same item
+DIST_THRESH = 50.0          # pixels between logs for same item
+LAST_SEEN_SAVE_INTERVAL = 5.0  # seconds; a crash loses at most this much dedupe state
+
+
 def storeLastSeen():
-    with open("lastSeen.csv", "w", newline="") as f:
+    # temp file + rename: a crash mid-save keeps the previous snapshot
+    with atomic_write("lastSeen.csv", "w", newline="") as f:
         w = csv.writer(f)
         w.writerow(["item", "time", "x", "y"])
         for item, d in last_seen.items():
@@ -95,29 +123,14 @@ def restoreLastSeen():
     with open("lastSeen.csv", "r", newline="") as f:
         r = csv.DictReader(f)
         for row in r:
-            item = row["item"]
-            last_seen[item] = {
+            last_seen[row["item"]] = {
                 "time": float(row["time"]),
                 "x": int(row["x"]),
-                "y": int(row["y"])
+                "y": int(row["y"]),
             }
 
 
-
-
-
-
-# per-item state: when/where we last logged that item
-last_seen = {}              # item -> {"time": float, "x": int, "y": int}
 restoreLastSeen()
-TIME_THRESH = 10.0           # seconds between logs for same item
-DIST_THRESH = 50.0          # pixels between logs for same item
-
-
-
-
-
-
 
 
 def classify_into_3(item: str) -> str:
@@ -129,20 +142,12 @@ def addToCan(timestamp, location, item, classification):
         "timestamp": timestamp,
         "location": f"{location}",
         "item": item,
-        "classification": classification
+        "classification": classification,
+        "event_id": new_event_id(),
     })
 
-    with open('current.csv', 'a', newline='') as csvfile:
-        writer = csv.DictWriter(
-            csvfile,
-            fieldnames=["timestamp", "location", "item", "classification"]
-        )
-
-        # If file is empty, write header
-        if csvfile.tell() == 0:
-            writer.writeheader()
-
-        writer.writerow(currentItems[-1])
+    EVENT_BUS.publish(currentItems[-1])
+    CSV_WRITER.write(currentItems[-1])
 
 
 def parseLocation(loc_str: str):
@@ -171,21 +176,14 @@ def process_frame(frame):
         cx, cy = int(x1), int(y1)   # use top-left as reference point
 
         info = last_seen.get(item)
-        should_log = False
-
         if info is None:
             # first time we see this item label this session
             should_log = True
         else:
-            prev_time = info["time"]
-            px, py = info["x"], info["y"]
-
-            dt = now - prev_time
-            dist = math.sqrt((cx - px) ** 2 + (cy - py) ** 2)
-
+            dt = now - info["time"]
+            dist = math.hypot(cx - info["x"], cy - info["y"])
             # only log again if it's both far in time and space
-            if dt > TIME_THRESH and dist > DIST_THRESH:
-                should_log = True
+            should_log = dt > TIME_THRESH and dist > DIST_THRESH
 
         if should_log:
             addToCan(now, (cx, cy), item, category)
@@ -225,31 +223,35 @@ def process_frame(frame):
 
 def main():
 
-    cap = cv2.VideoCapture(VIDEO_URL, cv2.CAP_FFMPEG)
-
-    if not cap.isOpened():
-        print("Failed to open stream")
-        return
+    # reconnects with backoff on network hiccups instead of ending the run
+    cap = StreamReader(VIDEO_URL)
+    last_store = time.time()
 
     while True:
         ret, frame = cap.read()
 
-        # frame = frame+20
-        frame[frame > 255] = 255
-
         if not ret:
             print("Failed to read frame")
             break
 
         frame = process_frame(frame)
+        if VIDEO.wants_frame():
+            VIDEO.publish(frame)
         cv2.imshow("YOLO-World Stream", frame)
 
+        if time.time() - last_store > LAST_SEEN_SAVE_INTERVAL:
+            storeLastSeen()
+            last_store = time.time()
+
         key = cv2.waitKey(1) & 0xFF
         if key == ord('q'):
             break
 
 
     storeLastSeen()
+    CSV_WRITER.close()
+    EVENT_BUS.close()
+    VIDEO.close()
 
     cap.release()
     cv2.destroyAllWindows()
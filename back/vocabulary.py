@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+
+
+class ModelSwapper:
+    """
+    Lets the detector's vocabulary change without stalling the frame loop.
+
+    request(prompts) builds a model for that vocabulary on a background
+    thread with loader(prompts) (load + set_classes) while the current model
+    keeps serving frames; poll(), called between frames, hands the new one
+    over. Models are cached per vocabulary (their text embeddings are baked
+    in), so switching back to a recent vocabulary is immediate. If several
+    requests arrive while one is building, only the latest is built next.
+    """
+
+    def __init__(self, model, prompts, loader, max_cached=2):
+        self.model = model
+        self.prompts = tuple(prompts)
+        self.max_cached = max(1, max_cached)
+        self._loader = loader
+        self._cache = OrderedDict({self.prompts: model})
+        self._lock = threading.Lock()
+        self._wanted = None     # latest requested vocabulary not built yet
+        self._ready = None      # (prompts, model) waiting for poll()
+        self._thread = None
+
+    def request(self, prompts):
+        prompts = tuple(prompts)
+        with self._lock:
+            if prompts in self._cache:
+                self._wanted = None
+                self._ready = None if prompts == self.prompts else (prompts, self._cache[prompts])
+                return
+            self._wanted = prompts
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._build, name="vocab-swap", daemon=True)
+                self._thread.start()
+
+    def poll(self):
+        """The newly built model if one is ready (swap it in now), else None."""
+        if self._ready is None:
+            return None
+        with self._lock:
+            if self._ready is None:
+                return None
+            prompts, model = self._ready
+            self._ready = None
+            self._cache.move_to_end(prompts)
+        self.model = model
+        self.prompts = prompts
+        print(f"[vocab] Switched to a {len(prompts)}-class vocabulary")
+        return model
+
+    @property
+    def building(self):
+        return self._thread is not None
+
+    def _build(self):
+        while True:
+            with self._lock:
+                prompts = self._wanted
+                if prompts is None:
+                    self._thread = None
+                    return
+
+            print(f"[vocab] Building model for {len(prompts)} classes in the background...")
+            try:
+                model = self._loader(list(prompts))
+            except Exception as e:
+                print(f"[vocab] Failed to build vocabulary, keeping the current one: {e}")
+                with self._lock:
+                    if self._wanted == prompts:
+                        self._wanted = None
+                continue
+
+            with self._lock:
+                self._cache[prompts] = model
+                while len(self._cache) > self.max_cached:
+                    self._cache.popitem(last=False)
+                if self._wanted == prompts:
+                    self._wanted = None
+                    self._ready = (prompts, model)
+                # otherwise a newer vocabulary was requested meanwhile: loop